@@ -5,3 +5,8 @@ from django.apps import AppConfig
 class AbstractsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'abstracts'
+
+    def ready(self) -> None:
+        """Connect signal handlers and checks of the application."""
+        import abstracts.checks  # noqa
+        import abstracts.signals  # noqa
@@ -0,0 +1,26 @@
+# Python
+from time import time_ns
+
+# Django
+from django.core.cache import cache
+
+
+class CacheVersion:
+    """Version counter shared by the processes through the Django cache."""
+
+    def __init__(self, key: str) -> None:
+        self.key: str = key
+
+    def get(self) -> int:
+        """Get current version."""
+        # Evicted counter starts from a new value to never match an old one
+        return cache.get_or_set(self.key, time_ns, timeout=None)
+
+    def bump(self) -> int:
+        """Change the version making every process drop its copy."""
+        try:
+            return cache.incr(self.key)
+        except ValueError:
+            version: int = time_ns()
+            cache.set(self.key, version, timeout=None)
+            return version
@@ -0,0 +1,47 @@
+# Python
+from typing import (
+    Optional,
+    List,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.checks import (
+    CheckMessage,
+    Error,
+    Tags,
+    register,
+)
+
+
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(
+    app_configs: Optional[List[Any]],
+    **kwargs: Any
+) -> List[CheckMessage]:
+    """Check that the workers share versions of the cached data."""
+    backend: str = settings.CACHES.get(DEFAULT_CACHE_ALIAS, {}).get(
+        "BACKEND",
+        ""
+    )
+    if settings.DEBUG or backend not in PROCESS_LOCAL_CACHE_BACKENDS:
+        return []
+    return [
+        Error(
+            f"Кэш {backend} не общий для процессов",
+            hint=(
+                "Изменения городов, районов, хобби и потолка бюджета не "
+                "дойдут до других процессов. Задайте CACHE_BACKEND с общим "
+                "хранилищем, например файловым или Redis."
+            ),
+            id="abstracts.E001",
+        ),
+    ]
@@ -0,0 +1,115 @@
+# Python
+import shutil
+import pstats
+from typing import (
+    Optional,
+    Tuple,
+    List,
+    Dict,
+    Any,
+)
+
+# Django
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+
+# Project
+from abstracts.profiling import (
+    CPROFILE_MODE,
+    profile_storage,
+    get_profile_token,
+)
+
+
+class Command(BaseCommand):
+    """List, show and export profiles of the captured requests."""
+
+    help: str = "List, show and export profiles of the captured requests"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments of the command."""
+        parser.add_argument(
+            "action",
+            nargs="?",
+            default="list",
+            choices=("list", "show", "export", "token"),
+            help="list profiles, show or export one of them, or get token"
+        )
+        parser.add_argument(
+            "profile_id",
+            nargs="?",
+            default=None,
+            help="Id of the shown or exported profile"
+        )
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Path of the exported profile"
+        )
+        parser.add_argument(
+            "--sort",
+            default="cumulative",
+            help="Sort key of the shown cProfile statistics"
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=30,
+            help="Number of the shown functions"
+        )
+
+    def __get_profile(self, profile_id: Optional[str]) -> Dict[str, Any]:
+        """Get metadata of the profile or stop if there is none."""
+        if not profile_id:
+            raise CommandError("Укажите id профиля")
+        metadata: Optional[Dict[str, Any]] = profile_storage.get(
+            profile_id=profile_id
+        )
+        if not metadata:
+            raise CommandError(f"Профиль {profile_id} не найден")
+        return metadata
+
+    def __list(self) -> None:
+        """Print the stored profiles from the newest one."""
+        profiles: List[Dict[str, Any]] = profile_storage.get_all()
+        if not profiles:
+            print("Сохранённых профилей нет")
+            return
+        metadata: Dict[str, Any]
+        for metadata in profiles:
+            print(
+                "{id}  {datetime}  {mode:<8} {status} {duration:8.3f} с  "
+                "{view}  {method} {path}".format(**metadata)
+            )
+
+    def __show(self, metadata: Dict[str, Any], sort: str, limit: int) -> None:
+        """Print the heaviest functions of the cProfile profile."""
+        if metadata["mode"] != CPROFILE_MODE:
+            raise CommandError(
+                "Профиль сэмплера откройте в speedscope после export"
+            )
+        pstats.Stats(metadata["file_path"]).sort_stats(sort).print_stats(limit)
+
+    def handle(self, *args: Tuple[Any], **options: Dict[str, Any]) -> None:
+        """Handle the requested action."""
+        action: str = options["action"]
+        if action == "token":
+            print(f"X-Profile: {get_profile_token()}")
+        elif action == "list":
+            self.__list()
+        elif action == "show":
+            self.__show(
+                metadata=self.__get_profile(profile_id=options["profile_id"]),
+                sort=options["sort"],
+                limit=options["limit"]
+            )
+        else:
+            metadata: Dict[str, Any] = self.__get_profile(
+                profile_id=options["profile_id"]
+            )
+            output: str = options["output"] or metadata["file"]
+            shutil.copyfile(metadata["file_path"], output)
+            print(f"Профиль {metadata['id']} сохранён в {output}")
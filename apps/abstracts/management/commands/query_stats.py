@@ -0,0 +1,75 @@
+# Python
+from typing import (
+    Tuple,
+    List,
+    Dict,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandParser,
+)
+
+# Project
+from abstracts.queries import (
+    DURATION,
+    query_statistics,
+)
+
+
+class Command(BaseCommand):
+    """Print SQL fingerprints taking the most total database time."""
+
+    help: str = "Print SQL fingerprints taking the most total database time"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments of the command."""
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Number of the printed fingerprints"
+        )
+        parser.add_argument(
+            "--views",
+            type=int,
+            default=3,
+            help="Number of the printed views of every fingerprint"
+        )
+
+    def handle(self, *args: Tuple[Any], **options: Dict[str, Any]) -> None:
+        """Print the fingerprints with their share of the database time."""
+        if not settings.METRICS_DIR:
+            print("Задайте METRICS_DIR, чтобы читать статистику процессов")
+            return
+        top: List[Dict[str, Any]] = query_statistics.get_top(
+            limit=options["limit"]
+        )
+        if not top:
+            print("Статистики запросов нет")
+            return
+        total: float = sum(
+            values[DURATION]
+            for values in query_statistics.get_aggregated().values()
+        )
+        stats: Dict[str, Any]
+        for stats in top:
+            print(
+                "{id}  {share:5.1f}%  {duration:9.3f} с  {count:>8} раз  "
+                "{slow_count:>6} медленных".format(
+                    share=stats["duration"] / total * 100 if total else 0,
+                    **stats
+                )
+            )
+            print(f"    {stats['fingerprint']}")
+            view: str
+            duration: float
+            for view, duration in sorted(
+                stats["views"].items(),
+                key=lambda item: item[1],
+                reverse=True
+            )[:options["views"]]:
+                print(f"    {duration:9.3f} с  {view}")
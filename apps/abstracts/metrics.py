@@ -0,0 +1,404 @@
+# Python
+import os
+import json
+from contextvars import ContextVar
+from threading import (
+    Lock,
+    Thread,
+    current_thread,
+    local,
+)
+from time import (
+    monotonic,
+    perf_counter,
+)
+from typing import (
+    Callable,
+    Optional,
+    Tuple,
+    List,
+    Dict,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.http import (
+    HttpRequest,
+    HttpResponseBase,
+)
+
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# Layout of the values list kept for every label set
+COUNT, DURATION, QUERIES, DB_DURATION, SIZE, FIRST_BUCKET = range(6)
+VALUES_LENGTH = FIRST_BUCKET + len(LATENCY_BUCKETS)
+KEY_SEPARATOR = "\n"
+SUMMARIES = (
+    (
+        "http_request_db_queries",
+        "Number of database queries made by the request.",
+        QUERIES,
+    ),
+    (
+        "http_request_db_duration_seconds",
+        "Time spent in database queries of the request.",
+        DB_DURATION,
+    ),
+    (
+        "http_response_size_bytes",
+        "Size of the response body.",
+        SIZE,
+    ),
+)
+
+Key = Tuple[str, str, str]
+Values = List[float]
+
+# Set for queries of the instrumentation itself, e.g. EXPLAIN of slow ones
+is_internal_query: ContextVar[bool] = ContextVar(
+    "is_internal_query",
+    default=False
+)
+
+
+class QueryCounter:
+    """Database execute wrapper counting queries and their time."""
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.duration: float = 0.0
+
+    def __call__(
+        self,
+        execute: Callable[..., Any],
+        sql: str,
+        params: Any,
+        many: bool,
+        context: Dict[str, Any]
+    ) -> Any:
+        if is_internal_query.get():
+            return execute(sql, params, many, context)
+        started: float = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += perf_counter() - started
+
+
+def get_view_label(request: HttpRequest) -> str:
+    """Get label of the view, e.g. the viewset class with its action."""
+    match = getattr(request, "resolver_match", None)
+    if not match:
+        return "unresolved"
+    view_class: Optional[type] = getattr(match.func, "cls", None)
+    if view_class:
+        actions: Dict[str, str] = getattr(match.func, "actions", None) or {}
+        return "{}.{}".format(
+            view_class.__name__,
+            actions.get(request.method.lower(), request.method.lower())
+        )
+    return match.view_name or match.func.__name__
+
+
+def get_response_size(response: HttpResponseBase) -> int:
+    """Get size of the response body without consuming the stream."""
+    if response.streaming:
+        return int(response.get("Content-Length") or 0)
+    return len(response.content)
+
+
+def _escape(value: str) -> str:
+    """Escape the label value of the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace(
+        "\n",
+        "\\n"
+    )
+
+
+def _get_labels(key: Key, **extra_labels: Dict[str, str]) -> str:
+    """Get labels of the metric line."""
+    labels: Dict[str, str] = {
+        "view": key[0],
+        "method": key[1],
+        "status": key[2],
+        **extra_labels,
+    }
+    return ",".join(
+        f"{name}=\"{_escape(value)}\"" for name, value in labels.items()
+    )
+
+
+def _is_process_alive(pid: int) -> bool:
+    """Check whether the process exists on this host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Process of another user exists as well
+        pass
+    return True
+
+
+def _remove_file(path: str) -> None:
+    """Remove the file if nobody has removed it yet."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ShardedCounters:
+    """Per-process counters which threads write without locks.
+
+    Files of the processes are told apart by pid, so METRICS_DIR must be
+    local to the host: files of the finished processes are removed.
+    """
+
+    def __init__(self, name: str, length: int) -> None:
+        self.__name: str = name
+        self.__length: int = length
+        self.__local: local = local()
+        # Lock guards only the registration and folding of the shards
+        self.__shards_lock: Lock = Lock()
+        self.__shards: List[Tuple[Thread, Dict[Tuple[str, ...], Values]]] = []
+        # Values of the finished threads, so their shards are released
+        self.__base_shard: Dict[Tuple[str, ...], Values] = {}
+        self.__flush_lock: Lock = Lock()
+        self.__datetime_flushed: float = monotonic()
+
+    def get_values(self, key: Tuple[str, ...]) -> Values:
+        """Get values of the key written only by the current thread."""
+        shard: Optional[Dict[Tuple[str, ...], Values]] = getattr(
+            self.__local,
+            "shard",
+            None
+        )
+        if shard is None:
+            shard = {}
+            self.__local.shard = shard
+            with self.__shards_lock:
+                self.__fold_finished_shards()
+                self.__shards.append((current_thread(), shard))
+        values: Optional[Values] = shard.get(key)
+        if values is None:
+            values = shard[key] = [0.0] * self.__length
+        return values
+
+    def __merge(
+        self,
+        target: Dict[Tuple[str, ...], Values],
+        source: Dict[Tuple[str, ...], Values]
+    ) -> None:
+        """Add values of the source to the target ones."""
+        key: Tuple[str, ...]
+        values: Values
+        for key, values in source.items():
+            merged: Values = target.setdefault(key, [0.0] * self.__length)
+            index: int
+            for index in range(self.__length):
+                merged[index] += values[index]
+
+    def __fold_finished_shards(self) -> None:
+        """Move values of the finished threads into the base shard."""
+        # Finished thread never writes again, so its shard is read safely
+        alive_shards: List[Tuple[Thread, Dict[Tuple[str, ...], Values]]] = []
+        thread: Thread
+        shard: Dict[Tuple[str, ...], Values]
+        for thread, shard in self.__shards:
+            if thread.is_alive():
+                alive_shards.append((thread, shard))
+            else:
+                self.__merge(target=self.__base_shard, source=shard)
+        self.__shards = alive_shards
+
+    def get_snapshot(self) -> Dict[Tuple[str, ...], Values]:
+        """Get values of the current process summed over its threads."""
+        snapshot: Dict[Tuple[str, ...], Values] = {}
+        with self.__shards_lock:
+            self.__fold_finished_shards()
+            self.__merge(target=snapshot, source=self.__base_shard)
+            shards: List[Dict[Tuple[str, ...], Values]] = [
+                shard for _, shard in self.__shards
+            ]
+        shard: Dict[Tuple[str, ...], Values]
+        for shard in shards:
+            self.__merge(target=snapshot, source=dict(shard))
+        return snapshot
+
+    def get_shards_number(self) -> int:
+        """Get number of the shards kept for the live threads."""
+        with self.__shards_lock:
+            return len(self.__shards)
+
+    def __get_path(self, pid: int) -> str:
+        """Get path of the file with values of the process."""
+        return os.path.join(settings.METRICS_DIR, f"{self.__name}-{pid}.json")
+
+    def flush_if_needed(self) -> None:
+        """Flush values once in the interval if processes share them."""
+        if settings.METRICS_DIR and monotonic() - self.__datetime_flushed >= \
+                settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write values of the process for the other processes to read."""
+        if not self.__flush_lock.acquire(blocking=False):
+            return
+        try:
+            self.__datetime_flushed = monotonic()
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            path: str = self.__get_path(pid=os.getpid())
+            with open(f"{path}.tmp", "w") as file:
+                json.dump(
+                    {
+                        KEY_SEPARATOR.join(key): values
+                        for key, values in self.get_snapshot().items()
+                    },
+                    file
+                )
+            # Readers never see the partially written file
+            os.replace(f"{path}.tmp", path)
+        finally:
+            self.__flush_lock.release()
+
+    def get_aggregated(self) -> Dict[Tuple[str, ...], Values]:
+        """Get values summed over all processes sharing the directory."""
+        aggregated: Dict[Tuple[str, ...], Values] = self.get_snapshot()
+        if not settings.METRICS_DIR or \
+                not os.path.isdir(settings.METRICS_DIR):
+            return aggregated
+        own_path: str = self.__get_path(pid=os.getpid())
+        name: str
+        for name in os.listdir(settings.METRICS_DIR):
+            path: str = os.path.join(settings.METRICS_DIR, name)
+            if not name.startswith(f"{self.__name}-") or \
+                    not name.endswith(".json") or path == own_path:
+                continue
+            pid: str = name[len(self.__name) + 1:-len(".json")]
+            if pid.isdigit() and not _is_process_alive(pid=int(pid)):
+                # Restarted workers would otherwise be summed forever
+                _remove_file(path=path)
+                continue
+            try:
+                with open(path) as file:
+                    stored: Dict[str, Values] = json.load(file)
+            except (OSError, ValueError):
+                continue
+            self.__merge(
+                target=aggregated,
+                source={
+                    tuple(key.split(KEY_SEPARATOR)): values
+                    for key, values in stored.items()
+                }
+            )
+        return aggregated
+
+
+class RequestMetrics(ShardedCounters):
+    """Aggregates of the handled requests by their view."""
+
+    def __init__(self) -> None:
+        super().__init__(name="requests", length=VALUES_LENGTH)
+
+    def record(
+        self,
+        view: str,
+        method: str,
+        status: int,
+        duration: float,
+        queries: int,
+        db_duration: float,
+        size: int
+    ) -> None:
+        """Record the finished request."""
+        values: Values = self.get_values(key=(view, method, str(status)))
+        values[COUNT] += 1
+        values[DURATION] += duration
+        values[QUERIES] += queries
+        values[DB_DURATION] += db_duration
+        values[SIZE] += size
+        index: int
+        bound: float
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                values[FIRST_BUCKET + index] += 1
+                break
+        self.flush_if_needed()
+
+    def render(self) -> str:
+        """Get aggregated values in the Prometheus text format."""
+        aggregated: Dict[Key, Values] = self.get_aggregated()
+        keys: List[Key] = sorted(aggregated)
+        lines: List[str] = [
+            "# HELP http_requests_total Number of handled requests.",
+            "# TYPE http_requests_total counter",
+        ]
+        key: Key
+        for key in keys:
+            lines.append(
+                "http_requests_total{{{}}} {:g}".format(
+                    _get_labels(key=key),
+                    aggregated[key][COUNT]
+                )
+            )
+        lines += [
+            "# HELP http_request_duration_seconds Latency of the requests.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for key in keys:
+            values: Values = aggregated[key]
+            cumulative: float = 0.0
+            index: int
+            bound: float
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                cumulative += values[FIRST_BUCKET + index]
+                lines.append(
+                    "http_request_duration_seconds_bucket{{{}}} {:g}".format(
+                        _get_labels(key=key, le=f"{bound:g}"),
+                        cumulative
+                    )
+                )
+            lines += [
+                "http_request_duration_seconds_bucket{{{}}} {:g}".format(
+                    _get_labels(key=key, le="+Inf"),
+                    values[COUNT]
+                ),
+                "http_request_duration_seconds_sum{{{}}} {:g}".format(
+                    _get_labels(key=key),
+                    values[DURATION]
+                ),
+                "http_request_duration_seconds_count{{{}}} {:g}".format(
+                    _get_labels(key=key),
+                    values[COUNT]
+                ),
+            ]
+        name: str
+        description: str
+        position: int
+        for name, description, position in SUMMARIES:
+            lines += [
+                f"# HELP {name} {description}",
+                f"# TYPE {name} summary",
+            ]
+            for key in keys:
+                lines += [
+                    "{}_sum{{{}}} {:g}".format(
+                        name,
+                        _get_labels(key=key),
+                        aggregated[key][position]
+                    ),
+                    "{}_count{{{}}} {:g}".format(
+                        name,
+                        _get_labels(key=key),
+                        aggregated[key][COUNT]
+                    ),
+                ]
+        return "\n".join(lines) + "\n"
+
+
+request_metrics: RequestMetrics = RequestMetrics()
@@ -0,0 +1,130 @@
+# Python
+from contextvars import Token
+from random import random
+from time import perf_counter
+from typing import (
+    Callable,
+    Optional,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.http import (
+    HttpRequest,
+    HttpResponseBase,
+)
+
+# Project
+from abstracts.metrics import (
+    QueryCounter,
+    request_metrics,
+    get_view_label,
+    get_response_size,
+)
+from abstracts.profiling import (
+    profile_storage,
+    run_profiled,
+    is_valid_profile_token,
+)
+from abstracts.queries import current_view
+from abstracts.utils import get_request_user
+
+
+class MetricsMiddleware:
+    """Record latency, database usage and response size of every view."""
+
+    def __init__(
+        self,
+        get_response: Callable[[HttpRequest], HttpResponseBase]
+    ) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        query_counter: QueryCounter = QueryCounter()
+        started: float = perf_counter()
+        with connection.execute_wrapper(query_counter):
+            response: HttpResponseBase = self.get_response(request)
+        request_metrics.record(
+            view=get_view_label(request=request),
+            method=request.method,
+            status=response.status_code,
+            duration=perf_counter() - started,
+            queries=query_counter.count,
+            db_duration=query_counter.duration,
+            size=get_response_size(response=response)
+        )
+        return response
+
+
+class QueryLogMiddleware:
+    """Attribute queries of the request to its view in the query log."""
+
+    def __init__(
+        self,
+        get_response: Callable[[HttpRequest], HttpResponseBase]
+    ) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        token: Token = current_view.set("")
+        try:
+            return self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    def process_view(self, request: HttpRequest, *args: Any) -> None:
+        current_view.set(get_view_label(request=request))
+
+
+class ProfilerMiddleware:
+    """Profile requests asked by the signed header, staff or sampling."""
+
+    PROFILE_HEADER = "X-Profile"
+    PROFILE_PARAM = "profile"
+
+    def __init__(
+        self,
+        get_response: Callable[[HttpRequest], HttpResponseBase]
+    ) -> None:
+        self.get_response = get_response
+
+    def __is_profiled(self, request: HttpRequest) -> bool:
+        """Check whether the request has to be profiled."""
+        token: Optional[str] = request.headers.get(self.PROFILE_HEADER)
+        if token:
+            return is_valid_profile_token(token=token)
+        if request.GET.get(self.PROFILE_PARAM):
+            user: Optional[Any] = get_request_user(request=request)
+            return bool(user and user.is_staff)
+        return random() < settings.PROFILER_SAMPLE_RATE
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        if not settings.PROFILER_ENABLED or \
+                not self.__is_profiled(request=request):
+            return self.get_response(request)
+        started: float = perf_counter()
+        response: HttpResponseBase
+        content: bytes
+        response, content = run_profiled(
+            func=lambda: self.get_response(request),
+            mode=settings.PROFILER_MODE,
+            name=f"{request.method} {request.get_full_path()}"
+        )
+        profile_storage.save(
+            metadata={
+                "mode": settings.PROFILER_MODE,
+                "method": request.method,
+                "path": request.get_full_path(),
+                "view": get_view_label(request=request),
+                "status": response.status_code,
+                "duration": perf_counter() - started,
+                "datetime": timezone.now().isoformat(),
+            },
+            content=content
+        )
+        return response
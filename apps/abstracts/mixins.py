@@ -1,7 +1,10 @@
+from datetime import datetime
+from hashlib import md5
 from typing import (
     Optional,
     Tuple,
     Union,
+    Any,
 )
 
 from rest_framework.request import Request as DRF_Request
@@ -15,6 +18,12 @@ from django.db.models import (
     QuerySet,
     Model,
 )
+from django.http import HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import (
+    http_date,
+    quote_etag,
+)
 
 from abstracts.models import AbstractDateTimeQuerySet
 
@@ -88,3 +97,39 @@ class ModelInstanceMixin:
                 status=HTTP_404_NOT_FOUND
             ), False)
         return (obj, True)
+
+
+class ConditionalResponseMixin:
+    """Mixin for answering conditional GET-requests."""
+
+    def get_etag(self, *parts: Tuple[Any]) -> str:
+        """Get quoted ETag built from the provided parts."""
+        return quote_etag(
+            md5(":".join(map(str, parts)).encode()).hexdigest()
+        )
+
+    def get_not_modified_response(
+        self,
+        request: DRF_Request,
+        etag: str,
+        last_modified: datetime
+    ) -> Optional[HttpResponseBase]:
+        """Get 304 response if the client already has the actual data."""
+        if request.method not in ("GET", "HEAD"):
+            return None
+        return get_conditional_response(
+            request=request._request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp())
+        )
+
+    def set_conditional_headers(
+        self,
+        response: DRF_Response,
+        etag: str,
+        last_modified: datetime
+    ) -> DRF_Response:
+        """Set validators of the response for the next conditional request."""
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+        return response
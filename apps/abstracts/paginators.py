@@ -1,17 +1,37 @@
 """Abstract custom paginators."""
 # Python
+from datetime import datetime
 from typing import (
+    Optional,
+    Tuple,
+    Union,
+    List,
     Dict,
     Any,
 )
 
+# Django
+from django.core import signing
+from django.db.models import (
+    QuerySet,
+    Model,
+    Q,
+)
+
 # Rest Framework
+from rest_framework.exceptions import ParseError
+from rest_framework.request import Request as DRF_Request
 from rest_framework.response import Response as DRF_Response
 from rest_framework.pagination import (
+    BasePagination,
     PageNumberPagination,
     LimitOffsetPagination,
 )
 from rest_framework.utils.serializer_helpers import ReturnList
+from rest_framework.utils.urls import (
+    replace_query_param,
+    remove_query_param,
+)
 
 
 class AbstractPageNumberPaginator(PageNumberPagination):
@@ -70,3 +90,162 @@ class AbstractLimitOffsetPaginator(LimitOffsetPagination):
                 }
             )
         return response
+
+
+class AbstractCursorPaginator(BasePagination):
+    """Keyset paginator by (datetime_created, id) in descending order."""
+
+    page_size: int = 25
+    page_size_query_param: str = 'page_size'
+    max_page_size: int = 10
+    cursor_query_param: str = 'cursor'
+    cursor_salt: str = 'abstracts.paginators.cursor'
+    invalid_cursor_message: str = "Неверный курсор пагинации"
+
+    def __init__(self) -> None:
+        self.request: Optional[DRF_Request] = None
+        self.first_position: Optional[Tuple[datetime, int]] = None
+        self.last_position: Optional[Tuple[datetime, int]] = None
+        self.has_next: bool = False
+        self.has_previous: bool = False
+
+    def get_page_size(self, request: DRF_Request) -> int:
+        """Get page size provided by the client or default one."""
+        try:
+            page_size: int = int(
+                request.query_params[self.page_size_query_param]
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(
+        self,
+        position: Tuple[datetime, int],
+        is_reversed: bool = False
+    ) -> str:
+        """Get opaque signed cursor of the position."""
+        return signing.dumps(
+            {
+                "c": position[0].isoformat(),
+                "i": position[1],
+                "r": is_reversed,
+            },
+            salt=self.cursor_salt,
+            compress=True
+        )
+
+    def decode_cursor(
+        self,
+        request: DRF_Request
+    ) -> Optional[Tuple[datetime, int, bool]]:
+        """Get position and direction of the cursor from the request."""
+        cursor: Optional[str] = request.query_params.get(
+            self.cursor_query_param
+        )
+        if not cursor:
+            return None
+        try:
+            data: Dict[str, Any] = signing.loads(cursor, salt=self.cursor_salt)
+            return (
+                datetime.fromisoformat(data["c"]),
+                int(data["i"]),
+                bool(data["r"]),
+            )
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            # Cursor is made by the client, so it's a bad request
+            raise ParseError(self.invalid_cursor_message)
+
+    def __get_position(
+        self,
+        obj: Union[Model, Dict[str, Any]]
+    ) -> Tuple[datetime, int]:
+        """Get keyset position of the object or values() row."""
+        if isinstance(obj, dict):
+            return (obj["datetime_created"], obj["id"])
+        return (obj.datetime_created, obj.id)
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet,
+        request: DRF_Request,
+        view: Any = None
+    ) -> List[Model]:
+        """Get page of objects placed after or before the cursor."""
+        self.request = request
+        page_size: int = self.get_page_size(request=request)
+        cursor: Optional[Tuple[datetime, int, bool]] = self.decode_cursor(
+            request=request
+        )
+        is_reversed: bool = bool(cursor and cursor[2])
+        if cursor:
+            datetime_created: datetime
+            obj_id: int
+            datetime_created, obj_id, _ = cursor
+            lookup: str = "gt" if is_reversed else "lt"
+            queryset = queryset.filter(
+                Q(**{f"datetime_created__{lookup}": datetime_created}) |
+                Q(
+                    datetime_created=datetime_created,
+                    **{f"id__{lookup}": obj_id}
+                )
+            )
+        queryset = queryset.order_by(
+            "datetime_created", "id"
+        ) if is_reversed else queryset.order_by("-datetime_created", "-id")
+
+        objects: List[Model] = list(queryset[:page_size + 1])
+        has_more: bool = len(objects) > page_size
+        objects = objects[:page_size]
+        if is_reversed:
+            objects.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        if objects:
+            self.first_position = self.__get_position(obj=objects[0])
+            self.last_position = self.__get_position(obj=objects[-1])
+        return objects
+
+    def get_next_link(self) -> Optional[str]:
+        """Get link to the next page."""
+        if not self.has_next or not self.last_position:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(position=self.last_position)
+        )
+
+    def get_previous_link(self) -> Optional[str]:
+        """Get link to the previous page."""
+        if not self.has_previous:
+            return None
+        if not self.first_position:
+            return remove_query_param(
+                self.request.build_absolute_uri(),
+                self.cursor_query_param
+            )
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(
+                position=self.first_position,
+                is_reversed=True
+            )
+        )
+
+    def get_paginated_response(self, data: ReturnList) -> DRF_Response:
+        """Overriden method."""
+        response: DRF_Response = DRF_Response(
+            {
+                'pagination': {
+                    'next': self.get_next_link(),
+                    'previous': self.get_previous_link(),
+                },
+                'data': data
+            }
+        )
+        return response
@@ -0,0 +1,243 @@
+# Python
+import os
+import sys
+import json
+import marshal
+from cProfile import Profile
+from threading import (
+    Event,
+    Thread,
+    get_ident,
+)
+from time import (
+    perf_counter,
+    time_ns,
+)
+from types import FrameType
+from typing import (
+    Callable,
+    Optional,
+    Tuple,
+    List,
+    Dict,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.core.signing import (
+    BadSignature,
+    TimestampSigner,
+)
+
+
+CPROFILE_MODE = "cprofile"
+SAMPLER_MODE = "sampler"
+PROFILE_EXTENSIONS = {
+    CPROFILE_MODE: ".prof",
+    SAMPLER_MODE: ".speedscope.json",
+}
+TOKEN_SALT = "abstracts.profiling"
+TOKEN_VALUE = "profile"
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+def get_profile_token() -> str:
+    """Get signed value of the header requesting the profile."""
+    return TimestampSigner(salt=TOKEN_SALT).sign(TOKEN_VALUE)
+
+
+def is_valid_profile_token(token: str) -> bool:
+    """Check signature and age of the header requesting the profile."""
+    try:
+        return TimestampSigner(salt=TOKEN_SALT).unsign(
+            token,
+            max_age=settings.PROFILER_TOKEN_MAX_AGE
+        ) == TOKEN_VALUE
+    except BadSignature:
+        return False
+
+
+class StackSampler:
+    """Statistical sampler of the stacks of the calling thread."""
+
+    def __init__(self, interval: float) -> None:
+        self.__interval: float = interval
+        self.__thread_id: int = get_ident()
+        self.__stopped: Event = Event()
+        self.__frames: List[Dict[str, Any]] = []
+        self.__frame_indexes: Dict[Tuple[str, str, int], int] = {}
+        self.__samples: List[List[int]] = []
+        self.__weights: List[float] = []
+        self.__sampling_thread: Thread = Thread(
+            target=self.__sample,
+            daemon=True
+        )
+
+    def __get_frame_index(self, frame: FrameType) -> int:
+        """Get index of the shared speedscope frame."""
+        key: Tuple[str, str, int] = (
+            frame.f_code.co_name,
+            frame.f_code.co_filename,
+            frame.f_code.co_firstlineno,
+        )
+        index: Optional[int] = self.__frame_indexes.get(key)
+        if index is None:
+            index = self.__frame_indexes[key] = len(self.__frames)
+            self.__frames.append(
+                {"name": key[0], "file": key[1], "line": key[2]}
+            )
+        return index
+
+    def __sample(self) -> None:
+        """Take stacks of the profiled thread until it's stopped."""
+        sampled: float = perf_counter()
+        while not self.__stopped.wait(self.__interval):
+            frame: Optional[FrameType] = sys._current_frames().get(
+                self.__thread_id
+            )
+            now: float = perf_counter()
+            stack: List[int] = []
+            while frame is not None:
+                stack.append(self.__get_frame_index(frame=frame))
+                frame = frame.f_back
+            if stack:
+                # Speedscope expects stacks from the outermost frame
+                self.__samples.append(stack[::-1])
+                self.__weights.append(now - sampled)
+            sampled = now
+
+    def start(self) -> None:
+        """Start sampling of the current thread."""
+        self.__sampling_thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampling thread."""
+        self.__stopped.set()
+        self.__sampling_thread.join()
+
+    def get_speedscope(self, name: str) -> Dict[str, Any]:
+        """Get samples in the speedscope file format."""
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "shared": {"frames": self.__frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(self.__weights),
+                    "samples": self.__samples,
+                    "weights": self.__weights,
+                },
+            ],
+        }
+
+
+def run_profiled(
+    func: Callable[[], Any],
+    mode: str,
+    name: str
+) -> Tuple[Any, bytes]:
+    """Run the function under the profiler and get its serialized profile."""
+    if mode == SAMPLER_MODE:
+        sampler: StackSampler = StackSampler(
+            interval=settings.PROFILER_SAMPLER_INTERVAL
+        )
+        sampler.start()
+        try:
+            result: Any = func()
+        finally:
+            sampler.stop()
+        return result, json.dumps(sampler.get_speedscope(name=name)).encode()
+    profiler: Profile = Profile()
+    result = profiler.runcall(func)
+    profiler.create_stats()
+    # Same content as dump_stats() writes, so pstats reads it as is
+    return result, marshal.dumps(profiler.stats)
+
+
+class ProfileStorage:
+    """Bounded on-disk ring buffer of the captured profiles."""
+
+    def __get_path(self, name: str) -> str:
+        """Get path of the file in the profiles directory."""
+        return os.path.join(settings.PROFILER_DIR, name)
+
+    def save(self, metadata: Dict[str, Any], content: bytes) -> str:
+        """Save the profile with its metadata and get its id."""
+        os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+        profile_id: str = f"{time_ns()}-{os.getpid()}"
+        file_name: str = profile_id + PROFILE_EXTENSIONS[metadata["mode"]]
+        with open(self.__get_path(name=file_name), "wb") as file:
+            file.write(content)
+        metadata_path: str = self.__get_path(name=f"{profile_id}.json")
+        with open(f"{metadata_path}.tmp", "w") as file:
+            json.dump({**metadata, "id": profile_id, "file": file_name}, file)
+        # Listed profiles always have their content written
+        os.replace(f"{metadata_path}.tmp", metadata_path)
+        self.__trim()
+        return profile_id
+
+    def __get_ids(self) -> List[str]:
+        """Get ids of the stored profiles from the oldest one."""
+        if not os.path.isdir(settings.PROFILER_DIR):
+            return []
+        return sorted(
+            (
+                name[:-len(".json")]
+                for name in os.listdir(settings.PROFILER_DIR)
+                if name.endswith(".json") and
+                not name.endswith(PROFILE_EXTENSIONS[SAMPLER_MODE])
+            ),
+            key=lambda profile_id: int(profile_id.split("-")[0])
+        )
+
+    def __trim(self) -> None:
+        """Remove the oldest profiles over the limit."""
+        profile_ids: List[str] = self.__get_ids()
+        profile_id: str
+        for profile_id in profile_ids[:-settings.PROFILER_MAX_PROFILES]:
+            self.remove(profile_id=profile_id)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        """Get metadata of the profile with the path of its content."""
+        if os.path.basename(profile_id) != profile_id:
+            return None
+        try:
+            with open(self.__get_path(name=f"{profile_id}.json")) as file:
+                metadata: Dict[str, Any] = json.load(file)
+        except (OSError, ValueError):
+            return None
+        metadata["file_path"] = self.__get_path(name=metadata["file"])
+        return metadata
+
+    def get_all(self) -> List[Dict[str, Any]]:
+        """Get metadata of the stored profiles from the newest one."""
+        profiles: List[Dict[str, Any]] = []
+        profile_id: str
+        for profile_id in reversed(self.__get_ids()):
+            metadata: Optional[Dict[str, Any]] = self.get(
+                profile_id=profile_id
+            )
+            if metadata:
+                profiles.append(metadata)
+        return profiles
+
+    def remove(self, profile_id: str) -> None:
+        """Remove the profile and its metadata."""
+        metadata: Optional[Dict[str, Any]] = self.get(profile_id=profile_id)
+        paths: List[str] = [self.__get_path(name=f"{profile_id}.json")]
+        if metadata:
+            paths.append(metadata["file_path"])
+        path: str
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+profile_storage: ProfileStorage = ProfileStorage()
@@ -0,0 +1,181 @@
+# Python
+import re
+import logging
+from contextvars import ContextVar
+from functools import lru_cache
+from hashlib import sha1
+from time import perf_counter
+from typing import (
+    Callable,
+    Optional,
+    List,
+    Dict,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+# Project
+from abstracts.metrics import (
+    ShardedCounters,
+    Values,
+    is_internal_query,
+)
+
+
+COUNT, DURATION, SLOW_COUNT = range(3)
+FINGERPRINT_PATTERNS = (
+    (re.compile(r"/\*.*?\*/", re.S), " "),
+    (re.compile(r"--[^\n]*"), " "),
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"%s|\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+"), r"\1"),
+    (re.compile(r"\s+"), " "),
+)
+EXPLAINED_PREFIXES = ("SELECT", "WITH")
+
+logger: logging.Logger = logging.getLogger(__name__)
+current_view: ContextVar[str] = ContextVar("current_view", default="")
+
+
+@lru_cache(maxsize=2048)
+def get_fingerprint(sql: str) -> str:
+    """Get SQL with values and lists of placeholders collapsed."""
+    pattern: re.Pattern
+    replacement: str
+    for pattern, replacement in FINGERPRINT_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def get_fingerprint_id(fingerprint: str) -> str:
+    """Get short id of the fingerprint for logs and reports."""
+    return sha1(fingerprint.encode()).hexdigest()[:12]
+
+
+class QueryStatistics(ShardedCounters):
+    """Number and time of the queries by view and SQL fingerprint."""
+
+    def __init__(self) -> None:
+        super().__init__(name="queries", length=3)
+
+    def record(
+        self,
+        view: str,
+        fingerprint: str,
+        duration: float,
+        is_slow: bool
+    ) -> None:
+        """Record the executed query."""
+        values: Values = self.get_values(key=(view, fingerprint))
+        values[COUNT] += 1
+        values[DURATION] += duration
+        values[SLOW_COUNT] += is_slow
+        self.flush_if_needed()
+
+    def get_top(self, limit: int) -> List[Dict[str, Any]]:
+        """Get fingerprints taking the most total time with their views."""
+        fingerprints: Dict[str, Dict[str, Any]] = {}
+        view: str
+        fingerprint: str
+        values: Values
+        for (view, fingerprint), values in self.get_aggregated().items():
+            stats: Dict[str, Any] = fingerprints.setdefault(
+                fingerprint,
+                {
+                    "id": get_fingerprint_id(fingerprint=fingerprint),
+                    "fingerprint": fingerprint,
+                    "count": 0,
+                    "duration": 0.0,
+                    "slow_count": 0,
+                    "views": {},
+                }
+            )
+            stats["count"] += int(values[COUNT])
+            stats["duration"] += values[DURATION]
+            stats["slow_count"] += int(values[SLOW_COUNT])
+            stats["views"][view or "-"] = values[DURATION]
+        return sorted(
+            fingerprints.values(),
+            key=lambda stats: stats["duration"],
+            reverse=True
+        )[:limit]
+
+
+def _get_explain(
+    connection: BaseDatabaseWrapper,
+    sql: str,
+    params: Any
+) -> Optional[str]:
+    """Get the plan of the query without running it again."""
+    token = is_internal_query.set(True)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (ANALYZE false) {sql}", params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+    except Exception as e:
+        return f"EXPLAIN error: {e}"
+    finally:
+        is_internal_query.reset(token)
+
+
+def log_query(
+    execute: Callable[..., Any],
+    sql: str,
+    params: Any,
+    many: bool,
+    context: Dict[str, Any]
+) -> Any:
+    """Execute wrapper aggregating queries and logging the slow ones."""
+    if is_internal_query.get():
+        return execute(sql, params, many, context)
+    started: float = perf_counter()
+    is_failed: bool = True
+    try:
+        result: Any = execute(sql, params, many, context)
+        is_failed = False
+        return result
+    finally:
+        duration: float = perf_counter() - started
+        is_slow: bool = duration * 1000 >= settings.DB_SLOW_QUERY_MS
+        fingerprint: str = get_fingerprint(sql=sql)
+        view: str = current_view.get()
+        query_statistics.record(
+            view=view,
+            fingerprint=fingerprint,
+            duration=duration,
+            is_slow=is_slow
+        )
+        if is_slow:
+            connection: BaseDatabaseWrapper = context["connection"]
+            explain: Optional[str] = None
+            # Aborted transaction of the failed query rejects any query
+            if settings.DB_SLOW_QUERY_EXPLAIN and not is_failed and \
+                    not many and connection.vendor == "postgresql" and \
+                    sql.lstrip().upper().startswith(EXPLAINED_PREFIXES):
+                explain = _get_explain(
+                    connection=connection,
+                    sql=sql,
+                    params=params
+                )
+            logger.warning(
+                "Slow query %.1f ms in %s [%s]: %s%s",
+                duration * 1000,
+                view or "-",
+                get_fingerprint_id(fingerprint=fingerprint),
+                fingerprint,
+                f"\n{explain}" if explain else ""
+            )
+
+
+def install_query_log(connection: BaseDatabaseWrapper) -> None:
+    """Wrap every query of the connection by the query log."""
+    if log_query not in connection.execute_wrappers:
+        # Outermost, so execute_wrapper() blocks still pop their own wrapper
+        connection.execute_wrappers.insert(0, log_query)
+
+
+query_statistics: QueryStatistics = QueryStatistics()
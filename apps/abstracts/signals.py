@@ -0,0 +1,25 @@
+# Python
+from typing import (
+    Dict,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Project
+from abstracts.queries import install_query_log
+
+
+@receiver(connection_created)
+def install_query_log_on_connect(
+    sender: Any,
+    connection: BaseDatabaseWrapper,
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Log queries of every opened connection."""
+    if settings.DB_QUERY_LOG_ENABLED:
+        install_query_log(connection=connection)
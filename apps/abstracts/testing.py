@@ -0,0 +1,51 @@
+# Python
+from multiprocessing import get_context
+from multiprocessing.context import BaseContext
+from multiprocessing.process import BaseProcess
+from tempfile import TemporaryDirectory
+from typing import (
+    Callable,
+    Any,
+)
+
+# Django
+from django.test import (
+    TestCase,
+    override_settings,
+)
+
+
+FILE_BASED_CACHE = "django.core.cache.backends.filebased.FileBasedCache"
+
+
+def run_in_other_process(target: Callable[[], Any]) -> BaseProcess:
+    """Run the function in the forked process like another worker does."""
+    context: BaseContext = get_context("fork")
+    process: BaseProcess = context.Process(target=target)
+    process.start()
+    process.join()
+    return process
+
+
+class SharedCacheTestCase(TestCase):
+    """Test case with a cache shared by the forked processes."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        # Local memory cache of the fork would be a copy never seen here
+        self.cache_dir: TemporaryDirectory = TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        self.cache_override: override_settings = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": FILE_BASED_CACHE,
+                    "LOCATION": self.cache_dir.name,
+                },
+            }
+        )
+        self.cache_override.enable()
+        self.addCleanup(self.cache_override.disable)
+
+    def run_in_other_process(self, target: Callable[[], Any]) -> None:
+        """Run the function in another worker and check it succeeded."""
+        self.assertEqual(run_in_other_process(target=target).exitcode, 0)
@@ -1,3 +1,236 @@
-from django.test import TestCase
+# Python
+import os
+import json
+from tempfile import TemporaryDirectory
+from threading import Thread
+from typing import (
+    Any,
+    Tuple,
+    List,
+    Dict,
+)
 
-# Create your tests here.
+# Django
+from django.db import connection
+from django.http import HttpResponseBase
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.utils.http import http_date
+
+# Project
+from abstracts.metrics import (
+    QueryCounter,
+    ShardedCounters,
+    Values,
+)
+from abstracts.queries import (
+    _get_explain,
+    log_query,
+)
+from abstracts.testing import run_in_other_process
+
+
+class ShardedCountersTests(SimpleTestCase):
+    """Tests of the per-process counters written by the threads."""
+
+    def test_shards_of_finished_threads_are_folded(self) -> None:
+        counters: ShardedCounters = ShardedCounters(name="test", length=1)
+
+        def increment() -> None:
+            counters.get_values(key=("view",))[0] += 1
+
+        threads: List[Thread] = [
+            Thread(target=increment) for _ in range(50)
+        ]
+        thread: Thread
+        for thread in threads:
+            thread.start()
+            thread.join()
+        self.assertEqual(counters.get_snapshot(), {("view",): [50.0]})
+        self.assertEqual(counters.get_shards_number(), 0)
+        increment()
+        self.assertEqual(counters.get_snapshot(), {("view",): [51.0]})
+        self.assertEqual(counters.get_shards_number(), 1)
+
+    def test_files_of_finished_processes_are_removed(self) -> None:
+        metrics_dir: TemporaryDirectory = TemporaryDirectory()
+        self.addCleanup(metrics_dir.cleanup)
+        paths: Dict[str, str] = {}
+        name: str
+        pid: int
+        values: Values
+        for name, (pid, values) in (
+            ("alive", (os.getppid(), [2.0])),
+            ("finished", (run_in_other_process(target=int).pid, [3.0])),
+        ):
+            paths[name] = os.path.join(metrics_dir.name, f"test-{pid}.json")
+            with open(paths[name], "w") as file:
+                json.dump({"view": values}, file)
+        counters: ShardedCounters = ShardedCounters(name="test", length=1)
+        counters.get_values(key=("view",))[0] += 1
+        with override_settings(METRICS_DIR=metrics_dir.name):
+            aggregated: Dict[Tuple[str, ...], Values] = \
+                counters.get_aggregated()
+        self.assertEqual(aggregated, {("view",): [3.0]})
+        self.assertTrue(os.path.exists(paths["alive"]))
+        self.assertFalse(os.path.exists(paths["finished"]))
+
+
+class QueryCounterTests(TestCase):
+    """Tests of the queries counted for the request metrics."""
+
+    def test_explain_of_slow_query_is_not_counted(self) -> None:
+        query_counter: QueryCounter = QueryCounter()
+        with connection.execute_wrapper(log_query), \
+                connection.execute_wrapper(query_counter), \
+                connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            # SQLite rejects the syntax, yet the query reaches the wrappers
+            self.assertTrue(
+                _get_explain(connection=connection, sql="SELECT 1", params=())
+            )
+        self.assertEqual(query_counter.count, 1)
+
+
+class ServeMediaTests(SimpleTestCase):
+    """Tests of the media files served by the application."""
+
+    CONTENT = bytes(range(256)) * 4
+
+    def setUp(self) -> None:
+        root_dir: TemporaryDirectory = TemporaryDirectory()
+        self.addCleanup(root_dir.cleanup)
+        self.media_root: str = os.path.join(root_dir.name, "media")
+        os.makedirs(os.path.join(self.media_root, "photos"))
+        with open(
+            os.path.join(self.media_root, "photos", "photo.jpg"),
+            "wb"
+        ) as file:
+            file.write(self.CONTENT)
+        # Neighbour of the media directory must never be served
+        with open(os.path.join(root_dir.name, "secret.txt"), "w") as file:
+            file.write("secret")
+        media_override: override_settings = override_settings(
+            MEDIA_ROOT=self.media_root
+        )
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+    def __get(self, path: str = "photos/photo.jpg", **headers: Any) -> Any:
+        """Request the media file and read its body."""
+        response: HttpResponseBase = self.client.get(
+            f"/media/{path}",
+            **headers
+        )
+        if response.streaming:
+            response.body = b"".join(response.streaming_content)
+        else:
+            response.body = response.content
+        response.close()
+        return response
+
+    def test_whole_file_is_served(self) -> None:
+        response: Any = self.__get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.body, self.CONTENT)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_path_outside_of_media_is_rejected(self) -> None:
+        path: str
+        for path in ("../secret.txt", "%2e%2e/secret.txt", "/etc/passwd"):
+            with self.subTest(path=path):
+                self.assertEqual(self.__get(path=path).status_code, 404)
+
+    def test_transfer_is_handed_over_to_proxy(self) -> None:
+        response: Any
+        with override_settings(MEDIA_ACCEL_REDIRECT_PREFIX="/protected/"):
+            response = self.__get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["X-Accel-Redirect"],
+            "/protected/photos/photo.jpg"
+        )
+        self.assertEqual(response.body, b"")
+        with override_settings(MEDIA_SENDFILE_HEADER="X-Sendfile"):
+            response = self.__get()
+        self.assertEqual(
+            response["X-Sendfile"],
+            os.path.join(self.media_root, "photos", "photo.jpg")
+        )
+        self.assertEqual(response.body, b"")
+
+    def test_single_range_is_served_partially(self) -> None:
+        header: str
+        first: int
+        last: int
+        for header, first, last in (
+            ("bytes=10-19", 10, 19),
+            ("bytes=1000-", 1000, 1023),
+            ("bytes=-24", 1000, 1023),
+            ("bytes=1000-5000", 1000, 1023),
+        ):
+            with self.subTest(header=header):
+                response: Any = self.__get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    response["Content-Range"],
+                    f"bytes {first}-{last}/1024"
+                )
+                self.assertEqual(
+                    response["Content-Length"],
+                    str(last - first + 1)
+                )
+                self.assertEqual(response.body, self.CONTENT[first:last + 1])
+
+    def test_unsatisfiable_range_is_refused(self) -> None:
+        header: str
+        for header in ("bytes=1024-", "bytes=20-10", "bytes=-0"):
+            with self.subTest(header=header):
+                response: Any = self.__get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response["Content-Range"], "bytes */1024")
+
+    def test_multiple_or_malformed_ranges_are_ignored(self) -> None:
+        header: str
+        for header in ("bytes=0-1,5-6", "bytes=-", "items=0-1"):
+            with self.subTest(header=header):
+                response: Any = self.__get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.body, self.CONTENT)
+
+    def test_stale_if_range_gets_whole_file(self) -> None:
+        etag: str = self.__get()["ETag"]
+        self.assertEqual(
+            self.__get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag).status_code,
+            206
+        )
+        if_range: str
+        for if_range in ('"other"', http_date(0)):
+            with self.subTest(if_range=if_range):
+                response: Any = self.__get(
+                    HTTP_RANGE="bytes=0-9",
+                    HTTP_IF_RANGE=if_range
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.body, self.CONTENT)
+
+    def test_unchanged_file_is_not_sent(self) -> None:
+        response: Any = self.__get()
+        self.assertEqual(
+            self.__get(HTTP_IF_NONE_MATCH=response["ETag"]).status_code,
+            304
+        )
+        self.assertEqual(
+            self.__get(
+                HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+            ).status_code,
+            304
+        )
+        self.assertEqual(
+            self.__get(HTTP_IF_NONE_MATCH='"other"').status_code,
+            200
+        )
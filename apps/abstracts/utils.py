@@ -1,16 +1,46 @@
+import csv
+from io import StringIO
 from typing import (
     Optional,
+    Iterable,
+    Sequence,
+    Tuple,
     List,
+    Set,
+    Any,
+)
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    InvalidToken,
+    AuthenticationFailed,
 )
 
 from django.utils.safestring import mark_safe
+from django.contrib.auth.base_user import AbstractBaseUser
+from django.http import HttpRequest
 from django.core.mail import send_mail
 from django.conf import settings
-from django.db.models import Model
+from django.core.management.color import no_style
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    connection,
+    connections,
+    transaction,
+)
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.models import (
+    Model,
+    Manager,
+)
+from django.db.models.signals import m2m_changed
 
 from abstracts.models import AbstractDateTime
 
 
+COPY_NULL = "\\N"
+
+
 def get_is_deleted(
     self,
     obj: Optional[Model] = None,
@@ -45,3 +75,158 @@ def send_email(
     except Exception as e:
         print("Email error:", e)
         return False
+
+
+def sync_m2m_ids(
+    instance: Model,
+    field_name: str,
+    related_ids: Iterable[int]
+) -> Tuple[Set[int], Set[int]]:
+    """Make M2M field contain exactly the provided ids changing the diff."""
+    manager: Manager = getattr(instance, field_name)
+    through: type = manager.through
+    source_field: str = f"{manager.source_field_name}_id"
+    target_field: str = f"{manager.target_field_name}_id"
+    new_ids: Set[int] = set(
+        manager.model.objects.filter(
+            id__in=set(related_ids)
+        ).values_list("id", flat=True)
+    )
+    with transaction.atomic():
+        current_ids: Set[int] = set(
+            through.objects.filter(
+                **{source_field: instance.pk}
+            ).values_list(target_field, flat=True)
+        )
+        removed_ids: Set[int] = current_ids - new_ids
+        added_ids: Set[int] = new_ids - current_ids
+        # Signals are sent like the ones of remove() and add() do
+        signal_kwargs: dict = {
+            "sender": through,
+            "instance": instance,
+            "reverse": False,
+            "model": manager.model,
+            "using": through.objects.db,
+        }
+        if removed_ids:
+            m2m_changed.send(
+                action="pre_remove",
+                pk_set=removed_ids,
+                **signal_kwargs
+            )
+            through.objects.filter(
+                **{
+                    source_field: instance.pk,
+                    f"{target_field}__in": removed_ids,
+                }
+            ).delete()
+            m2m_changed.send(
+                action="post_remove",
+                pk_set=removed_ids,
+                **signal_kwargs
+            )
+        if added_ids:
+            m2m_changed.send(
+                action="pre_add",
+                pk_set=added_ids,
+                **signal_kwargs
+            )
+            through.objects.bulk_create(
+                [
+                    through(**{source_field: instance.pk, target_field: pk})
+                    for pk in added_ids
+                ],
+                ignore_conflicts=True
+            )
+            m2m_changed.send(
+                action="post_add",
+                pk_set=added_ids,
+                **signal_kwargs
+            )
+    return (added_ids, removed_ids)
+
+
+def _copy_rows(
+    model: type[Model],
+    fields: Sequence[str],
+    rows: Iterable[Sequence[Any]]
+) -> None:
+    """Insert rows into the table of the model by PostgreSQL COPY."""
+    buffer: StringIO = StringIO()
+    writer = csv.writer(buffer)
+    row: Sequence[Any]
+    for row in rows:
+        writer.writerow(
+            COPY_NULL if value is None else value
+            for value in row
+        )
+    buffer.seek(0)
+    columns: str = ", ".join(
+        connection.ops.quote_name(model._meta.get_field(field).column)
+        for field in fields
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            "COPY {0} ({1}) FROM STDIN WITH (FORMAT csv, NULL '{2}')".format(
+                connection.ops.quote_name(model._meta.db_table),
+                columns,
+                COPY_NULL
+            ),
+            buffer
+        )
+
+
+def insert_rows(
+    model: type[Model],
+    fields: Sequence[str],
+    rows: Iterable[Sequence[Any]]
+) -> None:
+    """Insert raw rows of field values skipping model instances."""
+    if connection.vendor == "postgresql":
+        _copy_rows(model=model, fields=fields, rows=rows)
+        return
+    # Proxy of the connection is resolved once instead of every value
+    database: BaseDatabaseWrapper = connections[DEFAULT_DB_ALIAS]
+    model_fields: List[Any] = [
+        model._meta.get_field(field) for field in fields
+    ]
+    sql: str = "INSERT INTO {0} ({1}) VALUES ({2})".format(
+        database.ops.quote_name(model._meta.db_table),
+        ", ".join(
+            database.ops.quote_name(field.column)
+            for field in model_fields
+        ),
+        ", ".join(["%s"] * len(model_fields))
+    )
+    with database.cursor() as cursor:
+        cursor.executemany(
+            sql,
+            [
+                [
+                    field.get_db_prep_save(value, connection=database)
+                    for field, value in zip(model_fields, row)
+                ]
+                for row in rows
+            ]
+        )
+
+
+def reset_sequences(models: Iterable[type[Model]]) -> None:
+    """Move id sequences of the models after the inserted ids."""
+    sql: str
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+def get_request_user(request: HttpRequest) -> Optional[AbstractBaseUser]:
+    """Get user authenticated by session or JWT."""
+    if request.user.is_authenticated:
+        return request.user
+    # Clients of the API are authenticated by JWT instead of session
+    try:
+        authenticated: Optional[Tuple[AbstractBaseUser, Any]] = \
+            JWTAuthentication().authenticate(request=request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return authenticated[0] if authenticated else None
@@ -1,3 +1,231 @@
-from django.shortcuts import render
+# Python
+import os
+import re
+import mimetypes
+from typing import (
+    Optional,
+    Iterator,
+    Tuple,
+    BinaryIO,
+)
 
-# Create your views here.
+# Django
+from django.conf import settings
+from django.contrib.auth.base_user import AbstractBaseUser
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBase,
+    FileResponse,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import (
+    http_date,
+    quote_etag,
+    parse_http_date_safe,
+)
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+
+# Project
+from abstracts.metrics import request_metrics
+from abstracts.utils import get_request_user
+
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def _is_allowed(request: HttpRequest) -> bool:
+    """Check whether the requester may get media files."""
+    return not settings.MEDIA_REQUIRE_AUTH or \
+        get_request_user(request=request) is not None
+
+
+def _is_metrics_reader(request: HttpRequest) -> bool:
+    """Check whether the requester is a staff user or the scraper."""
+    if settings.METRICS_TOKEN and constant_time_compare(
+        request.headers.get("Authorization", ""),
+        f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        return True
+    user: Optional[AbstractBaseUser] = get_request_user(request=request)
+    return bool(user and user.is_staff)
+
+
+def _match_range(header: Optional[str]) -> Optional[re.Match]:
+    """Match the single byte range of the header."""
+    # Multiple or malformed ranges may be ignored, the whole file is sent
+    match: Optional[re.Match] = RANGE_PATTERN.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    return match
+
+
+def _get_range(
+    match: re.Match,
+    size: int
+) -> Optional[Tuple[int, int]]:
+    """Get first and last byte of the range if it's satisfiable."""
+    first: str
+    last: str
+    first, last = match.groups()
+    if not first:
+        # Suffix range asks for the last bytes of the file
+        return (max(size - int(last), 0), size - 1) if int(last) else None
+    if int(first) >= size or (last and int(last) < int(first)):
+        return None
+    return (int(first), min(int(last), size - 1) if last else size - 1)
+
+
+def _is_range_fresh(
+    request: HttpRequest,
+    etag: str,
+    last_modified: int
+) -> bool:
+    """Check If-Range, which makes range stale if the file is changed."""
+    if_range: Optional[str] = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith(("\"", "W/")):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _iterate_range(
+    file: BinaryIO,
+    first: int,
+    last: int
+) -> Iterator[bytes]:
+    """Iterate over the bytes of the range chunk by chunk."""
+    with file:
+        file.seek(first)
+        remaining: int = last - first + 1
+        while remaining > 0:
+            chunk: bytes = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _get_content_type(full_path: str) -> str:
+    """Get content type of the file by its extension."""
+    content_type: Optional[str]
+    content_type, _ = mimetypes.guess_type(full_path)
+    return content_type or "application/octet-stream"
+
+
+def _get_accel_response(
+    name: str,
+    full_path: str
+) -> Optional[HttpResponse]:
+    """Get response handing the transfer over to the front proxy."""
+    # Proxy sends the body, its length, ranges and validators by itself
+    response: HttpResponse = HttpResponse(
+        content_type=_get_content_type(full_path=full_path)
+    )
+    if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+        response["X-Accel-Redirect"] = \
+            f"{settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{name}"
+    elif settings.MEDIA_SENDFILE_HEADER:
+        response[settings.MEDIA_SENDFILE_HEADER] = full_path
+    else:
+        return None
+    return response
+
+
+@require_safe
+def serve_media(request: HttpRequest, path: str) -> HttpResponseBase:
+    """Serve media file after the access check."""
+    if not _is_allowed(request=request):
+        return HttpResponse(status=403)
+    try:
+        full_path: str = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404()
+    if not os.path.isfile(full_path):
+        raise Http404()
+
+    name: str = os.path.relpath(full_path, settings.MEDIA_ROOT).replace(
+        os.sep,
+        "/"
+    )
+    accel_response: Optional[HttpResponse] = _get_accel_response(
+        name=name,
+        full_path=full_path
+    )
+    if accel_response:
+        return accel_response
+
+    stat: os.stat_result = os.stat(full_path)
+    last_modified: int = int(stat.st_mtime)
+    etag: str = quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+    not_modified_response: Optional[HttpResponse] = \
+        get_conditional_response(
+            request=request,
+            etag=etag,
+            last_modified=last_modified
+        )
+    if not_modified_response:
+        return not_modified_response
+
+    content_type: str = _get_content_type(full_path=full_path)
+    range_match: Optional[re.Match] = _match_range(
+        header=request.headers.get("Range")
+    )
+    response: HttpResponseBase
+    if range_match and _is_range_fresh(
+        request=request,
+        etag=etag,
+        last_modified=last_modified
+    ):
+        byte_range: Optional[Tuple[int, int]] = _get_range(
+            match=range_match,
+            size=stat.st_size
+        )
+        if not byte_range:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return response
+        first: int
+        last: int
+        first, last = byte_range
+        response = StreamingHttpResponse(
+            _iterate_range(
+                file=open(full_path, "rb"),
+                first=first,
+                last=last
+            ),
+            status=206,
+            content_type=content_type
+        )
+        response["Content-Length"] = str(last - first + 1)
+        response["Content-Range"] = f"bytes {first}-{last}/{stat.st_size}"
+    else:
+        # Whole file goes through wsgi.file_wrapper, so sendfile is used
+        response = FileResponse(
+            open(full_path, "rb"),
+            content_type=content_type
+        )
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+@never_cache
+@require_safe
+def serve_metrics(request: HttpRequest) -> HttpResponse:
+    """Serve request metrics of all processes in the Prometheus format."""
+    if not _is_metrics_reader(request=request):
+        return HttpResponse(status=403)
+    return HttpResponse(
+        request_metrics.render(),
+        content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
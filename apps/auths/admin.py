@@ -15,6 +15,7 @@ from django.utils.safestring import mark_safe
 
 # Project
 from auths.models import CustomUser
+from auths.images import get_variant_url
 from abstracts.filters import DeletedStateFilter
 from abstracts.admin import AbstractAdminIsDeleted
 
@@ -151,7 +152,12 @@ class CustomUserAdmin(AbstractAdminIsDeleted, UserAdmin):
     ) -> str:
         """Get img photo."""
         if obj.photo:
-            return mark_safe(f'<img src="{obj.photo.url}" width="{width}">')
+            url: str = get_variant_url(
+                photo=obj.photo,
+                variant="thumbnail"
+            ) if obj.variants_photo_name == obj.photo.name \
+                else obj.photo.url
+            return mark_safe(f'<img src="{url}" width="{width}">')
     get_photo.short_description = "Фото"
     get_photo.empty_value_display = "No photo uploaded"
 
@@ -5,3 +5,7 @@ class AuthsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'auths'
     verbose_name: str = "Авторизация"
+
+    def ready(self) -> None:
+        """Connect signal handlers of the application."""
+        import auths.signals  # noqa
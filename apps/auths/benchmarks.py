@@ -0,0 +1,498 @@
+# Third party
+from rest_framework.response import Response as DRF_Response
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+)
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Python
+from itertools import combinations
+from math import ceil
+from random import Random
+from statistics import (
+    mean,
+    median,
+)
+from threading import (
+    Event,
+    Lock,
+    Thread,
+)
+from time import perf_counter
+from typing import (
+    Callable,
+    Optional,
+    Tuple,
+    List,
+    Dict,
+    Any,
+)
+
+# Django
+from django.db import (
+    connection,
+    connections,
+)
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+
+# Project
+from auths.models import CustomUser
+from auths.serializers import (
+    CustomUserListSerializer,
+    CustomUserValuesSerializer,
+)
+from auths.datasets import PASSWORD_PATTERN
+from auths.indexes import user_bitmap_index
+from locations.models import District
+
+
+USERS_URL = "/api/v1/auths/users"
+CITIES_URL = "/api/v1/locations/city"
+CATEGORIES_URL = "/api/v1/events/categories"
+LIST_FILTERS = ("gender", "city", "districts", "month_budjet",)
+SAMPLED_USERS_COUNT = 50
+# Latency changes below it are noise of the in-process client
+MIN_REGRESSION_MS = 1.0
+LOGIN_STORM_SCENARIO = "users_list[login_storm]"
+LOGIN_STORM_THREADS = 32
+HIGH_FAN_OUT_SCENARIO = "users_list[districts+month_budjet,fan_out]"
+FAN_OUT_CHUNK_SIZE = 1000
+SERIALIZED_PAGE_SIZE = 25
+
+Request = Callable[[int], DRF_Response]
+
+
+def get_percentile(values: List[float], percent: float) -> float:
+    """Get nearest-rank percentile of the values."""
+    if not values:
+        return 0.0
+    ordered: List[float] = sorted(values)
+    return ordered[max(ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+class EndpointBenchmark:
+    """Benchmark of the API endpoints driven by the in-process client."""
+
+    def __init__(self, seed: int = 0) -> None:
+        self.__rand: Random = Random(seed)
+        self.__users: List[CustomUser] = []
+        self.__clients: Dict[int, APIClient] = {}
+        self.__city_id: Optional[int] = None
+        self.__city_district_ids: List[int] = []
+        self.__district_ids: List[int] = []
+        self.__registered_cnt: int = 0
+
+    def __prepare(self) -> None:
+        """Sample users and locations requested by the scenarios."""
+        user_ids: List[int] = list(
+            CustomUser.objects.get_not_deleted().filter(
+                is_active_account=True
+            ).order_by("id").values_list("id", flat=True)[
+                :SAMPLED_USERS_COUNT * 20
+            ]
+        )
+        self.__users = list(
+            CustomUser.objects.filter(
+                id__in=self.__rand.sample(
+                    user_ids,
+                    min(SAMPLED_USERS_COUNT, len(user_ids))
+                )
+            ).order_by("id")
+        )
+        district: District = District.objects.get_not_deleted().order_by(
+            "id"
+        ).first()
+        self.__city_id = district.city_id if district else None
+        self.__city_district_ids = list(
+            District.objects.get_not_deleted().filter(
+                city_id=self.__city_id
+            ).order_by("id").values_list("id", flat=True)
+        )
+        self.__district_ids = list(
+            District.objects.get_not_deleted().order_by(
+                "id"
+            ).values_list("id", flat=True)
+        )
+
+    def __get_user(self, iteration: int) -> CustomUser:
+        """Get sampled user making the request."""
+        return self.__users[iteration % len(self.__users)]
+
+    def __get_client(self, user: Optional[CustomUser] = None) -> APIClient:
+        """Get client authenticated by JWT like the real API clients."""
+        if not user:
+            return APIClient()
+        if user.id not in self.__clients:
+            client: APIClient = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION="JWT {}".format(
+                    RefreshToken.for_user(user=user).access_token
+                )
+            )
+            self.__clients[user.id] = client
+        return self.__clients[user.id]
+
+    def __get_list_request(self, params: Dict[str, Any]) -> Request:
+        """Get request of the users list with the query params."""
+        return lambda iteration: self.__get_client(
+            user=self.__get_user(iteration=iteration)
+        ).get(USERS_URL, params)
+
+    def __get_list_requests(self) -> Dict[str, Request]:
+        """Get requests of the users list with every filter combination."""
+        values: Dict[str, Any] = {
+            "gender": "F",
+            "city": self.__city_id,
+            "districts": ",".join(map(str, self.__city_district_ids[:3])),
+            "month_budjet": 60000,
+        }
+        requests: Dict[str, Request] = {}
+        size: int
+        for size in range(len(LIST_FILTERS) + 1):
+            names: Tuple[str]
+            for names in combinations(LIST_FILTERS, size):
+                name: str = "users_list[{}]".format("+".join(names)) \
+                    if names else "users_list"
+                requests[name] = self.__get_list_request(
+                    params={key: values[key] for key in names}
+                )
+        requests["users_list[districts=all]"] = self.__get_list_request(
+            params={"districts": ",".join(map(str, self.__district_ids))}
+        )
+        requests["users_list[sort=score]"] = self.__get_list_request(
+            params={"sort": "score"}
+        )
+        requests["users_list[pagination=cursor]"] = self.__get_list_request(
+            params={"pagination": "cursor"}
+        )
+        requests["users_list[mode=recommended]"] = self.__get_list_request(
+            params={"mode": "recommended"}
+        )
+        return requests
+
+    def __get_serializer_requests(self) -> Dict[str, Request]:
+        """Get serializations of the users page by both serializers."""
+        context: Dict[str, Any] = {
+            "request": APIRequestFactory().get(USERS_URL),
+            "photo_variant": "thumbnail",
+        }
+        page: QuerySet[CustomUser] = CustomUser.objects.get_not_deleted(
+        ).order_by("-datetime_created")[:SERIALIZED_PAGE_SIZE]
+        # Views are left out, so only the serialization itself is measured
+        return {
+            "serializer[values]": lambda iteration: DRF_Response(
+                CustomUserValuesSerializer(
+                    page.values(*CustomUserValuesSerializer.VALUE_FIELDS),
+                    many=True,
+                    context=context
+                ).data
+            ),
+            "serializer[model]": lambda iteration: DRF_Response(
+                CustomUserListSerializer(
+                    page.prefetch_related("districts", "districts__city"),
+                    many=True,
+                    context=context
+                ).data
+            ),
+        }
+
+    def __register(self, iteration: int) -> DRF_Response:
+        """Register new user with unique identifiers."""
+        self.__registered_cnt += 1
+        number: int = self.__registered_cnt
+        return self.__get_client().post(
+            f"{USERS_URL}/register_user",
+            {
+                "email": f"benchmark{number}@mail.ru",
+                "phone": f"+7709{number:07d}",
+                "first_name": "Benchmark",
+                "telegram_username": f"benchmark{number}",
+                "gender": "M",
+                "month_budjet": 50000,
+                "password": PASSWORD_PATTERN,
+                "districts": ",".join(map(str, self.__city_district_ids[:2])),
+            },
+            format="json"
+        )
+
+    def __add_districts(self, iteration: int) -> DRF_Response:
+        """Change districts of the user to the other ones of the city."""
+        user: CustomUser = self.__get_user(iteration=iteration)
+        district_ids: List[int] = self.__rand.sample(
+            self.__city_district_ids,
+            min(2, len(self.__city_district_ids))
+        )
+        return self.__get_client(user=user).post(
+            f"{USERS_URL}/add_districts",
+            {"districts": ",".join(map(str, district_ids))},
+            format="json"
+        )
+
+    def get_requests(self) -> Dict[str, Request]:
+        """Get requests of every benchmarked scenario by its name."""
+        requests: Dict[str, Request] = self.__get_list_requests()
+        requests.update({
+            "users_retrieve": lambda iteration: self.__get_client(
+                user=self.__get_user(iteration=iteration)
+            ).get(
+                "{}/{}".format(
+                    USERS_URL,
+                    self.__get_user(iteration=iteration + 1).id
+                )
+            ),
+            "users_similar_hobbies": lambda iteration: self.__get_client(
+                user=self.__get_user(iteration=iteration)
+            ).get(f"{USERS_URL}/similar_hobbies"),
+            "users_personal_account": lambda iteration: self.__get_client(
+                user=self.__get_user(iteration=iteration)
+            ).get(f"{USERS_URL}/personal_account"),
+            "users_login": lambda iteration: self.__get_client().post(
+                f"{USERS_URL}/login",
+                {
+                    "login_data": self.__get_user(
+                        iteration=iteration
+                    ).telegram_username,
+                    "password": PASSWORD_PATTERN,
+                },
+                format="json"
+            ),
+            "users_register_user": self.__register,
+            "users_add_districts": self.__add_districts,
+            "cities_list": lambda iteration: self.__get_client(
+                user=self.__get_user(iteration=iteration)
+            ).get(CITIES_URL),
+            "cities_districts": lambda iteration: self.__get_client(
+                user=self.__get_user(iteration=iteration)
+            ).get(f"{CITIES_URL}/{self.__city_id}/districts"),
+            "categories_list": lambda iteration: self.__get_client().get(
+                CATEGORIES_URL
+            ),
+        })
+        requests.update(self.__get_serializer_requests())
+        return requests
+
+    def __measure(
+        self,
+        request: Request,
+        iterations: int,
+        warmup: int
+    ) -> Dict[str, Any]:
+        """Measure latency and SQL of the repeated request."""
+        iteration: int
+        for iteration in range(warmup):
+            request(iteration)
+        latencies: List[float] = []
+        queries_counts: List[int] = []
+        sql_times: List[float] = []
+        statuses: Dict[str, int] = {}
+        for iteration in range(warmup, warmup + iterations):
+            with CaptureQueriesContext(connection) as queries:
+                started: float = perf_counter()
+                response: DRF_Response = request(iteration)
+                latencies.append((perf_counter() - started) * 1000)
+            queries_counts.append(len(queries))
+            sql_times.append(
+                sum(float(query["time"]) for query in queries) * 1000
+            )
+            status: str = str(response.status_code)
+            statuses[status] = statuses.get(status, 0) + 1
+        return {
+            "p50_ms": round(get_percentile(latencies, 50), 3),
+            "p90_ms": round(get_percentile(latencies, 90), 3),
+            "p99_ms": round(get_percentile(latencies, 99), 3),
+            "mean_ms": round(mean(latencies), 3),
+            "queries": median(queries_counts),
+            "sql_ms": round(mean(sql_times), 3),
+            "statuses": statuses,
+        }
+
+    def __storm_logins(
+        self,
+        number: int,
+        stopped: Event,
+        statuses: Dict[str, int],
+        statuses_lock: Lock
+    ) -> None:
+        """Log in repeatedly until the storm is stopped."""
+        client: APIClient = self.__get_client()
+        iteration: int = number
+        try:
+            while not stopped.is_set():
+                status: str
+                try:
+                    status = str(
+                        client.post(
+                            f"{USERS_URL}/login",
+                            {
+                                "login_data": self.__get_user(
+                                    iteration=iteration
+                                ).telegram_username,
+                                "password": PASSWORD_PATTERN,
+                            },
+                            format="json"
+                        ).status_code
+                    )
+                except Exception:
+                    status = "error"
+                with statuses_lock:
+                    statuses[status] = statuses.get(status, 0) + 1
+                iteration += 1
+        finally:
+            # Every thread has its own connection which is not reused
+            connections.close_all()
+
+    def __measure_under_login_storm(
+        self,
+        iterations: int,
+        warmup: int,
+        threads_number: int
+    ) -> Dict[str, Any]:
+        """Measure the users list while other clients keep logging in."""
+        stopped: Event = Event()
+        login_statuses: Dict[str, int] = {}
+        statuses_lock: Lock = Lock()
+        threads: List[Thread] = [
+            Thread(
+                target=self.__storm_logins,
+                args=(number, stopped, login_statuses, statuses_lock),
+                name=f"login-storm-{number}",
+                daemon=True
+            )
+            for number in range(threads_number)
+        ]
+        thread: Thread
+        for thread in threads:
+            thread.start()
+        try:
+            measurement: Dict[str, Any] = self.__measure(
+                request=self.__get_list_request(params={}),
+                iterations=iterations,
+                warmup=warmup
+            )
+        finally:
+            stopped.set()
+            for thread in threads:
+                thread.join()
+        # Hashing beyond the queue is refused with 503 instead of waiting
+        measurement["login_statuses"] = login_statuses
+        return measurement
+
+    def __spread_over_districts(self) -> None:
+        """Put every user of the city into all of its districts."""
+        through: Any = CustomUser.districts.through
+        user_ids: List[int] = list(
+            through.objects.filter(
+                district_id__in=self.__city_district_ids
+            ).order_by("customuser_id").values_list(
+                "customuser_id",
+                flat=True
+            ).distinct()
+        )
+        start: int
+        for start in range(0, len(user_ids), FAN_OUT_CHUNK_SIZE):
+            through.objects.bulk_create(
+                [
+                    through(customuser_id=user_id, district_id=district_id)
+                    for user_id in user_ids[start:start + FAN_OUT_CHUNK_SIZE]
+                    for district_id in self.__city_district_ids
+                ],
+                ignore_conflicts=True
+            )
+        user_bitmap_index.invalidate()
+
+    def run(
+        self,
+        iterations: int,
+        warmup: int = 2,
+        scenario: Optional[str] = None,
+        login_threads: int = LOGIN_STORM_THREADS
+    ) -> Dict[str, Dict[str, Any]]:
+        """Run scenarios containing the name and get their measurements."""
+        self.__prepare()
+        if not self.__users:
+            return {}
+        name: str
+        request: Request
+        measurements: Dict[str, Dict[str, Any]] = {
+            name: self.__measure(
+                request=request,
+                iterations=iterations,
+                warmup=warmup
+            )
+            for name, request in self.get_requests().items()
+            if not scenario or scenario in name
+        }
+        # Scenarios above run one by one, this one runs with concurrent
+        # logins; in-memory SQLite locks the tables for the other threads
+        if login_threads > 0 and (
+            not scenario or scenario in LOGIN_STORM_SCENARIO
+        ) and not (
+            connection.vendor == "sqlite" and connection.is_in_memory_db()
+        ):
+            measurements[LOGIN_STORM_SCENARIO] = \
+                self.__measure_under_login_storm(
+                    iterations=iterations,
+                    warmup=warmup,
+                    threads_number=login_threads
+                )
+        # Users matched by many districts at once are the worst case of
+        # the districts filter; they are left in the dataset, so it is last
+        if not scenario or scenario in HIGH_FAN_OUT_SCENARIO:
+            self.__spread_over_districts()
+            measurements[HIGH_FAN_OUT_SCENARIO] = self.__measure(
+                request=self.__get_list_request(
+                    params={
+                        "districts": ",".join(
+                            map(str, self.__city_district_ids)
+                        ),
+                        "month_budjet": 60000,
+                    }
+                ),
+                iterations=iterations,
+                warmup=warmup
+            )
+        return measurements
+
+
+def get_regressions(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float
+) -> List[str]:
+    """Get descriptions of the regressions against the baseline."""
+    regressions: List[str] = []
+    scale: str
+    measurements: Dict[str, Dict[str, Any]]
+    for scale, measurements in results["scales"].items():
+        baseline_measurements: Dict[str, Dict[str, Any]] = \
+            baseline.get("scales", {}).get(scale, {})
+        name: str
+        measurement: Dict[str, Any]
+        for name, measurement in measurements.items():
+            expected: Optional[Dict[str, Any]] = \
+                baseline_measurements.get(name)
+            if not expected:
+                continue
+            if measurement["p90_ms"] > expected["p90_ms"] * (1 + threshold) \
+                    and measurement["p90_ms"] - expected["p90_ms"] > \
+                    MIN_REGRESSION_MS:
+                regressions.append(
+                    "{} на {}: p90 {} мс вместо {} мс".format(
+                        name,
+                        scale,
+                        measurement["p90_ms"],
+                        expected["p90_ms"]
+                    )
+                )
+            if measurement["queries"] > expected["queries"]:
+                regressions.append(
+                    "{} на {}: {} запросов к БД вместо {}".format(
+                        name,
+                        scale,
+                        measurement["queries"],
+                        expected["queries"]
+                    )
+                )
+    return regressions
@@ -0,0 +1,407 @@
+# Python
+import csv
+import gzip
+from datetime import (
+    datetime,
+    timezone as dt_timezone,
+)
+from math import exp
+from random import Random
+from typing import (
+    Optional,
+    Iterator,
+    Sequence,
+    Tuple,
+    List,
+    Dict,
+    Any,
+)
+
+# Django
+from django.apps import apps
+from django.core.management.color import no_style
+from django.contrib.auth.hashers import make_password
+from django.db import (
+    connection,
+    transaction,
+)
+from django.db.models import Model
+from django.utils import timezone
+
+# Project
+from abstracts.utils import (
+    insert_rows,
+    reset_sequences,
+)
+from auths.models import (
+    CustomUser,
+    CustomUserRecommendation,
+)
+from auths.stats import invalidate_budget_ceiling
+from auths.indexes import user_bitmap_index
+from auths.similarity import hobby_lsh_index
+from locations.cache import locations_reference_cache
+from events.catalog import hobby_catalog_cache
+from locations.models import (
+    City,
+    District,
+)
+from events.models import (
+    Category,
+    SubCategory,
+)
+
+
+SNAPSHOT_NULL = "\\N"
+SECTION_MARK = "@"
+CITY_NAMES = (
+    "Almaty", "Astana", "Shymkent", "Karaganda", "Aktobe",
+    "Taraz", "Pavlodar", "Oskemen", "Semey", "Atyrau",
+    "Kostanay", "Kyzylorda", "Oral", "Petropavl", "Aktau",
+)
+EMAIL_PATTERNS = (
+    "mail.ru", "gmail.com", "outlook.com", "yahoo.com",
+    "inbox.ru", "yandex.kz", "yandex.ru", "mail.kz",
+)
+PASSWORD_PATTERN = "12345"
+MIN_BUDJET = 10000
+MAX_BUDJET = 1000000
+DELETED_SHARE = 0.02
+INACTIVE_SHARE = 0.05
+
+Rows = List[Tuple[Any, ...]]
+Section = Tuple[type[Model], Tuple[str], Rows]
+
+SNAPSHOT_MODELS: Tuple[type[Model]] = (
+    City,
+    District,
+    Category,
+    SubCategory,
+    CustomUser,
+    CustomUser.districts.through,
+    CustomUser.hobby_categories.through,
+)
+LOCATION_FIELDS = ("id", "name", "datetime_created", "datetime_updated",)
+DISTRICT_FIELDS = (*LOCATION_FIELDS, "city_id",)
+SUBCATEGORY_FIELDS = (*LOCATION_FIELDS, "main_category_id",)
+USER_FIELDS = (
+    "id", "password", "is_superuser",
+    "email", "phone", "first_name", "telegram_username",
+    "gender", "is_active", "month_budjet", "comment",
+    "is_staff", "is_active_account", "is_confirmed_account",
+    *CustomUser.CANONICAL_FIELDS,
+    "datetime_created", "datetime_updated", "datetime_deleted",
+)
+USER_DISTRICT_FIELDS = ("customuser_id", "district_id",)
+USER_HOBBY_FIELDS = ("customuser_id", "subcategory_id",)
+
+
+def _get_zipf_weights(count: int, exponent: float = 1.1) -> List[float]:
+    """Get weights making few first items much more popular than others."""
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def _sample_weighted(
+    rand: Random,
+    population: Sequence[int],
+    weights: Sequence[float],
+    count: int
+) -> List[int]:
+    """Get distinct items chosen by their weights."""
+    count = min(count, len(population))
+    chosen: Dict[int, None] = {}
+    while len(chosen) < count:
+        chosen.update(
+            dict.fromkeys(rand.choices(population, weights=weights, k=count))
+        )
+    return list(chosen)[:count]
+
+
+class DatasetBuilder:
+    """Seeded generator of a realistic dataset for benchmarks."""
+
+    def __init__(
+        self,
+        users_count: int,
+        cities_count: int = 5,
+        districts_count: int = 10,
+        categories_count: int = 10,
+        hobbies_count: int = 12,
+        seed: int = 0,
+        chunk_size: int = 10000
+    ) -> None:
+        self.users_count: int = users_count
+        self.cities_count: int = cities_count
+        self.districts_count: int = districts_count
+        self.categories_count: int = categories_count
+        self.hobbies_count: int = hobbies_count
+        self.seed: int = seed
+        self.chunk_size: int = chunk_size
+        self.datetime_created: datetime = timezone.now()
+        self.__city_weights: List[float] = _get_zipf_weights(
+            count=cities_count
+        )
+        self.__district_weights: List[float] = _get_zipf_weights(
+            count=districts_count
+        )
+        self.__category_weights: List[float] = _get_zipf_weights(
+            count=categories_count,
+            exponent=0.8
+        )
+
+    def __get_city_district_ids(self, city_number: int) -> List[int]:
+        """Get ids of the districts of the city by their popularity."""
+        first_id: int = city_number * self.districts_count + 1
+        return list(range(first_id, first_id + self.districts_count))
+
+    def __get_category_hobby_ids(self, category_number: int) -> List[int]:
+        """Get ids of the hobbies of the category."""
+        first_id: int = category_number * self.hobbies_count + 1
+        return list(range(first_id, first_id + self.hobbies_count))
+
+    def __get_reference_sections(self) -> Iterator[Section]:
+        """Get sections of cities, districts and hobbies."""
+        created: datetime = self.datetime_created
+        yield City, LOCATION_FIELDS, [
+            (
+                number + 1,
+                CITY_NAMES[number] if number < len(CITY_NAMES)
+                else f"City {number + 1}",
+                created,
+                created,
+            )
+            for number in range(self.cities_count)
+        ]
+        yield District, DISTRICT_FIELDS, [
+            (
+                district_id,
+                f"District {district_id}",
+                created,
+                created,
+                city_number + 1,
+            )
+            for city_number in range(self.cities_count)
+            for district_id in self.__get_city_district_ids(
+                city_number=city_number
+            )
+        ]
+        yield Category, LOCATION_FIELDS, [
+            (number + 1, f"Category {number + 1}", created, created)
+            for number in range(self.categories_count)
+        ]
+        yield SubCategory, SUBCATEGORY_FIELDS, [
+            (
+                hobby_id,
+                f"Hobby {hobby_id}",
+                created,
+                created,
+                category_number + 1,
+            )
+            for category_number in range(self.categories_count)
+            for hobby_id in self.__get_category_hobby_ids(
+                category_number=category_number
+            )
+        ]
+
+    def __get_budjet(self, rand: Random) -> int:
+        """Get month budjet skewed to the lower values with a long tail."""
+        budjet: float = exp(rand.gauss(mu=10.8, sigma=0.6))
+        return int(min(max(budjet, MIN_BUDJET), MAX_BUDJET)) // 1000 * 1000
+
+    def __get_hobby_ids(self, rand: Random) -> List[int]:
+        """Get hobbies clustered around one or two favorite categories."""
+        category_numbers: List[int] = _sample_weighted(
+            rand=rand,
+            population=range(self.categories_count),
+            weights=self.__category_weights,
+            count=rand.randint(1, 2)
+        )
+        favorite_ids: List[int] = [
+            hobby_id
+            for category_number in category_numbers
+            for hobby_id in self.__get_category_hobby_ids(
+                category_number=category_number
+            )
+        ]
+        hobby_ids: Dict[int, None] = dict.fromkeys(
+            rand.sample(
+                favorite_ids,
+                k=min(rand.randint(2, 6), len(favorite_ids))
+            )
+        )
+        # Rare hobbies outside of the favorite categories
+        if rand.random() < 0.3:
+            hobby_ids[
+                rand.randint(1, self.categories_count * self.hobbies_count)
+            ] = None
+        return list(hobby_ids)
+
+    def __get_user_sections(
+        self,
+        first_id: int,
+        count: int,
+        password: str
+    ) -> Iterator[Section]:
+        """Get sections of the chunk of users and their relations."""
+        rand: Random = Random(f"{self.seed}:{first_id}")
+        user_rows: Rows = []
+        district_rows: Rows = []
+        hobby_rows: Rows = []
+        user_id: int
+        for user_id in range(first_id, first_id + count):
+            city_number: int = rand.choices(
+                range(self.cities_count),
+                weights=self.__city_weights
+            )[0]
+            username: str = f"user{user_id}"
+            user: CustomUser = CustomUser(
+                id=user_id,
+                password=password,
+                email=f"{username}@{rand.choice(EMAIL_PATTERNS)}",
+                phone=f"+7700{user_id:07d}",
+                first_name=f"User {user_id}",
+                telegram_username=username,
+                gender=rand.choice(("M", "F")),
+                month_budjet=self.__get_budjet(rand=rand),
+                comment=f"Generated user of city {city_number + 1}",
+                is_active_account=rand.random() >= INACTIVE_SHARE,
+                datetime_created=self.datetime_created,
+                datetime_updated=self.datetime_created,
+                datetime_deleted=self.datetime_created
+                if rand.random() < DELETED_SHARE else None
+            )
+            user.fill_canonical_fields()
+            user_rows.append(
+                tuple(getattr(user, field) for field in USER_FIELDS)
+            )
+            district_id: int
+            for district_id in _sample_weighted(
+                rand=rand,
+                population=self.__get_city_district_ids(
+                    city_number=city_number
+                ),
+                weights=self.__district_weights,
+                count=rand.randint(1, 3)
+            ):
+                district_rows.append((user_id, district_id))
+            hobby_id: int
+            for hobby_id in self.__get_hobby_ids(rand=rand):
+                hobby_rows.append((user_id, hobby_id))
+        yield CustomUser, USER_FIELDS, user_rows
+        yield CustomUser.districts.through, USER_DISTRICT_FIELDS, \
+            district_rows
+        yield CustomUser.hobby_categories.through, USER_HOBBY_FIELDS, \
+            hobby_rows
+
+    def get_sections(self) -> Iterator[Section]:
+        """Get all sections of the dataset chunk by chunk."""
+        yield from self.__get_reference_sections()
+        # Single hash is shared, as PBKDF2 for every user takes most time
+        password: str = make_password(PASSWORD_PATTERN)
+        first_id: int
+        for first_id in range(1, self.users_count + 1, self.chunk_size):
+            yield from self.__get_user_sections(
+                first_id=first_id,
+                count=min(self.chunk_size, self.users_count + 1 - first_id),
+                password=password
+            )
+
+
+def _get_snapshot_value(value: Any) -> Any:
+    """Get value written to the snapshot."""
+    if value is None:
+        return SNAPSHOT_NULL
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, datetime):
+        return value.astimezone(dt_timezone.utc).isoformat(sep=" ")
+    return value
+
+
+def write_snapshot(path: str, sections: Iterator[Section]) -> Dict[str, int]:
+    """Write sections to the gzipped snapshot and get rows numbers."""
+    rows_counts: Dict[str, int] = {}
+    with gzip.open(path, "wt", newline="") as file:
+        writer = csv.writer(file)
+        model: type[Model]
+        fields: Tuple[str]
+        rows: Rows
+        for model, fields, rows in sections:
+            writer.writerow((SECTION_MARK + model._meta.label, *fields))
+            writer.writerows(
+                [_get_snapshot_value(value) for value in row]
+                for row in rows
+            )
+            rows_counts[model._meta.label] = \
+                rows_counts.get(model._meta.label, 0) + len(rows)
+    return rows_counts
+
+
+def read_snapshot(
+    path: str,
+    chunk_size: int = 10000
+) -> Iterator[Section]:
+    """Read sections of the gzipped snapshot chunk by chunk."""
+    model: Optional[type[Model]] = None
+    fields: Tuple[str] = ()
+    rows: Rows = []
+    with gzip.open(path, "rt", newline="") as file:
+        row: List[str]
+        for row in csv.reader(file):
+            if row[0].startswith(SECTION_MARK):
+                if model and rows:
+                    yield model, fields, rows
+                model = apps.get_model(row[0][len(SECTION_MARK):])
+                fields = tuple(row[1:])
+                rows = []
+                continue
+            rows.append(
+                tuple(
+                    None if value == SNAPSHOT_NULL else value
+                    for value in row
+                )
+            )
+            if len(rows) >= chunk_size:
+                yield model, fields, rows
+                rows = []
+    if model and rows:
+        yield model, fields, rows
+
+
+def restore_snapshot(path: str) -> Dict[str, int]:
+    """Replace data of the snapshot models and get rows numbers."""
+    rows_counts: Dict[str, int] = {}
+    tables: List[str] = [
+        model._meta.db_table
+        for model in (*SNAPSHOT_MODELS, CustomUserRecommendation)
+    ]
+    with transaction.atomic():
+        sql: str
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sql_flush(
+                style=no_style(),
+                tables=tables,
+                allow_cascade=True
+            ):
+                cursor.execute(sql)
+        model: type[Model]
+        fields: Tuple[str]
+        rows: Rows
+        for model, fields, rows in read_snapshot(path=path):
+            insert_rows(model=model, fields=fields, rows=rows)
+            rows_counts[model._meta.label] = \
+                rows_counts.get(model._meta.label, 0) + len(rows)
+        reset_sequences(models=SNAPSHOT_MODELS)
+    return rows_counts
+
+
+def refresh_derived_data(save_index: bool = True) -> None:
+    """Refresh caches and indexes skipped by the restore."""
+    locations_reference_cache.bump_version()
+    hobby_catalog_cache.bump_version()
+    invalidate_budget_ceiling()
+    user_bitmap_index.invalidate()
+    if save_index:
+        hobby_lsh_index.rebuild()
+    else:
+        hobby_lsh_index.build()
@@ -0,0 +1,117 @@
+# Python
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+    TimeoutError,
+)
+from threading import (
+    BoundedSemaphore,
+    Lock,
+)
+from typing import (
+    Callable,
+    Optional,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    BasePasswordHasher,
+    check_password,
+    get_hasher,
+    identify_hasher,
+    make_password,
+)
+
+# Project
+from auths.models import CustomUser
+
+
+class HashingOverloadError(Exception):
+    """Raised when too many passwords are already waiting to be hashed."""
+
+
+class HashingExecutor:
+    """Thread pool with the bounded queue for password hashing.
+
+    Views are synchronous, so the request thread still waits for the
+    result. The pool doesn't shorten the request; it caps the number of
+    hashes computed at once and rejects the requests beyond the queue
+    instead of letting them pile up on the CPU.
+
+    Limits are kept per process, so every worker process of the server
+    hashes up to AUTHS_HASHING_WORKERS passwords at once.
+    """
+
+    def __init__(self) -> None:
+        self.__lock: Lock = Lock()
+        self.__executor: Optional[ThreadPoolExecutor] = None
+        self.__slots: Optional[BoundedSemaphore] = None
+
+    def __get_executor(self) -> ThreadPoolExecutor:
+        """Create the pool on first usage with the configured limits."""
+        with self.__lock:
+            if self.__executor is None:
+                # PBKDF2 of hashlib releases GIL, so threads hash in parallel
+                self.__executor = ThreadPoolExecutor(
+                    max_workers=settings.AUTHS_HASHING_WORKERS,
+                    thread_name_prefix="password-hashing"
+                )
+                self.__slots = BoundedSemaphore(
+                    value=settings.AUTHS_HASHING_WORKERS +
+                    settings.AUTHS_HASHING_QUEUE_SIZE
+                )
+            return self.__executor
+
+    def submit(
+        self,
+        function: Callable,
+        *args: Any
+    ) -> Future:
+        """Put hashing into the pool or fail if the queue is full."""
+        executor: ThreadPoolExecutor = self.__get_executor()
+        if not self.__slots.acquire(blocking=False):
+            raise HashingOverloadError()
+        future: Future = executor.submit(function, *args)
+        future.add_done_callback(lambda _: self.__slots.release())
+        return future
+
+    def run(self, function: Callable, *args: Any) -> Any:
+        """Hash in the pool blocking the calling thread until it's done."""
+        try:
+            return self.submit(function, *args).result(
+                timeout=settings.AUTHS_HASHING_TIMEOUT
+            )
+        except TimeoutError:
+            raise HashingOverloadError()
+
+
+hashing_executor: HashingExecutor = HashingExecutor()
+
+
+def _is_outdated_hash(encoded: str) -> bool:
+    """Check if the hash has other algorithm or weaker parameters."""
+    preferred: BasePasswordHasher = get_hasher()
+    return identify_hasher(encoded).algorithm != preferred.algorithm or \
+        preferred.must_update(encoded)
+
+
+def set_user_password(user: CustomUser, raw_password: str) -> None:
+    """Set password of the user hashed in the pool."""
+    user.password = hashing_executor.run(make_password, raw_password)
+    user._password = raw_password
+
+
+def check_user_password(user: CustomUser, raw_password: str) -> bool:
+    """Check password of the user hashed in the pool."""
+    is_correct: bool = hashing_executor.run(
+        check_password,
+        raw_password,
+        user.password
+    )
+    # Outdated hash is replaced here, so the pool never touches database
+    if is_correct and _is_outdated_hash(encoded=user.password):
+        set_user_password(user=user, raw_password=raw_password)
+        user.save(update_fields=["password"])
+    return is_correct
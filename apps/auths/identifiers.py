@@ -0,0 +1,65 @@
+# Python
+import re
+from typing import (
+    Optional,
+    Tuple,
+    Dict,
+)
+
+
+PHONE_PATTERN = re.compile(r"^[\+]?[\d\s\-\.\(\)]{7,}$")
+NON_DIGIT_PATTERN = re.compile(r"\D")
+LOCAL_PHONE_LEN = 10
+NATIONAL_PHONE_LEN = 11
+NATIONAL_TRUNK_PREFIXES = ("7", "8",)
+COUNTRY_CODE = "7"
+SOURCE_FIELDS: Dict[str, str] = {
+    "canonical_email": "email",
+    "canonical_phone": "phone",
+    "canonical_telegram_username": "telegram_username",
+}
+
+
+class AmbiguousLoginError(Exception):
+    """Raised when the login identifier belongs to several users."""
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """Get canonical email which is compared case-insensitively."""
+    return email.strip().lower() if email else None
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Get phone in E.164 format treating 8XXXXXXXXXX as +7XXXXXXXXXX."""
+    if not phone:
+        return None
+    digits: str = NON_DIGIT_PATTERN.sub("", phone)
+    if not digits:
+        return None
+    if not phone.strip().startswith("+"):
+        if len(digits) == NATIONAL_PHONE_LEN and \
+                digits[0] in NATIONAL_TRUNK_PREFIXES:
+            digits = COUNTRY_CODE + digits[1:]
+        elif len(digits) == LOCAL_PHONE_LEN:
+            digits = COUNTRY_CODE + digits
+    return f"+{digits}"
+
+
+def normalize_telegram_username(username: Optional[str]) -> Optional[str]:
+    """Get canonical telegram username without @ in lower case."""
+    if not username:
+        return None
+    return username.strip().lstrip("@").lower() or None
+
+
+def get_login_identifier(login_data: str) -> Tuple[str, Optional[str]]:
+    """Get canonical field and value of the provided login identifier."""
+    login_data = login_data.strip()
+    if "@" in login_data[1:]:
+        return ("canonical_email", normalize_email(email=login_data))
+    if PHONE_PATTERN.match(login_data):
+        return ("canonical_phone", normalize_phone(phone=login_data))
+    return (
+        "canonical_telegram_username",
+        normalize_telegram_username(username=login_data)
+    )
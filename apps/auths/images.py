@@ -0,0 +1,101 @@
+# Python
+import os
+from io import BytesIO
+from typing import (
+    Optional,
+    Tuple,
+    Dict,
+)
+
+# Third party
+from PIL import (
+    Image,
+    ImageOps,
+)
+
+# Django
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.db.models.fields.files import FieldFile
+
+
+PHOTO_VARIANTS: Dict[str, Tuple[int, str]] = {
+    "thumbnail": (96, "JPEG"),
+    "thumbnail_webp": (96, "WEBP"),
+    "medium": (320, "JPEG"),
+    "medium_webp": (320, "WEBP"),
+}
+VARIANT_EXTENSIONS: Dict[str, str] = {
+    "JPEG": "jpg",
+    "WEBP": "webp",
+}
+VARIANT_QUALITY = 80
+
+
+def get_variant_name(name: str, variant: Optional[str]) -> str:
+    """Get storage name of the variant or original name if it's unknown."""
+    if variant not in PHOTO_VARIANTS:
+        return name
+    root: str = os.path.splitext(name)[0]
+    image_format: str = PHOTO_VARIANTS[variant][1]
+    return f"{root}__{variant}.{VARIANT_EXTENSIONS[image_format]}"
+
+
+def get_variant_url(photo: FieldFile, variant: Optional[str]) -> str:
+    """Get url of the photo variant without touching the storage."""
+    return photo.storage.url(
+        get_variant_name(name=photo.name, variant=variant)
+    )
+
+
+def get_photo_url(
+    storage: Storage,
+    name: str,
+    variant: Optional[str],
+    variants_photo_name: Optional[str]
+) -> str:
+    """Get url of the generated variant or of the original photo."""
+    # Variants appear only after the background generation, which writes
+    # the name of the processed photo, so the storage isn't asked per row
+    if variants_photo_name != name:
+        return storage.url(name)
+    return storage.url(get_variant_name(name=name, variant=variant))
+
+
+def has_photo_variants(photo: FieldFile) -> bool:
+    """Check whether the variants of the photo are already generated."""
+    return all(
+        photo.storage.exists(
+            get_variant_name(name=photo.name, variant=variant)
+        )
+        for variant in PHOTO_VARIANTS
+    )
+
+
+def generate_photo_variants(photo: FieldFile) -> int:
+    """Resize and recompress the photo into every variant."""
+    storage: Storage = photo.storage
+    with storage.open(photo.name, "rb") as file:
+        image: Image.Image = ImageOps.exif_transpose(Image.open(file))
+        image = image.convert("RGB")
+    variants_cnt: int = 0
+    variant: str
+    size: int
+    image_format: str
+    for variant, (size, image_format) in PHOTO_VARIANTS.items():
+        resized: Image.Image = image.copy()
+        resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+        content: BytesIO = BytesIO()
+        resized.save(
+            content,
+            format=image_format,
+            quality=VARIANT_QUALITY,
+            optimize=True
+        )
+        name: str = get_variant_name(name=photo.name, variant=variant)
+        # Variant names are derived from the original, so they are replaced
+        if storage.exists(name):
+            storage.delete(name)
+        storage.save(name, ContentFile(content.getvalue()))
+        variants_cnt += 1
+    return variants_cnt
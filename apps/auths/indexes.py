@@ -0,0 +1,296 @@
+# Python
+from typing import (
+    Optional,
+    Iterable,
+    List,
+    Dict,
+)
+from threading import RLock
+from time import monotonic
+
+# Django
+from django.conf import settings
+from django.db import transaction
+
+# Project
+from auths.models import CustomUser
+from abstracts.cache import CacheVersion
+
+
+USER_INDEX_VERSION_KEY = "auths:user_index_version"
+
+
+def get_bitmap(ids: Iterable[int]) -> int:
+    """Get bitmap with the bits of provided ids set."""
+    ids = tuple(ids)
+    if not ids:
+        return 0
+    bits: bytearray = bytearray(max(ids) // 8 + 1)
+    obj_id: int
+    for obj_id in ids:
+        bits[obj_id >> 3] |= 1 << (obj_id & 7)
+    return int.from_bytes(bits, byteorder="little")
+
+
+def get_bitmap_ids(bitmap: int) -> List[int]:
+    """Get ids of the set bits of the bitmap in ascending order."""
+    ids: List[int] = []
+    bits: bytes = bitmap.to_bytes(
+        length=(bitmap.bit_length() + 7) // 8,
+        byteorder="little"
+    )
+    position: int
+    byte: int
+    for position, byte in enumerate(bits):
+        while byte:
+            lowest_bit: int = byte & -byte
+            ids.append((position << 3) + lowest_bit.bit_length() - 1)
+            byte ^= lowest_bit
+    return ids
+
+
+class UserBitmapIndex:
+    """In-memory bitmaps of active users by district, gender and hobby.
+
+    Every process keeps its own bitmaps and applies its own changes to
+    them. Changes of the other processes bump the shared version, so the
+    bitmaps are rebuilt on the next usage. Writes sending no signals are
+    picked up after AUTHS_USER_INDEX_TIMEOUT at most.
+    """
+
+    def __init__(self) -> None:
+        self.__lock: RLock = RLock()
+        self.__shared_version: CacheVersion = CacheVersion(
+            key=USER_INDEX_VERSION_KEY
+        )
+        self.__version: Optional[int] = None
+        self.__datetime_built: Optional[float] = None
+        self.__active: int = 0
+        self.__genders: Dict[str, int] = {}
+        self.__districts: Dict[int, int] = {}
+        self.__hobbies: Dict[int, int] = {}
+
+    def __get_grouped_bitmaps(
+        self,
+        through: type,
+        related_field: str
+    ) -> Dict[int, int]:
+        """Get bitmaps of users grouped by the related object id."""
+        grouped_ids: Dict[int, List[int]] = {}
+        user_id: int
+        related_id: int
+        # Inactive users are kept too, so their activation restores them
+        for user_id, related_id in through.objects.values_list(
+            "customuser_id",
+            related_field
+        ).iterator():
+            grouped_ids.setdefault(related_id, []).append(user_id)
+        return {
+            related_id: get_bitmap(ids=ids)
+            for related_id, ids in grouped_ids.items()
+        }
+
+    def build(self) -> None:
+        """Build all the bitmaps from the database."""
+        # Read before the rows, so changes made meanwhile force a rebuild
+        version: int = self.__shared_version.get()
+        active_users = CustomUser.objects.get_not_deleted().filter(
+            is_active_account=True
+        )
+        gender_ids: Dict[str, List[int]] = {}
+        user_id: int
+        gender: str
+        for user_id, gender in active_users.values_list(
+            "id", "gender"
+        ).iterator():
+            gender_ids.setdefault(gender, []).append(user_id)
+        genders: Dict[str, int] = {
+            gender: get_bitmap(ids=ids)
+            for gender, ids in gender_ids.items()
+        }
+        districts: Dict[int, int] = self.__get_grouped_bitmaps(
+            through=CustomUser.districts.through,
+            related_field="district_id"
+        )
+        hobbies: Dict[int, int] = self.__get_grouped_bitmaps(
+            through=CustomUser.hobby_categories.through,
+            related_field="subcategory_id"
+        )
+        with self.__lock:
+            self.__genders = genders
+            self.__active = 0
+            for bitmap in genders.values():
+                self.__active |= bitmap
+            self.__districts = districts
+            self.__hobbies = hobbies
+            self.__version = version
+            self.__datetime_built = monotonic()
+
+    def __bump_version(self) -> None:
+        """Make the other processes rebuild the index."""
+        version: int = self.__shared_version.bump()
+        with self.__lock:
+            # Own changes are applied already unlike the ones of the others
+            if self.__version == version - 1:
+                self.__version = version
+
+    def __publish_change(self) -> None:
+        """Bump the shared version once the change is committed."""
+        if settings.AUTHS_USER_INDEX_ENABLED:
+            transaction.on_commit(self.__bump_version)
+
+    def invalidate(self) -> None:
+        """Mark the index to be rebuilt on the next usage everywhere."""
+        with self.__lock:
+            self.__datetime_built = None
+        self.__publish_change()
+
+    def __ensure_built(self) -> None:
+        """Build the index if it's not built or outdated."""
+        version: int = self.__shared_version.get()
+        with self.__lock:
+            if self.__datetime_built is not None and \
+                    self.__version == version and \
+                    monotonic() - self.__datetime_built < \
+                    settings.AUTHS_USER_INDEX_TIMEOUT:
+                return
+            self.build()
+
+    @property
+    def is_built(self) -> bool:
+        """Check whether the index is already built."""
+        return self.__datetime_built is not None
+
+    def filter(
+        self,
+        gender: Optional[str] = None,
+        district_ids: Optional[Iterable[int]] = None,
+        hobby_ids: Optional[Iterable[int]] = None
+    ) -> int:
+        """Get bitmap of active users matching all the provided filters."""
+        self.__ensure_built()
+        with self.__lock:
+            bitmap: int = self.__active
+            if gender is not None:
+                bitmap &= self.__genders.get(gender, 0)
+            related_ids: Optional[Iterable[int]]
+            related_bitmaps: Dict[int, int]
+            for related_ids, related_bitmaps in (
+                (district_ids, self.__districts),
+                (hobby_ids, self.__hobbies),
+            ):
+                if related_ids is None:
+                    continue
+                any_bitmap: int = 0
+                related_id: int
+                for related_id in related_ids:
+                    any_bitmap |= related_bitmaps.get(related_id, 0)
+                bitmap &= any_bitmap
+            return bitmap
+
+    def filter_ids(
+        self,
+        gender: Optional[str] = None,
+        district_ids: Optional[Iterable[int]] = None,
+        hobby_ids: Optional[Iterable[int]] = None
+    ) -> List[int]:
+        """Get ids of active users matching all the provided filters."""
+        return get_bitmap_ids(
+            bitmap=self.filter(
+                gender=gender,
+                district_ids=district_ids,
+                hobby_ids=hobby_ids
+            )
+        )
+
+    def update_user(self, user: CustomUser) -> None:
+        """Apply changes of the user's own fields to the index."""
+        self.__publish_change()
+        if not self.is_built:
+            return
+        user_bit: int = 1 << user.id
+        with self.__lock:
+            self.__active &= ~user_bit
+            gender: str
+            for gender in self.__genders:
+                self.__genders[gender] &= ~user_bit
+            if user.datetime_deleted or not user.is_active_account:
+                return
+            self.__active |= user_bit
+            self.__genders[user.gender] = \
+                self.__genders.get(user.gender, 0) | user_bit
+
+    def remove_user(self, user_id: int) -> None:
+        """Remove the user from all the bitmaps."""
+        self.__publish_change()
+        if not self.is_built:
+            return
+        user_bit: int = ~(1 << user_id)
+        with self.__lock:
+            self.__active &= user_bit
+            bitmaps: Dict
+            for bitmaps in (self.__genders, self.__districts, self.__hobbies):
+                key: int
+                for key in bitmaps:
+                    bitmaps[key] &= user_bit
+
+    def __update_related(
+        self,
+        bitmaps: Dict[int, int],
+        user_ids: Iterable[int],
+        related_ids: Iterable[int],
+        is_added: bool
+    ) -> None:
+        """Add or remove pairs of users and related objects."""
+        user_bitmap: int = get_bitmap(ids=user_ids)
+        with self.__lock:
+            related_id: int
+            for related_id in related_ids:
+                bitmap: int = bitmaps.get(related_id, 0)
+                bitmaps[related_id] = bitmap | user_bitmap \
+                    if is_added else bitmap & ~user_bitmap
+
+    def update_districts(
+        self,
+        user_ids: Iterable[int],
+        district_ids: Iterable[int],
+        is_added: bool
+    ) -> None:
+        """Apply added or removed districts of the users to the index."""
+        self.__publish_change()
+        if self.is_built:
+            self.__update_related(
+                bitmaps=self.__districts,
+                user_ids=user_ids,
+                related_ids=district_ids,
+                is_added=is_added
+            )
+
+    def update_hobbies(
+        self,
+        user_ids: Iterable[int],
+        hobby_ids: Iterable[int],
+        is_added: bool
+    ) -> None:
+        """Apply added or removed hobby categories of the users."""
+        self.__publish_change()
+        if self.is_built:
+            self.__update_related(
+                bitmaps=self.__hobbies,
+                user_ids=user_ids,
+                related_ids=hobby_ids,
+                is_added=is_added
+            )
+
+    def get_district_ids(self) -> List[int]:
+        """Get ids of all the districts which are present in the index."""
+        with self.__lock:
+            return list(self.__districts)
+
+    def get_hobby_ids(self) -> List[int]:
+        """Get ids of all the hobby categories present in the index."""
+        with self.__lock:
+            return list(self.__hobbies)
+
+
+user_bitmap_index: UserBitmapIndex = UserBitmapIndex()
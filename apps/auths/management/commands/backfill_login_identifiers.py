@@ -0,0 +1,68 @@
+# Python
+from datetime import datetime
+from typing import (
+    Tuple,
+    List,
+    Dict,
+    Any,
+)
+
+# Django
+from django.core.management.base import (
+    BaseCommand,
+    CommandParser,
+)
+
+# Project
+from auths.models import CustomUser
+
+
+class Command(BaseCommand):
+    """Fill canonical login identifiers of the existing users."""
+
+    help: str = "Fill canonical login identifiers of the existing users"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments of the command."""
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of users updated by one query"
+        )
+
+    def handle(self, *args: Tuple[Any], **options: Dict[str, Any]) -> None:
+        """Handle filling of the canonical identifiers."""
+        start_time: datetime = datetime.now()
+        chunk_size: int = options["chunk_size"]
+        users_cnt: int = 0
+
+        chunk: List[CustomUser] = []
+        user: CustomUser
+        for user in CustomUser.objects.only(
+            "id",
+            "email",
+            "phone",
+            "telegram_username",
+            *CustomUser.CANONICAL_FIELDS
+        ).order_by("id").iterator(chunk_size=chunk_size):
+            user.fill_canonical_fields()
+            chunk.append(user)
+            if len(chunk) >= chunk_size:
+                users_cnt += CustomUser.objects.bulk_update(
+                    chunk,
+                    fields=CustomUser.CANONICAL_FIELDS
+                )
+                chunk = []
+        if chunk:
+            users_cnt += CustomUser.objects.bulk_update(
+                chunk,
+                fields=CustomUser.CANONICAL_FIELDS
+            )
+
+        print(f"Данные для входа {users_cnt} пользователей заполнены")
+        print(
+            "Заполнение данных составило: {} секунд".format(
+                (datetime.now()-start_time).total_seconds()
+            )
+        )
@@ -0,0 +1,237 @@
+# Python
+import os
+import json
+from datetime import datetime
+from typing import (
+    Optional,
+    Tuple,
+    List,
+    Dict,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+# Project
+from auths.benchmarks import (
+    LOGIN_STORM_THREADS,
+    EndpointBenchmark,
+    get_regressions,
+)
+from auths.datasets import (
+    DatasetBuilder,
+    write_snapshot,
+    restore_snapshot,
+    refresh_derived_data,
+)
+
+
+class Command(BaseCommand):
+    """Benchmark API endpoints on the datasets of the different scales."""
+
+    help: str = "Benchmark API endpoints on the datasets of different scales"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments of the command."""
+        parser.add_argument(
+            "--scales",
+            default="1000",
+            help="Comma separated numbers of users, e.g. 1000,100000,1000000"
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Number of measured requests of every scenario"
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=2,
+            help="Number of not measured requests of every scenario"
+        )
+        parser.add_argument(
+            "--scenario",
+            default=None,
+            help="Run only the scenarios containing the name"
+        )
+        parser.add_argument(
+            "--login-threads",
+            type=int,
+            default=LOGIN_STORM_THREADS,
+            help="Number of threads logging in during the login storm"
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed of the datasets and sampled requests"
+        )
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Path of the JSON file with results"
+        )
+        parser.add_argument(
+            "--baseline",
+            default=None,
+            help="Path of the JSON file with results to compare with"
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed relative growth of p90 latency over the baseline"
+        )
+
+    def __get_snapshot_path(self, scale: int, seed: int) -> str:
+        """Get path of the dataset snapshot built once for the scale."""
+        path: str = os.path.join(
+            os.path.dirname(settings.AUTHS_DATASET_PATH),
+            f"benchmark_{scale}_{seed}.csv.gz"
+        )
+        if not os.path.exists(path):
+            print(f"Генерация набора данных на {scale} пользователей")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_snapshot(
+                path=path,
+                sections=DatasetBuilder(
+                    users_count=scale,
+                    seed=seed
+                ).get_sections()
+            )
+        return path
+
+    def __run_scale(
+        self,
+        scale: int,
+        options: Dict[str, Any]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Restore the dataset of the scale and benchmark it."""
+        restore_snapshot(
+            path=self.__get_snapshot_path(scale=scale, seed=options["seed"])
+        )
+        # Index file of the real database is left untouched
+        refresh_derived_data(save_index=False)
+        return EndpointBenchmark(seed=options["seed"]).run(
+            iterations=options["iterations"],
+            warmup=options["warmup"],
+            scenario=options["scenario"],
+            login_threads=options["login_threads"]
+        )
+
+    def __print_results(
+        self,
+        scale: int,
+        measurements: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """Print measurements of the scale as a table."""
+        print(f"\n{scale} пользователей")
+        print(
+            "{:<48} {:>9} {:>9} {:>9} {:>8} {:>9}".format(
+                "scenario", "p50 ms", "p90 ms", "p99 ms", "queries", "sql ms"
+            )
+        )
+        name: str
+        measurement: Dict[str, Any]
+        for name, measurement in measurements.items():
+            print(
+                "{:<48} {:>9} {:>9} {:>9} {:>8} {:>9}".format(
+                    name,
+                    measurement["p50_ms"],
+                    measurement["p90_ms"],
+                    measurement["p99_ms"],
+                    measurement["queries"],
+                    measurement["sql_ms"]
+                )
+            )
+            if "login_statuses" in measurement:
+                print(
+                    "{:<48} {}".format(
+                        "  login statuses",
+                        measurement["login_statuses"]
+                    )
+                )
+
+    def handle(self, *args: Tuple[Any], **options: Dict[str, Any]) -> None:
+        """Handle benchmarking of the endpoints."""
+        start_time: datetime = datetime.now()
+        try:
+            scales: List[int] = [
+                int(scale) for scale in options["scales"].split(",")
+            ]
+        except ValueError:
+            raise CommandError("Масштабы должны быть числами через запятую")
+        baseline: Optional[Dict[str, Any]] = None
+        if options["baseline"]:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)
+
+        results: Dict[str, Any] = {
+            "datetime": start_time.isoformat(),
+            "database": connection.vendor,
+            "iterations": options["iterations"],
+            "scales": {},
+        }
+        # Data and caches of the benchmark never touch the real ones
+        setup_test_environment(debug=False)
+        old_name: str = connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False
+        )
+        try:
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND":
+                            "django.core.cache.backends.locmem.LocMemCache",
+                        "LOCATION": "benchmarks",
+                    },
+                }
+            ):
+                scale: int
+                for scale in scales:
+                    measurements: Dict[str, Dict[str, Any]] = \
+                        self.__run_scale(scale=scale, options=options)
+                    results["scales"][str(scale)] = measurements
+                    self.__print_results(
+                        scale=scale,
+                        measurements=measurements
+                    )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+            print(f"\nРезультаты сохранены в {options['output']}")
+        print(
+            "Замеры составили: {} секунд".format(
+                (datetime.now()-start_time).total_seconds()
+            )
+        )
+        if baseline:
+            regressions: List[str] = get_regressions(
+                results=results,
+                baseline=baseline,
+                threshold=options["threshold"]
+            )
+            if regressions:
+                raise CommandError(
+                    "Обнаружены регрессии:\n" + "\n".join(regressions)
+                )
+            print("Регрессий относительно базовых результатов нет")
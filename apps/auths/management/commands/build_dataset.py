@@ -0,0 +1,106 @@
+# Python
+import os
+from datetime import datetime
+from typing import (
+    Tuple,
+    Dict,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandParser,
+)
+
+# Project
+from auths.datasets import (
+    DatasetBuilder,
+    write_snapshot,
+)
+
+
+class Command(BaseCommand):
+    """Build the seeded benchmark dataset and write it to the snapshot."""
+
+    help: str = "Build the seeded benchmark dataset and write its snapshot"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments of the command."""
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100000,
+            help="Number of generated users"
+        )
+        parser.add_argument(
+            "--cities",
+            type=int,
+            default=5,
+            help="Number of generated cities"
+        )
+        parser.add_argument(
+            "--districts",
+            type=int,
+            default=10,
+            help="Number of districts in every city"
+        )
+        parser.add_argument(
+            "--categories",
+            type=int,
+            default=10,
+            help="Number of hobby categories"
+        )
+        parser.add_argument(
+            "--hobbies",
+            type=int,
+            default=12,
+            help="Number of hobbies in every category"
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed making the dataset reproducible"
+        )
+        parser.add_argument(
+            "--output",
+            default=settings.AUTHS_DATASET_PATH,
+            help="Path of the written snapshot"
+        )
+
+    def handle(self, *args: Tuple[Any], **options: Dict[str, Any]) -> None:
+        """Handle building of the dataset."""
+        start_time: datetime = datetime.now()
+        path: str = options["output"]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        builder: DatasetBuilder = DatasetBuilder(
+            users_count=options["users"],
+            cities_count=options["cities"],
+            districts_count=options["districts"],
+            categories_count=options["categories"],
+            hobbies_count=options["hobbies"],
+            seed=options["seed"]
+        )
+        rows_counts: Dict[str, int] = write_snapshot(
+            path=path,
+            sections=builder.get_sections()
+        )
+
+        label: str
+        rows_cnt: int
+        for label, rows_cnt in rows_counts.items():
+            print(f"{label}: {rows_cnt} строк")
+        print(
+            "Снимок данных размером {:.1f} МБ сохранён в {}".format(
+                os.path.getsize(path) / 1024 / 1024,
+                path
+            )
+        )
+        print(
+            "Генерация данных составила: {} секунд".format(
+                (datetime.now()-start_time).total_seconds()
+            )
+        )
@@ -0,0 +1,116 @@
+# Python
+from datetime import datetime
+from random import Random
+from time import perf_counter
+from typing import (
+    Tuple,
+    List,
+    Dict,
+    Set,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandParser,
+)
+
+# Project
+from auths.similarity import hobby_lsh_index
+
+
+class Command(BaseCommand):
+    """Build and persist the hobby similarity index."""
+
+    help: str = "Build and persist the hobby similarity index"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments of the command."""
+        parser.add_argument(
+            "--benchmark",
+            type=int,
+            default=0,
+            help="Number of sampled users to compare index with exact scan"
+        )
+        parser.add_argument(
+            "--top-n",
+            type=int,
+            default=settings.AUTHS_HOBBY_SIMILAR_TOP_N,
+            help="Number of similar users requested for every sample"
+        )
+
+    def __benchmark(self, samples_cnt: int, top_n: int) -> None:
+        """Compare recall and latency of the index with the exact scan."""
+        user_ids: List[int] = hobby_lsh_index.get_user_ids()
+        sampled_ids: List[int] = Random(0).sample(
+            user_ids,
+            min(samples_cnt, len(user_ids))
+        )
+        lsh_time: float = 0.0
+        exact_time: float = 0.0
+        found_cnt: int = 0
+        expected_cnt: int = 0
+        user_id: int
+        for user_id in sampled_ids:
+            hobby_ids = hobby_lsh_index.get_hobby_ids(user_id=user_id)
+            started: float = perf_counter()
+            approximate: List[Tuple[int, float]] = hobby_lsh_index.query(
+                hobby_ids=hobby_ids,
+                top_n=top_n,
+                excluded_user_id=user_id
+            )
+            lsh_time += perf_counter() - started
+            started = perf_counter()
+            exact: List[Tuple[int, float]] = hobby_lsh_index.query_exact(
+                hobby_ids=hobby_ids,
+                top_n=top_n,
+                excluded_user_id=user_id
+            )
+            exact_time += perf_counter() - started
+            # Users tied with the last exact one are equally correct answers
+            threshold: float = exact[-1][1] if exact else 0.0
+            approximate_ids: Set[int] = {
+                found_id
+                for found_id, similarity in approximate
+                if similarity >= threshold
+            }
+            found_cnt += min(len(approximate_ids), len(exact))
+            expected_cnt += len(exact)
+        if not sampled_ids:
+            print("Индекс пуст, сравнивать нечего")
+            return
+        print(
+            "Полнота LSH на {} пользователях: {:.3f}".format(
+                len(sampled_ids),
+                found_cnt / expected_cnt if expected_cnt else 1.0
+            )
+        )
+        print(
+            "Среднее время запроса: LSH {:.3f} мс, перебор {:.3f} мс".format(
+                lsh_time / len(sampled_ids) * 1000,
+                exact_time / len(sampled_ids) * 1000
+            )
+        )
+
+    def handle(self, *args: Tuple[Any], **options: Dict[str, Any]) -> None:
+        """Handle building of the index."""
+        start_time: datetime = datetime.now()
+        hobby_lsh_index.rebuild()
+        print(
+            "Индекс увлечений для {} пользователей сохранён в {}".format(
+                len(hobby_lsh_index),
+                settings.AUTHS_HOBBY_INDEX_PATH
+            )
+        )
+        print(
+            "Построение индекса составило: {} секунд".format(
+                (datetime.now()-start_time).total_seconds()
+            )
+        )
+        if options["benchmark"] > 0:
+            self.__benchmark(
+                samples_cnt=options["benchmark"],
+                top_n=options["top_n"]
+            )
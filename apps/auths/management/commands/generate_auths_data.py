@@ -1,195 +1,385 @@
 # Third party
-from names import (
-    get_first_name,
-    get_last_name,
-)
+from names import FILES
+
 # Python
+from collections import deque
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    Future,
+)
 from datetime import datetime
+from functools import lru_cache
+from itertools import repeat
+from multiprocessing import get_context
 from random import (
-    choice,
-    randint,
-    sample,
+    Random,
+    randrange,
 )
+from time import perf_counter
 from typing import (
-    Any,
+    Optional,
+    Iterable,
+    Iterator,
+    Sequence,
+    Deque,
     Tuple,
+    List,
     Dict,
+    Any,
 )
 
 # Django
-from django.core.management.base import BaseCommand
+from django.core.management.base import (
+    BaseCommand,
+    CommandParser,
+)
 from django.contrib.auth.hashers import make_password
-from django.db.models import QuerySet
+from django.db import (
+    connections,
+    transaction,
+)
+from django.db.models import Max
+from django.utils import timezone
 
 # Project
+from abstracts.utils import (
+    insert_rows,
+    reset_sequences,
+)
 from auths.models import CustomUser
+from auths.stats import invalidate_budget_ceiling
+from auths.indexes import user_bitmap_index
+from auths.similarity import hobby_lsh_index
 from locations.models import District
 from events.models import SubCategory
 
 
-class Command(BaseCommand):
-    """Custom command for filling up database."""
+EMAIL_PATTERNS = (
+    "mail.ru", "gmail.com", "outlook.com", "yahoo.com",
+    "inbox.ru", "yandex.kz", "yandex.ru", "mail.kz",
+)
+MESSAGE_TEMPLATE_PARTS = (
+    "hello", "world", "animal", "person",
+    "good", "thank you", "nice", "show", "say",
+    "anime", "Turkey", "Canada", "Kazakhstan", "dear",
+    "bird", "dog", "cat", "queen", "buy", "sir", "apple",
+    "pear", "zebra", "man", "girl", "boy", "Russia",
+    "Paris", "United Kingdom", "boyfriend", "girlfriend",
+    "Kaneki", "John", "Temirbolat", "Mike", "Marat", "Rem",
+    "Ram", "laptop", "computer", "mouse", "lorem impsum",
+    "Almaty", "Moscow", "Astana", "Karaganda", "NU", "KBTU",
+    "or", "and", "as well as", "along with", "while", "including",
+)
+PHONE_BEGINNINGS = ("+7", "8",)
+MOBILE_PROVIDER_PHONES = (
+    "778", "701", "775", "702",
+    "747", "707", "771",
+)
+PHONE_NUMBERS_PER_PROVIDER = 10 ** 7
+EMAIL_DEVIDERS = ("_", ".",)
+STATES = (True, False,)
+GENDERS = ("M", "F",)
+PASSWORD_PATTERN = "12345"
 
-    __email_patterns: Tuple[str] = (
-        "mail.ru", "gmail.com", "outlook.com", "yahoo.com",
-        "inbox.ru", "yandex.kz", "yandex.ru", "mail.kz",
-    )
-    __message_template_parts: tuple[str] = (
-        "hello", "world", "animal", "person",
-        "good", "thank you", "nice", "show", "say",
-        "anime", "Turkey", "Canada", "Kazakhstan", "dear",
-        "bird", "dog", "cat", "queen", "buy", "sir", "apple",
-        "pear", "zebra", "man", "girl", "boy", "Russia",
-        "Paris", "United Kingdom", "boyfriend", "girlfriend",
-        "Kaneki", "John", "Temirbolat", "Mike", "Marat", "Rem",
-        "Ram", "laptop", "computer", "mouse", "lorem impsum",
-        "Almaty", "Moscow", "Astana", "Karaganda", "NU", "KBTU",
-        "or", "and", "as well as", "along with", "while", "including",
-    )
-    __phone_beginning: Tuple[str] = (
-        "+7",
-        "8",
-    )
-    __mobile_provider_phones: Tuple[str] = (
-        "778", "701", "775", "702",
-        "775", "747", "707", "771",
-    )
-    __email_devider: Tuple[str] = ("_", ".",)
-    __STATES = (True, False,)
-    __GENDERS = ("M", "F")
-    PASSWORD_PATTERN = "12345"
-
-    def __init__(self, *args: Tuple[Any], **kwargs: Dict[str, Any]) -> None:
-        """Call parent constructor."""
-        super().__init__(args, kwargs)
-
-    def __generate_users(self, required_number: int = 0) -> None:
-        def get_email(first_name: str, last_name: str) -> str:
-            email_pattern: str = choice(self.__email_patterns)
-            return "{0}@{1}".format(
-                first_name.lower() +
-                choice(self.__email_devider) +
-                last_name.lower(),
-                email_pattern
-            )
+USER_FIELDS = (
+    "id", "password", "is_superuser",
+    "email", "phone", "first_name", "telegram_username",
+    "gender", "is_active", "month_budjet", "comment",
+    "is_staff", "is_active_account", "is_confirmed_account",
+    *CustomUser.CANONICAL_FIELDS,
+    "datetime_created", "datetime_updated",
+)
+DISTRICT_FIELDS = ("customuser_id", "district_id",)
+HOBBY_FIELDS = ("customuser_id", "subcategory_id",)
 
-        def get_comment() -> str:
-            MIN_CONTENT_WORDS_NUM = 5
-            MAX_CONTENT_WORDS_NUM = 30
-            ran_words_number: int = randint(
-                MIN_CONTENT_WORDS_NUM,
-                MAX_CONTENT_WORDS_NUM
-            )
-            return " ".join(
-                sample(
-                    population=self.__message_template_parts,
-                    k=ran_words_number
-                )
-            ).capitalize()
-
-        def get_phone() -> str:
-            res_phone: str = choice(
-                self.__phone_beginning
-            ) + choice(
-                self.__mobile_provider_phones
-            ) + str(
-                randint(100, 999)
-            ) + str(
-                randint(10, 99)
-            ) + str(
-                randint(10, 99)
-            )
-            return res_phone
+Rows = List[Tuple[Any, ...]]
 
-        def get_telegram_username(first_name: str, last_name: str) -> str:
-            return (
-                first_name.lower() +
-                choice(self.__email_devider) +
-                last_name.lower()
-            )
 
-        def get_gender() -> str:
-            return choice(self.__GENDERS)
+@lru_cache(maxsize=None)
+def _get_names(file_key: str) -> Tuple[Tuple[str], Tuple[float]]:
+    """Get names with cumulative frequencies from the names distribution."""
+    names: List[str] = []
+    cum_weights: List[float] = []
+    with open(FILES[file_key]) as name_file:
+        line: str
+        for line in name_file:
+            name, _, cummulative, _ = line.split()
+            names.append(name.capitalize())
+            cum_weights.append(float(cummulative))
+    return tuple(names), tuple(cum_weights)
+
 
-        def get_is_active() -> bool:
-            return choice(self.__STATES)
+def _get_name(rand: Random, file_key: str) -> str:
+    """Get random name keeping its frequency in the population."""
+    names: Tuple[str]
+    cum_weights: Tuple[float]
+    names, cum_weights = _get_names(file_key=file_key)
+    return rand.choices(names, cum_weights=cum_weights)[0]
 
-        def get_month_budjet() -> int:
-            return randint(10000, 100000)
 
-        def get_name() -> str:
-            return get_first_name()
+def _get_phone(rand: Random, user_id: int) -> str:
+    """Get phone which is unique for the user id."""
+    provider: str = MOBILE_PROVIDER_PHONES[
+        user_id // PHONE_NUMBERS_PER_PROVIDER % len(MOBILE_PROVIDER_PHONES)
+    ]
+    return "{0}{1}{2:07d}".format(
+        rand.choice(PHONE_BEGINNINGS),
+        provider,
+        user_id % PHONE_NUMBERS_PER_PROVIDER
+    )
+
 
-        def get_surname() -> str:
-            return get_last_name()
+def build_chunk(
+    first_id: int,
+    count: int,
+    seed: str,
+    password: str,
+    district_ids: Sequence[int],
+    hobby_ids: Sequence[int]
+) -> Tuple[Rows, Rows, Rows]:
+    """Build rows of users and their relations for the range of ids."""
+    rand: Random = Random(seed)
+    datetime_now: datetime = timezone.now()
+    user_rows: Rows = []
+    district_rows: Rows = []
+    hobby_rows: Rows = []
+    user_id: int
+    for user_id in range(first_id, first_id + count):
+        first_name: str = _get_name(
+            rand=rand,
+            file_key="first:" + rand.choice(("male", "female"))
+        )
+        last_name: str = _get_name(rand=rand, file_key="last")
+        # Id suffix keeps unique fields free of collisions without lookups
+        username: str = "{0}{1}{2}{3}".format(
+            first_name.lower(),
+            rand.choice(EMAIL_DEVIDERS),
+            last_name.lower(),
+            user_id
+        )
+        user: CustomUser = CustomUser(
+            id=user_id,
+            password=password,
+            email=f"{username}@{rand.choice(EMAIL_PATTERNS)}",
+            phone=_get_phone(rand=rand, user_id=user_id),
+            first_name=first_name,
+            telegram_username=username,
+            gender=rand.choice(GENDERS),
+            is_active=rand.choice(STATES),
+            month_budjet=rand.randint(10000, 100000),
+            comment=" ".join(
+                rand.sample(
+                    population=MESSAGE_TEMPLATE_PARTS,
+                    k=rand.randint(5, 30)
+                )
+            ).capitalize(),
+            datetime_created=datetime_now,
+            datetime_updated=datetime_now
+        )
+        user.fill_canonical_fields()
+        user_rows.append(
+            tuple(getattr(user, field) for field in USER_FIELDS)
+        )
+        district_id: int
+        for district_id in rand.sample(
+            district_ids,
+            k=rand.randint(1, len(district_ids))
+        ):
+            district_rows.append((user_id, district_id))
+        hobby_id: int
+        for hobby_id in rand.sample(
+            hobby_ids,
+            k=rand.randint(1, len(hobby_ids))
+        ):
+            hobby_rows.append((user_id, hobby_id))
+    return user_rows, district_rows, hobby_rows
 
-        def generate_password() -> str:
-            return make_password(self.PASSWORD_PATTERN)
 
-        users_cnt: int = 0
-        obj: CustomUser
-        is_created: bool = False
-        districts: QuerySet[District] | tuple[District] = \
-            District.objects.all()
-        distr_number: int = districts.count()
-        districts = tuple(districts)
+class Command(BaseCommand):
+    """Custom command for filling up database."""
 
-        hobby_subcategories: QuerySet[SubCategory] | tuple[SubCategory] = \
-            SubCategory.objects.all()
-        categories_number: int = hobby_subcategories.count()
-        hobby_subcategories = tuple(hobby_subcategories)
+    help: str = "Generate users with their districts and hobbies in bulk"
 
-        _: int
-        for _ in range(required_number):
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments of the command."""
+        parser.add_argument(
+            "--count",
+            type=int,
+            default=100,
+            help="Number of generated users"
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="Seed making the generated data reproducible"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes building the rows"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of users inserted by one transaction"
+        )
 
-            first_name: str = get_name()
-            last_name: str = get_surname()
-            email: str = get_email(
-                first_name=first_name,
-                last_name=last_name
+    def __save_chunk(
+        self,
+        user_rows: Rows,
+        district_rows: Rows,
+        hobby_rows: Rows
+    ) -> int:
+        """Save the built rows and get number of inserted rows."""
+        with transaction.atomic():
+            insert_rows(
+                model=CustomUser,
+                fields=USER_FIELDS,
+                rows=user_rows
             )
-            phone: str = get_phone()
-            telegram_username: str = get_telegram_username(
-                first_name=first_name,
-                last_name=last_name
+            insert_rows(
+                model=CustomUser.districts.through,
+                fields=DISTRICT_FIELDS,
+                rows=district_rows
             )
-            gender: str = get_gender()
-            is_active: bool = get_is_active()
-            month_budjet: int = get_month_budjet()
-            comment: str = get_comment()
-            obj, is_created = CustomUser.objects.get_or_create(
-                email=email,
-                phone=phone,
-                first_name=first_name,
-                telegram_username=telegram_username,
-                gender=gender,
-                is_active=is_active,
-                month_budjet=month_budjet,
-                comment=comment,
-                password=generate_password()
+            insert_rows(
+                model=CustomUser.hobby_categories.through,
+                fields=HOBBY_FIELDS,
+                rows=hobby_rows
             )
-            if is_created:
-                districts_number: int = randint(1, distr_number)
-                categories_number: int = randint(1, categories_number)
+        return len(user_rows) + len(district_rows) + len(hobby_rows)
+
+    def __refresh_derived_data(self) -> None:
+        """Refresh caches and indexes skipped by the bulk insert signals."""
+        invalidate_budget_ceiling()
+        user_bitmap_index.invalidate()
+        hobby_lsh_index.rebuild()
 
-                distr: District
-                for distr in sample(districts, k=districts_number):
-                    obj.districts.add(distr)
+    def __iterate_chunks(
+        self,
+        executor: ProcessPoolExecutor,
+        arguments: Tuple[Iterable[Any], ...],
+        pending_limit: int
+    ) -> Iterator[Tuple[Rows, Rows, Rows]]:
+        """Iterate over chunks built by workers keeping few of them ahead."""
+        # Unlike executor.map, built rows don't pile up while they're saved
+        pending: Deque[Future] = deque()
+        chunk_arguments: Tuple[Any, ...]
+        for chunk_arguments in zip(*arguments):
+            pending.append(executor.submit(build_chunk, *chunk_arguments))
+            if len(pending) >= pending_limit:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
-                subcat: SubCategory
-                for subcat in sample(hobby_subcategories, k=categories_number):
-                    obj.hobby_categories.add(subcat)
+    def __generate_users(
+        self,
+        required_number: int,
+        seed: int,
+        workers: int,
+        batch_size: int
+    ) -> Tuple[int, int]:
+        """Generate users and get numbers of created users and rows."""
+        district_ids: Tuple[int] = tuple(
+            District.objects.order_by("id").values_list("id", flat=True)
+        )
+        hobby_ids: Tuple[int] = tuple(
+            SubCategory.objects.order_by("id").values_list("id", flat=True)
+        )
+        if not district_ids or not hobby_ids:
+            print("Сначала сгенерируйте районы и категории хобби")
+            return 0, 0
 
-                users_cnt += 1
-        print(f"{users_cnt} пользователей успешно созданы")
+        # Single hash is shared, as PBKDF2 for every user takes most time
+        password: str = make_password(PASSWORD_PATTERN)
+        first_id: int = (
+            CustomUser.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+        ) + 1
+        first_ids: List[int] = list(
+            range(first_id, first_id + required_number, batch_size)
+        )
+        counts: List[int] = [
+            min(batch_size, first_id + required_number - chunk_first_id)
+            for chunk_first_id in first_ids
+        ]
+        seeds: List[str] = [
+            f"{seed}:{chunk_number}"
+            for chunk_number in range(len(first_ids))
+        ]
+        arguments: Tuple[Iterable[Any], ...] = (
+            first_ids,
+            counts,
+            seeds,
+            repeat(password),
+            repeat(district_ids),
+            repeat(hobby_ids),
+        )
+        rows_cnt: int = 0
+        chunks: Iterator[Tuple[Rows, Rows, Rows]]
+        executor: Optional[ProcessPoolExecutor] = None
+        if workers <= 1:
+            chunks = map(build_chunk, *arguments)
+        else:
+            # Names are loaded once and shared by the forked workers
+            _get_names(file_key="first:male")
+            _get_names(file_key="first:female")
+            _get_names(file_key="last")
+            # Forked workers must not share the database connection
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=get_context("fork")
+            )
+            chunks = self.__iterate_chunks(
+                executor=executor,
+                arguments=arguments,
+                pending_limit=workers * 2
+            )
+        try:
+            user_rows: Rows
+            district_rows: Rows
+            hobby_rows: Rows
+            for user_rows, district_rows, hobby_rows in chunks:
+                rows_cnt += self.__save_chunk(
+                    user_rows=user_rows,
+                    district_rows=district_rows,
+                    hobby_rows=hobby_rows
+                )
+        finally:
+            if executor:
+                executor.shutdown()
+        reset_sequences(models=[CustomUser])
+        return required_number, rows_cnt
 
     def handle(self, *args: Tuple[Any], **options: Dict[str, Any]) -> None:
         """Handle data filling."""
         start_time: datetime = datetime.now()
+        seed: int = options["seed"]
+        if seed is None:
+            seed = randrange(2 ** 32)
 
-        # CustomUser data generation
-        USERS_NUMBER = 100
-        self.__generate_users(required_number=USERS_NUMBER)
+        started: float = perf_counter()
+        users_cnt: int
+        rows_cnt: int
+        users_cnt, rows_cnt = self.__generate_users(
+            required_number=options["count"],
+            seed=seed,
+            workers=options["workers"],
+            batch_size=options["batch_size"]
+        )
+        insert_time: float = perf_counter() - started
+        if users_cnt:
+            self.__refresh_derived_data()
+            print(f"{users_cnt} пользователей успешно созданы (seed {seed})")
+            print(
+                "Вставлено {} строк: {:.0f} строк в секунду".format(
+                    rows_cnt,
+                    rows_cnt / insert_time if insert_time else rows_cnt
+                )
+            )
 
         print(
             "Генерация данных составила: {} секунд".format(
@@ -0,0 +1,66 @@
+# Python
+from datetime import datetime
+from typing import (
+    Tuple,
+    Dict,
+    Any,
+)
+
+# Django
+from django.core.management.base import (
+    BaseCommand,
+    CommandParser,
+)
+
+# Project
+from auths.models import CustomUser
+from auths.images import (
+    generate_photo_variants,
+    has_photo_variants,
+)
+from auths.tasks import mark_photo_variants
+
+
+class Command(BaseCommand):
+    """Generate resized variants of the users' photos."""
+
+    help: str = "Generate resized variants of the users' photos"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments of the command."""
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate variants which already exist"
+        )
+
+    def handle(self, *args: Tuple[Any], **options: Dict[str, Any]) -> None:
+        """Handle generation of the photo variants."""
+        start_time: datetime = datetime.now()
+        photos_cnt: int = 0
+        failed_cnt: int = 0
+
+        user: CustomUser
+        for user in CustomUser.objects.exclude(photo="").exclude(
+            photo__isnull=True
+        ).only("id", "photo").iterator():
+            if options["force"] or not has_photo_variants(photo=user.photo):
+                try:
+                    generate_photo_variants(photo=user.photo)
+                    photos_cnt += 1
+                except (OSError, ValueError) as e:
+                    failed_cnt += 1
+                    print(f"Фото пользователя {user.id} не обработано:", e)
+                    continue
+            # Variants generated before are marked for the serializers too
+            mark_photo_variants(user_id=user.id, photo_name=user.photo.name)
+
+        print(
+            f"Варианты фото созданы для {photos_cnt} пользователей, "
+            f"ошибок: {failed_cnt}"
+        )
+        print(
+            "Генерация данных составила: {} секунд".format(
+                (datetime.now()-start_time).total_seconds()
+            )
+        )
@@ -0,0 +1,121 @@
+# Python
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+from multiprocessing import get_context
+from typing import (
+    Iterator,
+    Tuple,
+    List,
+    Dict,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandParser,
+)
+from django.db import connections
+
+# Project
+from auths.models import CustomUser
+from auths.recommendations import (
+    compute_recommendation,
+    save_recommendations,
+)
+
+
+def compute_chunk(
+    user_ids: List[int],
+    top_k: int
+) -> List[Tuple[int, List[int], List[float]]]:
+    """Compute recommendations for the chunk of users."""
+    rows: List[Tuple[int, List[int], List[float]]] = []
+    user: CustomUser
+    for user in CustomUser.objects.filter(id__in=user_ids):
+        candidate_ids: List[int]
+        scores: List[float]
+        candidate_ids, scores = compute_recommendation(
+            user=user,
+            top_k=top_k
+        )
+        rows.append((user.id, candidate_ids, scores))
+    return rows
+
+
+class Command(BaseCommand):
+    """Precompute recommended roommates for every active user."""
+
+    help: str = "Precompute recommended roommates for every active user"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments of the command."""
+        parser.add_argument(
+            "--top-k",
+            type=int,
+            default=settings.AUTHS_RECOMMENDATIONS_TOP_K,
+            help="Number of candidates stored for every user"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of users processed by one task"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes"
+        )
+
+    def __get_chunks(self, chunk_size: int) -> Iterator[List[int]]:
+        """Get ids of the active users split by chunks."""
+        user_ids: List[int] = list(
+            CustomUser.objects.get_not_deleted().filter(
+                is_active_account=True
+            ).order_by("id").values_list("id", flat=True)
+        )
+        start: int
+        for start in range(0, len(user_ids), chunk_size):
+            yield user_ids[start:start + chunk_size]
+
+    def handle(self, *args: Tuple[Any], **options: Dict[str, Any]) -> None:
+        """Handle recommendations generation."""
+        start_time: datetime = datetime.now()
+        top_k: int = options["top_k"]
+        workers: int = options["workers"]
+        users_cnt: int = 0
+
+        chunks: Iterator[List[int]] = self.__get_chunks(
+            chunk_size=options["chunk_size"]
+        )
+        if workers <= 1:
+            chunk: List[int]
+            for chunk in chunks:
+                users_cnt += save_recommendations(
+                    rows=compute_chunk(user_ids=chunk, top_k=top_k)
+                )
+        else:
+            # Forked workers must open their own database connections
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=get_context("fork")
+            ) as executor:
+                rows: List[Tuple[int, List[int], List[float]]]
+                for rows in executor.map(
+                    compute_chunk,
+                    chunks,
+                    repeat(top_k)
+                ):
+                    users_cnt += save_recommendations(rows=rows)
+
+        print(f"Рекомендации для {users_cnt} пользователей успешно созданы")
+        print(
+            "Генерация данных составила: {} секунд".format(
+                (datetime.now()-start_time).total_seconds()
+            )
+        )
@@ -0,0 +1,69 @@
+# Python
+from datetime import datetime
+from typing import (
+    Tuple,
+    Dict,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+
+# Project
+from auths.datasets import (
+    restore_snapshot,
+    refresh_derived_data,
+)
+
+
+class Command(BaseCommand):
+    """Replace users, locations and hobbies with the snapshot data."""
+
+    help: str = "Replace users, locations and hobbies with the snapshot data"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments of the command."""
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default=settings.AUTHS_DATASET_PATH,
+            help="Path of the restored snapshot"
+        )
+        parser.add_argument(
+            "--noinput",
+            action="store_true",
+            help="Do not ask for the confirmation of the data removal"
+        )
+
+    def handle(self, *args: Tuple[Any], **options: Dict[str, Any]) -> None:
+        """Handle restoring of the dataset."""
+        if not options["noinput"] and input(
+            "Все пользователи, города и хобби будут удалены. "
+            "Продолжить? (yes/no): "
+        ) != "yes":
+            raise CommandError("Восстановление отменено")
+        start_time: datetime = datetime.now()
+
+        try:
+            rows_counts: Dict[str, int] = restore_snapshot(
+                path=options["path"]
+            )
+        except FileNotFoundError:
+            raise CommandError(f"Снимок {options['path']} не найден")
+        refresh_derived_data()
+
+        label: str
+        rows_cnt: int
+        for label, rows_cnt in rows_counts.items():
+            print(f"{label}: {rows_cnt} строк")
+        print("Для рекомендаций запустите generate_recommendations")
+        print(
+            "Восстановление данных составило: {} секунд".format(
+                (datetime.now()-start_time).total_seconds()
+            )
+        )
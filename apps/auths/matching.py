@@ -0,0 +1,88 @@
+# Python
+from typing import (
+    Optional,
+    Iterable,
+    List,
+    Dict,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.db.models import (
+    QuerySet,
+    IntegerField,
+    Exists,
+    OuterRef,
+    Value,
+    Case,
+    When,
+)
+
+# Project
+from auths.models import CustomUser
+from auths.indexes import user_bitmap_index
+
+
+def get_districts_exists(district_ids: Optional[Iterable[int]]) -> Exists:
+    """Get condition of the user having any of the districts or any at all."""
+    # Correlated EXISTS doesn't multiply users by their matched districts,
+    # so the queryset needs no DISTINCT to get rid of the duplicates
+    through_queryset: QuerySet = CustomUser.districts.through.objects.filter(
+        customuser_id=OuterRef("pk")
+    )
+    if district_ids is not None:
+        through_queryset = through_queryset.filter(
+            district_id__in=district_ids
+        )
+    return Exists(through_queryset)
+
+
+def get_matched_queryset(
+    district_ids: Iterable[int],
+    excluded_user_id: Optional[int] = None,
+    **user_params: Dict[str, Any]
+) -> QuerySet[CustomUser]:
+    """Get queryset of users matching the districts and user params."""
+    if settings.AUTHS_USER_INDEX_ENABLED:
+        user_ids: List[int] = user_bitmap_index.filter_ids(
+            gender=user_params.get("gender"),
+            district_ids=district_ids
+        )
+        # Too long lists of ids are slower than the join itself
+        if len(user_ids) <= settings.AUTHS_USER_INDEX_MAX_IDS:
+            return CustomUser.objects.filter(
+                id__in=user_ids
+            ).exclude(
+                id=excluded_user_id
+            )
+    # Same users as the index has: neither deleted nor deactivated
+    return CustomUser.objects.get_not_deleted().filter(
+        get_districts_exists(district_ids=district_ids),
+        **user_params,
+        is_active_account=True,
+    ).exclude(
+        id=excluded_user_id
+    )
+
+
+def filter_by_budjet(
+    queryset: QuerySet[CustomUser],
+    final_budjet: int
+) -> QuerySet[CustomUser]:
+    """Get users fitting the budjet or 20% wider one if nobody fits."""
+    # Both variants are resolved by the single statement
+    return queryset.filter(
+        month_budjet__lte=Case(
+            When(
+                Exists(
+                    queryset.filter(
+                        month_budjet__lte=final_budjet
+                    )
+                ),
+                then=Value(final_budjet)
+            ),
+            default=Value(int(final_budjet*1.2)),
+            output_field=IntegerField()
+        )
+    )
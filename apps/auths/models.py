@@ -1,12 +1,15 @@
 # Python
+import logging
+from tempfile import SpooledTemporaryFile
 from typing import (
     Optional,
+    Iterable,
+    Tuple,
+    List,
+    Dict,
+    Set,
     Any,
 )
-from requests import (
-    Response,
-    get,
-)
 
 # Django
 from django.contrib.auth.models import (
@@ -15,10 +18,10 @@ from django.contrib.auth.models import (
     BaseUserManager,
 )
 from django.core.files import File
-from django.core.files.temp import NamedTemporaryFile
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.db.models import (
+    Q,
     EmailField,
     CharField,
     BooleanField,
@@ -27,15 +30,36 @@ from django.db.models import (
     TextField,
     ImageField,
     ManyToManyField,
+    OneToOneField,
+    JSONField,
     QuerySet,
-    Q,
+    CASCADE,
 )
 
 # Project
 from abstracts.models import AbstractDateTime
+from abstracts.utils import sync_m2m_ids
 from locations.models import District
 from events.models import SubCategory
 from auths.validators import validate_negative_price
+from auths.photos import (
+    PhotoDownloadError,
+    photo_downloader,
+)
+from auths.identifiers import (
+    normalize_email,
+    normalize_phone,
+    normalize_telegram_username,
+    get_login_identifier,
+    AmbiguousLoginError,
+    SOURCE_FIELDS,
+)
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+DUPLICATED_IDENTIFIER_MESSAGE = \
+    "Пользователь с таким значением уже существует"
 
 
 class CustomUserManager(BaseUserManager):
@@ -147,17 +171,64 @@ class CustomUserManager(BaseUserManager):
         phone_email_telegram: str
     ) -> Optional["CustomUser"]:
         """Get CustomUser instance by email phone or telegram username."""
-        custom_user: Optional["CustomUser"] = None
-
-        try:
-            custom_user = self.get(
-                Q(email=phone_email_telegram) |
-                Q(phone=phone_email_telegram) |
-                Q(telegram_username=phone_email_telegram)
-            )
-            return custom_user
-        except CustomUser.DoesNotExist:
+        field_name: str
+        value: Optional[str]
+        field_name, value = get_login_identifier(
+            login_data=phone_email_telegram
+        )
+        if not value:
             return None
+        # Single seek over the index of the detected canonical column
+        users: List["CustomUser"] = list(
+            self.filter(**{field_name: value})[:2]
+        )
+        if not users:
+            # Users saved before the canonical columns have them unfilled
+            users = list(
+                self.filter(**{
+                    f"{field_name}__isnull": True,
+                    SOURCE_FIELDS[field_name]: phone_email_telegram.strip(),
+                })[:2]
+            )
+        if len(users) > 1:
+            logger.warning(
+                "Login %s of several users is refused: %s",
+                field_name,
+                [user.id for user in users]
+            )
+            raise AmbiguousLoginError(phone_email_telegram)
+        return users[0] if users else None
+
+    def get_duplicated_identifiers(self, user: "CustomUser") -> List[str]:
+        """Get login identifiers of the user taken by the other users."""
+        # "User@Mail.ru" and "8701..." are the same logins as "user@mail.ru"
+        # and "+7701...", though the unique columns keep them apart
+        user.fill_canonical_fields()
+        identifiers: Dict[str, str] = {
+            field_name: getattr(user, field_name)
+            for field_name in SOURCE_FIELDS
+            if getattr(user, field_name)
+        }
+        if not identifiers:
+            return []
+        condition: Q = Q()
+        field_name: str
+        value: str
+        for field_name, value in identifiers.items():
+            condition |= Q(**{field_name: value})
+        taken: Set[str] = {
+            field_name
+            for row in self.filter(condition).exclude(
+                pk=user.pk
+            ).values_list(*identifiers)
+            for field_name, value in zip(identifiers, row)
+            if value == identifiers[field_name]
+        }
+        return [
+            SOURCE_FIELDS[field_name]
+            for field_name in SOURCE_FIELDS
+            if field_name in taken
+        ]
 
 
 class CustomUser(
@@ -171,6 +242,14 @@ class CustomUser(
     TELEGRAM_USERNAME_LEN = 254
     GENDER_MAX_LEN = 1
     TELEGRAM_ID_LEN = 30
+    CANONICAL_SOURCE_FIELDS = frozenset((
+        "email", "phone", "telegram_username",
+    ))
+    CANONICAL_FIELDS = (
+        "canonical_email",
+        "canonical_phone",
+        "canonical_telegram_username",
+    )
     SINGLE_FIELDS = (
         "email", "phone",
         "first_name", "telegram_username",
@@ -232,6 +311,7 @@ class CustomUser(
     )
     month_budjet: IntegerField = IntegerField(
         validators=[validate_negative_price],
+        db_index=True,
         verbose_name="Месячный бюджет"
     )
     comment: TextField = TextField(
@@ -245,6 +325,13 @@ class CustomUser(
         null=True,
         verbose_name="Фото профиля"
     )
+    variants_photo_name: CharField = CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Фото со сгенерированными вариантами"
+    )
     districts: ManyToManyField = ManyToManyField(
         to=District,
         related_name="users",
@@ -267,7 +354,33 @@ class CustomUser(
         default=False,
         verbose_name="Подтверждение, что действительно человек"
     )
+    canonical_email: CharField = CharField(
+        max_length=EMAIL_MAX_LEN,
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name="Почта для входа"
+    )
+    canonical_phone: CharField = CharField(
+        max_length=16,
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name="Номер телефона для входа"
+    )
+    canonical_telegram_username: CharField = CharField(
+        max_length=TELEGRAM_USERNAME_LEN,
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name="Имя пользователя Telegram для входа"
+    )
     objects = CustomUserManager()
+    # Name of the photo in the database, new users have none there
+    __saved_photo_name: Optional[str] = None
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS: list[str] = [
@@ -290,6 +403,68 @@ class CustomUser(
     def __str__(self) -> str:
         return self.email
 
+    @classmethod
+    def from_db(
+        cls,
+        db: str,
+        field_names: Iterable[str],
+        values: Iterable[Any]
+    ) -> "CustomUser":
+        """Remember the loaded photo to find out whether it's replaced."""
+        instance: CustomUser = super().from_db(db, field_names, values)
+        # Photo descriptor keeps the raw name until the field is accessed
+        instance.__saved_photo_name = instance.__dict__.get("photo")
+        return instance
+
+    def is_photo_changed(self) -> bool:
+        """Check whether the photo differs from the saved one."""
+        if "photo" in self.get_deferred_fields():
+            return False
+        return (self.photo.name or None) != (self.__saved_photo_name or None)
+
+    def fill_canonical_fields(self) -> None:
+        """Fill canonical login identifiers from the entered ones."""
+        self.canonical_email = normalize_email(email=self.email)
+        self.canonical_phone = normalize_phone(phone=self.phone)
+        self.canonical_telegram_username = normalize_telegram_username(
+            username=self.telegram_username
+        )
+
+    def validate_unique(self, exclude: Optional[Any] = None) -> None:
+        """Check uniqueness of the login identifiers in canonical form too."""
+        super().validate_unique(exclude=exclude)
+        errors: Dict[str, str] = {
+            field_name: DUPLICATED_IDENTIFIER_MESSAGE
+            for field_name in CustomUser.objects.get_duplicated_identifiers(
+                user=self
+            )
+            if not exclude or field_name not in exclude
+        }
+        if errors:
+            raise ValidationError(errors)
+
+    def save(self, *args: tuple[Any], **kwargs: dict[str, Any]) -> None:
+        """Keep canonical identifiers and update time in sync on every save."""
+        self.fill_canonical_fields()
+        update_fields: Optional[Any] = kwargs.get("update_fields")
+        if update_fields is not None:
+            # Validators of the responses depend on the update time, which
+            # auto_now writes only for the listed fields
+            kwargs["update_fields"] = {
+                *update_fields,
+                "datetime_updated",
+                *(
+                    self.CANONICAL_FIELDS
+                    if self.CANONICAL_SOURCE_FIELDS.intersection(
+                        update_fields
+                    ) else ()
+                ),
+            }
+        super().save(*args, **kwargs)
+        if self.is_photo_changed() and \
+                (update_fields is None or "photo" in update_fields):
+            self.__saved_photo_name = self.photo.name
+
     def deactivate(self, *args: tuple[Any], **kwargs: dict[str, Any]) -> None:
         """Deactivate user."""
         if self.is_active_account:
@@ -314,19 +489,47 @@ class CustomUser(
                 update_fields=['datetime_deleted']
             )
 
-    def save_remote_image(self, image_url: str) -> None:
+    def save_remote_image(self, image_url: str) -> bool:
         """Save remote image for photo if it's not provided."""
-        if not self.photo:
-            resp: Response = get(url=image_url)
-            img_temp = NamedTemporaryFile(delete=True)
-            img_temp.write(resp.content)
-            img_temp.flush()
-
+        if self.photo:
+            return False
+        try:
+            image: SpooledTemporaryFile = photo_downloader.download(
+                url=image_url
+            )
+        except PhotoDownloadError as e:
+            logger.warning("Photo of %s is not downloaded: %s", self.email, e)
+            return False
+        with image:
             self.photo.save(
                 name=f"{self.email}.jpg",
-                content=File(img_temp),
-                save=True
+                content=File(image),
+                save=False
             )
+        self.save(update_fields=["photo"])
+        return True
+
+    def sync_districts(
+        self,
+        district_ids: Iterable[int]
+    ) -> Tuple[Set[int], Set[int]]:
+        """Set districts of the user changing only the difference."""
+        return sync_m2m_ids(
+            instance=self,
+            field_name="districts",
+            related_ids=district_ids
+        )
+
+    def sync_hobby_categories(
+        self,
+        hobby_ids: Iterable[int]
+    ) -> Tuple[Set[int], Set[int]]:
+        """Set hobby categories of the user changing only the difference."""
+        return sync_m2m_ids(
+            instance=self,
+            field_name="hobby_categories",
+            related_ids=hobby_ids
+        )
 
     def confirm_account(self) -> None:
         """Confirm user's account as a real person."""
@@ -335,3 +538,34 @@ class CustomUser(
             self.save(
                 update_fields=['is_confirmed_account']
             )
+
+
+class CustomUserRecommendation(AbstractDateTime):
+    """Precomputed list of recommended roommates of the user."""
+
+    user: CustomUser = OneToOneField(
+        to=CustomUser,
+        on_delete=CASCADE,
+        related_name="recommendation",
+        verbose_name="Пользователь"
+    )
+    candidate_ids: JSONField = JSONField(
+        default=list,
+        verbose_name="Рекомендованные пользователи"
+    )
+    scores: JSONField = JSONField(
+        default=list,
+        verbose_name="Оценки совместимости"
+    )
+
+    class Meta:
+        """Customization of the Model (table)."""
+
+        ordering: tuple[str] = (
+            "-datetime_updated",
+        )
+        verbose_name: str = "Рекомендация"
+        verbose_name_plural: str = "Рекомендации"
+
+    def __str__(self) -> str:
+        return f"Рекомендации для {self.user_id}"
@@ -0,0 +1,109 @@
+# Python
+from tempfile import SpooledTemporaryFile
+from threading import Lock
+from time import monotonic
+from typing import Optional
+
+# Third party
+from requests import (
+    Response,
+    Session,
+)
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+from urllib3.exceptions import HTTPError
+
+# Django
+from django.conf import settings
+
+
+class PhotoDownloadError(Exception):
+    """Raised when remote photo can't be downloaded within the limits."""
+
+
+class RemotePhotoDownloader:
+    """Streaming downloader of remote photos over the pooled session."""
+
+    CHUNK_SIZE = 64 * 1024
+    MEMORY_SIZE = 1024 * 1024
+    MAX_REDIRECTS = 3
+
+    def __init__(self, session: Optional[Session] = None) -> None:
+        self.__lock: Lock = Lock()
+        self.__session: Optional[Session] = session
+
+    @property
+    def session(self) -> Session:
+        """Get HTTP session keeping connections to the image hosts."""
+        with self.__lock:
+            if self.__session is None:
+                adapter: HTTPAdapter = HTTPAdapter(
+                    pool_maxsize=settings.AUTHS_PHOTO_WORKERS
+                )
+                self.__session = Session()
+                self.__session.max_redirects = self.MAX_REDIRECTS
+                self.__session.mount("http://", adapter)
+                self.__session.mount("https://", adapter)
+            return self.__session
+
+    def __check_headers(self, response: Response) -> None:
+        """Reject the response before its body is read if it's not fit."""
+        content_type: str = response.headers.get("Content-Type", "")
+        if not content_type.startswith("image/"):
+            raise PhotoDownloadError(f"Неверный тип файла: {content_type}")
+        try:
+            content_length: int = int(
+                response.headers.get("Content-Length", 0)
+            )
+        except ValueError:
+            content_length = 0
+        if content_length > settings.AUTHS_PHOTO_MAX_SIZE:
+            raise PhotoDownloadError("Фото слишком большое")
+
+    def download(self, url: str) -> SpooledTemporaryFile:
+        """Download the photo into the temporary file chunk by chunk."""
+        deadline: float = monotonic() + settings.AUTHS_PHOTO_DOWNLOAD_TIMEOUT
+        file: SpooledTemporaryFile = SpooledTemporaryFile(
+            max_size=self.MEMORY_SIZE
+        )
+        try:
+            response: Response
+            with self.session.get(
+                url=url,
+                stream=True,
+                timeout=(
+                    settings.AUTHS_PHOTO_CONNECT_TIMEOUT,
+                    settings.AUTHS_PHOTO_DOWNLOAD_TIMEOUT
+                )
+            ) as response:
+                response.raise_for_status()
+                self.__check_headers(response=response)
+                size: int = 0
+                while True:
+                    # Single read returns the bytes which have already come,
+                    # so a host sending them one by one can't pass deadline
+                    chunk: bytes = response.raw.read1(
+                        self.CHUNK_SIZE,
+                        decode_content=True
+                    )
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > settings.AUTHS_PHOTO_MAX_SIZE:
+                        raise PhotoDownloadError("Фото слишком большое")
+                    if monotonic() > deadline:
+                        raise PhotoDownloadError(
+                            "Фото загружается слишком долго"
+                        )
+                    file.write(chunk)
+        except (RequestException, HTTPError) as error:
+            file.close()
+            raise PhotoDownloadError(str(error))
+        except PhotoDownloadError:
+            file.close()
+            raise
+        file.seek(0)
+        return file
+
+
+photo_downloader: RemotePhotoDownloader = RemotePhotoDownloader()
@@ -0,0 +1,374 @@
+# Python
+from datetime import timedelta
+from typing import (
+    Optional,
+    Iterable,
+    Tuple,
+    List,
+    Dict,
+)
+
+# Django
+from django.conf import settings
+from django.db.models import (
+    QuerySet,
+    IntegerField,
+    Value,
+    Case,
+    When,
+    Q,
+)
+from django.utils import timezone
+
+# Project
+from auths.models import (
+    CustomUser,
+    CustomUserRecommendation,
+)
+from auths.matching import (
+    get_districts_exists,
+    get_matched_queryset,
+    filter_by_budjet,
+)
+from auths.scoring import CompatibilityScorer
+from locations.models import District
+
+
+OWNERS_CHUNK_SIZE = 1000
+
+
+def get_candidates_queryset(user: CustomUser) -> QuerySet[CustomUser]:
+    """Get live queryset of the candidates ordered by compatibility."""
+    district_ids: Tuple[int] = tuple(
+        user.districts.values_list("id", flat=True)
+    ) or tuple(District.objects.values_list("id", flat=True))
+    return CompatibilityScorer().order_queryset(
+        queryset=filter_by_budjet(
+            queryset=get_matched_queryset(
+                district_ids=district_ids,
+                excluded_user_id=user.id
+            ).filter(
+                datetime_deleted__isnull=True
+            ),
+            final_budjet=user.month_budjet
+        ),
+        user=user
+    )
+
+
+def compute_recommendation(
+    user: CustomUser,
+    top_k: Optional[int] = None
+) -> Tuple[List[int], List[float]]:
+    """Get ids and scores of the top candidates for the user."""
+    rows: List[Tuple[int, float]] = list(
+        get_candidates_queryset(user=user).values_list(
+            "id",
+            CompatibilityScorer.SCORE_FIELD
+        )[:top_k or settings.AUTHS_RECOMMENDATIONS_TOP_K]
+    )
+    return (
+        [candidate_id for candidate_id, _ in rows],
+        [score for _, score in rows],
+    )
+
+
+def save_recommendations(
+    rows: Iterable[Tuple[int, List[int], List[float]]]
+) -> int:
+    """Create or replace recommendations of the users in bulk."""
+    recommendations: List[CustomUserRecommendation] = [
+        CustomUserRecommendation(
+            user_id=user_id,
+            candidate_ids=candidate_ids,
+            scores=scores
+        )
+        for user_id, candidate_ids, scores in rows
+    ]
+    CustomUserRecommendation.objects.bulk_create(
+        recommendations,
+        update_conflicts=True,
+        unique_fields=("user_id",),
+        update_fields=("candidate_ids", "scores", "datetime_updated",)
+    )
+    return len(recommendations)
+
+
+def get_users_by_ids(user_ids: List[int]) -> QuerySet[CustomUser]:
+    """Get active users keeping the order of provided ids."""
+    if not user_ids:
+        return CustomUser.objects.none()
+    # Stored lists may still have the users deleted after they were built
+    return CustomUser.objects.get_not_deleted().filter(
+        id__in=user_ids,
+        is_active_account=True
+    ).order_by(
+        Case(
+            *[
+                When(id=user_id, then=Value(position))
+                for position, user_id in enumerate(user_ids)
+            ],
+            output_field=IntegerField()
+        )
+    )
+
+
+def get_recommended_queryset(user: CustomUser) -> QuerySet[CustomUser]:
+    """Get precomputed recommendations or compute them if stale."""
+    candidate_ids: Optional[List[int]] = \
+        CustomUserRecommendation.objects.filter(
+            user_id=user.id,
+            datetime_updated__gte=timezone.now() - timedelta(
+                seconds=settings.AUTHS_RECOMMENDATIONS_TIMEOUT
+            )
+        ).values_list("candidate_ids", flat=True).first()
+    if candidate_ids is None:
+        scores: List[float]
+        candidate_ids, scores = compute_recommendation(user=user)
+        save_recommendations(rows=((user.id, candidate_ids, scores),))
+    return get_users_by_ids(user_ids=candidate_ids)
+
+
+def refresh_own_recommendation(user: CustomUser) -> None:
+    """Recompute stored recommendations of the user if there are any."""
+    if not CustomUserRecommendation.objects.filter(user_id=user.id).exists():
+        return
+    candidate_ids: List[int]
+    scores: List[float]
+    candidate_ids, scores = compute_recommendation(user=user)
+    save_recommendations(rows=((user.id, candidate_ids, scores),))
+
+
+def get_owners_queryset(
+    candidate_id: int,
+    district_ids: Iterable[int] = ()
+) -> QuerySet[CustomUser]:
+    """Get owners of the lists the candidate may be listed for."""
+    # Lists may contain the candidate only if the owner shares its current
+    # or just removed districts or the owner has no districts at all
+    return CustomUser.objects.filter(
+        get_districts_exists(
+            district_ids={
+                *CustomUser.districts.through.objects.filter(
+                    customuser_id=candidate_id
+                ).values_list("district_id", flat=True),
+                *district_ids,
+            }
+        ) | ~get_districts_exists(district_ids=None),
+        recommendation__isnull=False
+    ).exclude(
+        id=candidate_id
+    )
+
+
+def mark_recommendations_stale(
+    candidate_id: int,
+    district_ids: Iterable[int] = ()
+) -> int:
+    """Make lists affected by the candidate recomputed on the next read."""
+    owner_ids: QuerySet = get_owners_queryset(
+        candidate_id=candidate_id,
+        district_ids=district_ids
+    ).values("id")
+    return CustomUserRecommendation.objects.filter(
+        Q(user_id__in=owner_ids) | Q(user_id=candidate_id)
+    ).update(
+        datetime_updated=timezone.now() - timedelta(
+            seconds=settings.AUTHS_RECOMMENDATIONS_TIMEOUT + 1
+        )
+    )
+
+
+def _patch_recommendation(
+    recommendation: CustomUserRecommendation,
+    candidate: CustomUser,
+    is_matched: bool,
+    score: float,
+    budjet: int,
+    listed_budjets: Dict[int, int]
+) -> Optional[bool]:
+    """Insert, rescore or remove the candidate keeping the list exact."""
+    # None is returned if the list can't be patched without recomputation
+    top_k: int = settings.AUTHS_RECOMMENDATIONS_TOP_K
+    rows: List[Tuple[int, float]] = [
+        (candidate_id, candidate_score)
+        for candidate_id, candidate_score in zip(
+            recommendation.candidate_ids,
+            recommendation.scores
+        )
+        if candidate_id != candidate.id
+    ]
+    is_listed: bool = len(rows) != len(recommendation.candidate_ids)
+    is_full: bool = len(recommendation.candidate_ids) >= top_k
+    is_widened: bool
+    if rows and rows[0][0] in listed_budjets:
+        # Listed candidates either all fit the budjet or none of them does
+        is_widened = listed_budjets[rows[0][0]] > budjet
+    elif rows or is_listed:
+        return None
+    else:
+        # Nobody fits even the wider budjet, the strict one is empty too
+        is_widened = True
+
+    is_fitting: bool = False
+    if is_matched and candidate.month_budjet <= budjet:
+        if is_widened:
+            # The only strict match replaces the candidates of wider budjet
+            rows = []
+        is_fitting = True
+    elif is_matched and is_widened:
+        is_fitting = candidate.month_budjet <= int(budjet*1.2)
+
+    if not is_fitting:
+        if not is_listed:
+            return False
+        # Full list misses the next candidate and an empty one may
+        # have to switch to the wider budjet
+        if is_full or not rows:
+            return None
+    else:
+        rows.append((candidate.id, score))
+        rows.sort(key=lambda row: (-row[1], -row[0]))
+        # Unlisted candidates may outrank the lowered one of the last place
+        if (
+            is_listed and is_full and
+            rows[-1][0] == candidate.id and
+            score < recommendation.scores[
+                recommendation.candidate_ids.index(candidate.id)
+            ]
+        ):
+            return None
+        rows = rows[:top_k]
+
+    candidate_ids: List[int] = [candidate_id for candidate_id, _ in rows]
+    scores: List[float] = [candidate_score for _, candidate_score in rows]
+    if (
+        candidate_ids == recommendation.candidate_ids and
+        scores == recommendation.scores
+    ):
+        return False
+    recommendation.candidate_ids = candidate_ids
+    recommendation.scores = scores
+    return True
+
+
+def _patch_owners_chunk(
+    candidate: CustomUser,
+    is_candidate: bool,
+    owner_rows: List[Tuple[int, int, bool, bool, float]]
+) -> int:
+    """Patch lists of the chunk of owners with the changed candidate."""
+    recommendations: Dict[int, CustomUserRecommendation] = \
+        CustomUserRecommendation.objects.in_bulk(
+            [owner_id for owner_id, *_ in owner_rows],
+            field_name="user_id"
+        )
+    # Budjet of the first other listed candidate tells the budjet variant
+    listed_budjets: Dict[int, int] = dict(
+        CustomUser.objects.filter(
+            id__in={
+                candidate_id
+                for recommendation in recommendations.values()
+                for candidate_id in recommendation.candidate_ids[:2]
+                if candidate_id != candidate.id
+            }
+        ).values_list("id", "month_budjet")
+    )
+    has_districts: bool = candidate.districts.exists()
+    patched: List[CustomUserRecommendation] = []
+    recomputed_ids: List[int] = []
+    owner_id: int
+    budjet: int
+    is_sharing: bool
+    is_owner_with_districts: bool
+    score: float
+    for (
+        owner_id, budjet, is_sharing, is_owner_with_districts, score
+    ) in owner_rows:
+        is_patched: Optional[bool] = _patch_recommendation(
+            recommendation=recommendations[owner_id],
+            candidate=candidate,
+            is_matched=is_candidate and (
+                is_sharing
+                if is_owner_with_districts
+                else has_districts
+            ),
+            score=score,
+            budjet=budjet,
+            listed_budjets=listed_budjets
+        )
+        if is_patched is None:
+            recomputed_ids.append(owner_id)
+        elif is_patched:
+            patched.append(recommendations[owner_id])
+    CustomUserRecommendation.objects.bulk_update(
+        patched,
+        fields=("candidate_ids", "scores",)
+    )
+    save_recommendations(
+        rows=[
+            (owner.id, *compute_recommendation(user=owner))
+            for owner in CustomUser.objects.filter(id__in=recomputed_ids)
+        ]
+    )
+    return len(patched) + len(recomputed_ids)
+
+
+def refresh_candidate_recommendations(
+    candidate: CustomUser,
+    district_ids: Iterable[int] = ()
+) -> int:
+    """Patch lists of the owners the changed user may be listed for."""
+    owners: QuerySet[CustomUser] = get_owners_queryset(
+        candidate_id=candidate.id,
+        district_ids=district_ids
+    ).annotate(
+        is_sharing_districts=get_districts_exists(
+            district_ids=candidate.districts.values("id")
+        ),
+        has_districts=get_districts_exists(district_ids=None),
+        **{
+            CompatibilityScorer.SCORE_FIELD:
+            CompatibilityScorer().get_owner_score_expression(
+                candidate=candidate
+            )
+        }
+    ).order_by("id").values_list(
+        "id",
+        "month_budjet",
+        "is_sharing_districts",
+        "has_districts",
+        CompatibilityScorer.SCORE_FIELD
+    )
+    # Same users as the matched queryset has: neither deleted nor inactive
+    is_candidate: bool = (
+        candidate.is_active_account and
+        candidate.datetime_deleted is None
+    )
+    owner_rows: List[Tuple[int, int, bool, bool, float]] = list(owners)
+    refreshed_cnt: int = 0
+    start: int
+    for start in range(0, len(owner_rows), OWNERS_CHUNK_SIZE):
+        refreshed_cnt += _patch_owners_chunk(
+            candidate=candidate,
+            is_candidate=is_candidate,
+            owner_rows=owner_rows[start:start + OWNERS_CHUNK_SIZE]
+        )
+    return refreshed_cnt
+
+
+def refresh_user_recommendations(
+    user_id: int,
+    district_ids: Iterable[int] = ()
+) -> None:
+    """Refresh recommendations affected by the changed user."""
+    user: Optional[CustomUser] = CustomUser.objects.filter(
+        id=user_id
+    ).first()
+    if not user:
+        return
+    refresh_own_recommendation(user=user)
+    refresh_candidate_recommendations(
+        candidate=user,
+        district_ids=district_ids
+    )
@@ -0,0 +1,143 @@
+# Python
+from typing import Any
+
+# Django
+from django.db.models import (
+    QuerySet,
+    Subquery,
+    OuterRef,
+    Count,
+    Value,
+    Case,
+    When,
+    F,
+    ExpressionWrapper,
+    FloatField,
+)
+from django.db.models.functions import (
+    Abs,
+    Cast,
+    Coalesce,
+    Greatest,
+)
+
+# Project
+from auths.models import CustomUser
+
+
+class CompatibilityScorer:
+    """Score candidates as roommates of the provided user."""
+
+    SCORE_FIELD = "compatibility_score"
+    DISTRICT_WEIGHT = 3.0
+    HOBBY_WEIGHT = 1.0
+    GENDER_WEIGHT = 2.0
+    BUDJET_WEIGHT = 4.0
+
+    def __get_shared_count(
+        self,
+        through: Any,
+        related_field: str,
+        user: CustomUser
+    ) -> Coalesce:
+        """Get number of related objects shared with the user."""
+        user_related_ids: QuerySet = through.objects.filter(
+            customuser_id=user.id
+        ).values(related_field)
+        return Coalesce(
+            Subquery(
+                through.objects.filter(
+                    customuser_id=OuterRef("pk"),
+                    **{f"{related_field}__in": user_related_ids}
+                ).order_by().values("customuser_id").annotate(
+                    shared=Count("id")
+                ).values("shared")
+            ),
+            0
+        )
+
+    def __get_weighted_sum(
+        self,
+        user: CustomUser,
+        budjet_distance: ExpressionWrapper
+    ) -> ExpressionWrapper:
+        """Get weighted sum of the criteria shared with the user."""
+        # Every row is scored by the database in the same statement,
+        # so there are no per-object Python loops over the rows
+        shared_districts: Coalesce = self.__get_shared_count(
+            through=CustomUser.districts.through,
+            related_field="district_id",
+            user=user
+        )
+        shared_hobbies: Coalesce = self.__get_shared_count(
+            through=CustomUser.hobby_categories.through,
+            related_field="subcategory_id",
+            user=user
+        )
+        same_gender: Case = Case(
+            When(gender=user.gender, then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField()
+        )
+        return ExpressionWrapper(
+            self.DISTRICT_WEIGHT * shared_districts +
+            self.HOBBY_WEIGHT * shared_hobbies +
+            self.GENDER_WEIGHT * same_gender -
+            self.BUDJET_WEIGHT * budjet_distance,
+            output_field=FloatField()
+        )
+
+    def get_score_expression(self, user: CustomUser) -> ExpressionWrapper:
+        """Get expression calculating compatibility score for the user."""
+        return self.__get_weighted_sum(
+            user=user,
+            budjet_distance=ExpressionWrapper(
+                Cast(
+                    Abs(F("month_budjet") - user.month_budjet),
+                    output_field=FloatField()
+                ) / max(user.month_budjet, 1),
+                output_field=FloatField()
+            )
+        )
+
+    def get_owner_score_expression(
+        self,
+        candidate: CustomUser
+    ) -> ExpressionWrapper:
+        """Get expression calculating score of the candidate for owners."""
+        # Same score as the owner gets for the candidate: the budjet
+        # distance is relative to the budjet of the owner
+        return self.__get_weighted_sum(
+            user=candidate,
+            budjet_distance=ExpressionWrapper(
+                Cast(
+                    Abs(Value(candidate.month_budjet) - F("month_budjet")),
+                    output_field=FloatField()
+                ) / Greatest(F("month_budjet"), 1),
+                output_field=FloatField()
+            )
+        )
+
+    def annotate_queryset(
+        self,
+        queryset: QuerySet[CustomUser],
+        user: CustomUser
+    ) -> QuerySet[CustomUser]:
+        """Annotate queryset with the compatibility score."""
+        return queryset.annotate(
+            **{self.SCORE_FIELD: self.get_score_expression(user=user)}
+        )
+
+    def order_queryset(
+        self,
+        queryset: QuerySet[CustomUser],
+        user: CustomUser
+    ) -> QuerySet[CustomUser]:
+        """Get queryset ordered from the most compatible candidates."""
+        return self.annotate_queryset(
+            queryset=queryset,
+            user=user
+        ).order_by(
+            f"-{self.SCORE_FIELD}",
+            "-id",
+        )
@@ -1,28 +1,66 @@
 # Python
 from typing import (
+    Optional,
+    Iterable,
     Tuple,
     Union,
+    List,
+    Dict,
+    Any,
 )
 
+# Django
+from django.core.files.storage import Storage
+
 # Rest Framework
 from rest_framework.serializers import (
+    ImageField,
+    BaseSerializer,
+    ListSerializer,
     ModelSerializer,
     SerializerMethodField,
     DateTimeField,
+    ValidationError,
 )
 
 # Project
-from auths.models import CustomUser
+from auths.models import (
+    DUPLICATED_IDENTIFIER_MESSAGE,
+    CustomUser,
+)
+from auths.images import get_photo_url
+from locations.models import District
 from abstracts.serializers import AbstractDateTimeSerializer
 from locations.serializers import DistrictForeignModelSerializer
 
 
+class PhotoVariantField(ImageField):
+    """ImageField representing the variant requested by the context."""
+
+    def to_representation(self, value: Any) -> Optional[str]:
+        """Get absolute url of the requested photo variant."""
+        if not value:
+            return None
+        url: str = get_photo_url(
+            storage=value.storage,
+            name=value.name,
+            variant=self.context.get("photo_variant"),
+            variants_photo_name=value.instance.variants_photo_name
+        )
+        request: Optional[Any] = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+
 class CustomUserBaseSerializer(AbstractDateTimeSerializer, ModelSerializer):
     """CustomUserBaseSerializer."""
 
     datetime_created: DateTimeField = \
         AbstractDateTimeSerializer.datetime_created
     is_deleted: SerializerMethodField = AbstractDateTimeSerializer.is_deleted
+    photo: PhotoVariantField = PhotoVariantField(
+        required=False,
+        allow_null=True
+    )
 
     class Meta:
         """Customization of the serializer."""
@@ -30,6 +68,30 @@ class CustomUserBaseSerializer(AbstractDateTimeSerializer, ModelSerializer):
         model: CustomUser = CustomUser
         fields: Union[Tuple[str], str] = "__all__"
 
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        """Refuse login identifiers taken by the others in any form."""
+        attrs = super().validate(attrs)
+        if not CustomUser.CANONICAL_SOURCE_FIELDS.intersection(attrs):
+            return attrs
+        user: CustomUser = CustomUser(
+            pk=self.instance.pk if self.instance else None,
+            **{
+                field_name: attrs.get(
+                    field_name,
+                    getattr(self.instance, field_name, None)
+                )
+                for field_name in CustomUser.CANONICAL_SOURCE_FIELDS
+            }
+        )
+        duplicated_fields: List[str] = \
+            CustomUser.objects.get_duplicated_identifiers(user=user)
+        if duplicated_fields:
+            raise ValidationError({
+                field_name: DUPLICATED_IDENTIFIER_MESSAGE
+                for field_name in duplicated_fields
+            })
+        return attrs
+
 
 class CustomUserListSerializer(CustomUserBaseSerializer):
     """Serializer for listing the custom users."""
@@ -63,6 +125,177 @@ class CustomUserListSerializer(CustomUserBaseSerializer):
         )
 
 
+class CustomUserValuesListSerializer(ListSerializer):
+    """List serializer grouping districts of the whole page at once."""
+
+    def to_representation(
+        self,
+        data: Iterable[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Get representation of the rows with a couple of queries."""
+        rows: List[Dict[str, Any]] = list(data)
+        self.child.load_districts(user_ids=[row["id"] for row in rows])
+        return [self.child.to_representation(row) for row in rows]
+
+
+class CustomUserValuesSerializer(BaseSerializer):
+    """Read-only CustomUserListSerializer working with values() rows."""
+
+    VALUE_FIELDS = (
+        "id",
+        "email",
+        "phone",
+        "first_name",
+        "telegram_username",
+        "telegram_user_id",
+        "gender",
+        "is_active_account",
+        "month_budjet",
+        "comment",
+        "photo",
+        "variants_photo_name",
+        "is_confirmed_account",
+        "is_superuser",
+        "last_login",
+        "datetime_deleted",
+        "datetime_created",
+    )
+    DISTRICT_VALUE_FIELDS = (
+        "id",
+        "name",
+        "datetime_created",
+        "datetime_deleted",
+        "city_id",
+        "city__name",
+        "city__datetime_created",
+        "city__datetime_deleted",
+    )
+
+    class Meta:
+        """Customization of the serializer."""
+
+        list_serializer_class: ListSerializer = CustomUserValuesListSerializer
+
+    def __init__(self, *args: Tuple[Any], **kwargs: Dict[str, Any]) -> None:
+        super().__init__(*args, **kwargs)
+        self.__created_field: DateTimeField = DateTimeField(
+            format="%Y-%m-%d %H:%M"
+        )
+        self.__last_login_field: DateTimeField = DateTimeField()
+        self.__photo_storage: Storage = \
+            CustomUser._meta.get_field("photo").storage
+        self.__districts: Dict[int, List[Dict[str, Any]]] = {}
+
+    def load_districts(self, user_ids: Iterable[int]) -> None:
+        """Load represented districts of the users grouped by user."""
+        user_ids = tuple(user_ids)
+        through: type = CustomUser.districts.through
+        user_district_ids: Dict[int, List[int]] = {}
+        user_id: int
+        district_id: int
+        for user_id, district_id in through.objects.filter(
+            customuser_id__in=user_ids
+        ).values_list("customuser_id", "district_id"):
+            user_district_ids.setdefault(user_id, []).append(district_id)
+        # Districts come in their default ordering like the prefetched ones
+        districts: Dict[int, Dict[str, Any]] = {
+            district["id"]: self.__get_district_representation(
+                district=district
+            )
+            for district in District.objects.filter(
+                id__in={
+                    district_id
+                    for district_ids in user_district_ids.values()
+                    for district_id in district_ids
+                }
+            ).values(*self.DISTRICT_VALUE_FIELDS)
+        }
+        positions: Dict[int, int] = {
+            district_id: position
+            for position, district_id in enumerate(districts)
+        }
+        self.__districts = {
+            user_id: [
+                districts[district_id]
+                for district_id in sorted(
+                    user_district_ids.get(user_id, ()),
+                    key=positions.__getitem__
+                )
+            ]
+            for user_id in user_ids
+        }
+
+    def __get_district_representation(
+        self,
+        district: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Get the same representation as DistrictForeignModelSerializer."""
+        return {
+            "id": district["id"],
+            "name": district["name"],
+            "city": {
+                "id": district["city_id"],
+                "name": district["city__name"],
+                "datetime_created": self.__created_field.to_representation(
+                    district["city__datetime_created"]
+                ),
+                "is_deleted": bool(district["city__datetime_deleted"]),
+            },
+            "is_deleted": bool(district["datetime_deleted"]),
+            "datetime_created": self.__created_field.to_representation(
+                district["datetime_created"]
+            ),
+        }
+
+    def __get_photo_url(
+        self,
+        name: Optional[str],
+        variants_photo_name: Optional[str]
+    ) -> Optional[str]:
+        """Get absolute url of the photo like the ImageField does."""
+        if not name:
+            return None
+        url: str = get_photo_url(
+            storage=self.__photo_storage,
+            name=name,
+            variant=self.context.get("photo_variant"),
+            variants_photo_name=variants_photo_name
+        )
+        request: Optional[Any] = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+    def to_representation(self, instance: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the same representation as CustomUserListSerializer."""
+        if instance["id"] not in self.__districts:
+            self.load_districts(user_ids=(instance["id"],))
+        return {
+            "id": instance["id"],
+            "email": instance["email"],
+            "phone": instance["phone"],
+            "first_name": instance["first_name"],
+            "telegram_username": instance["telegram_username"],
+            "telegram_user_id": instance["telegram_user_id"],
+            "gender": instance["gender"],
+            "is_active_account": instance["is_active_account"],
+            "month_budjet": instance["month_budjet"],
+            "comment": instance["comment"],
+            "photo": self.__get_photo_url(
+                name=instance["photo"],
+                variants_photo_name=instance["variants_photo_name"]
+            ),
+            "is_confirmed_account": instance["is_confirmed_account"],
+            "districts": self.__districts[instance["id"]],
+            "is_superuser": instance["is_superuser"],
+            "last_login": self.__last_login_field.to_representation(
+                instance["last_login"]
+            ) if instance["last_login"] else None,
+            "is_deleted": bool(instance["datetime_deleted"]),
+            "datetime_created": self.__created_field.to_representation(
+                instance["datetime_created"]
+            ),
+        }
+
+
 class CustomUserDetailSerializer(CustomUserBaseSerializer):
     """CustomUserDetailSerializer."""
 
@@ -0,0 +1,310 @@
+# Python
+from datetime import datetime
+from typing import (
+    Callable,
+    Optional,
+    Iterable,
+    Set,
+    Dict,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.db.models import Model
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+# Project
+from auths.models import CustomUser
+from auths.stats import update_budget_ceiling
+from auths.indexes import user_bitmap_index
+from auths.tasks import (
+    schedule_photo_variants,
+    schedule_recommendations_refresh,
+    schedule_hobby_index_refresh,
+)
+
+
+RECOMMENDATION_FIELDS = frozenset((
+    "month_budjet",
+    "gender",
+    "is_active_account",
+    "datetime_deleted",
+))
+HOBBY_INDEX_FIELDS = frozenset((
+    "is_active_account",
+    "datetime_deleted",
+))
+
+
+@receiver(post_save, sender=CustomUser)
+def update_budget_ceiling_on_save(
+    sender: CustomUser,
+    instance: CustomUser,
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Keep cached budget ceiling up to date after user is saved."""
+    update_budget_ceiling(user=instance)
+
+
+@receiver(post_delete, sender=CustomUser)
+def update_budget_ceiling_on_delete(
+    sender: CustomUser,
+    instance: CustomUser,
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Keep cached budget ceiling up to date after user is deleted."""
+    update_budget_ceiling(user=instance, is_removed=True)
+
+
+@receiver(post_save, sender=CustomUser)
+def update_user_index_on_save(
+    sender: CustomUser,
+    instance: CustomUser,
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Keep user bitmap index up to date after user is saved."""
+    user_bitmap_index.update_user(user=instance)
+
+
+@receiver(post_delete, sender=CustomUser)
+def update_user_index_on_delete(
+    sender: CustomUser,
+    instance: CustomUser,
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Keep user bitmap index up to date after user is deleted."""
+    user_bitmap_index.remove_user(user_id=instance.id)
+
+
+def _update_user_index_relations(
+    instance: Model,
+    action: str,
+    reverse: bool,
+    pk_set: Optional[Set[int]],
+    update_relations: Callable,
+    get_related_ids: Callable
+) -> None:
+    """Apply changed m2m relations of the users to the bitmap index."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if action == "post_clear":
+        if reverse:
+            user_bitmap_index.invalidate()
+            return
+        pk_set = set(get_related_ids())
+    user_ids: Set[int] = pk_set if reverse else {instance.pk}
+    related_ids: Set[int] = {instance.pk} if reverse else pk_set
+    update_relations(
+        user_ids,
+        related_ids,
+        is_added=action == "post_add"
+    )
+
+
+@receiver(m2m_changed, sender=CustomUser.districts.through)
+def update_user_index_on_districts_change(
+    sender: Model,
+    instance: Model,
+    action: str,
+    reverse: bool,
+    pk_set: Optional[Set[int]],
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Keep user bitmap index up to date after districts are changed."""
+    _update_user_index_relations(
+        instance=instance,
+        action=action,
+        reverse=reverse,
+        pk_set=pk_set,
+        update_relations=user_bitmap_index.update_districts,
+        get_related_ids=user_bitmap_index.get_district_ids
+    )
+
+
+@receiver(m2m_changed, sender=CustomUser.hobby_categories.through)
+def update_user_index_on_hobbies_change(
+    sender: Model,
+    instance: Model,
+    action: str,
+    reverse: bool,
+    pk_set: Optional[Set[int]],
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Keep user bitmap index up to date after hobbies are changed."""
+    _update_user_index_relations(
+        instance=instance,
+        action=action,
+        reverse=reverse,
+        pk_set=pk_set,
+        update_relations=user_bitmap_index.update_hobbies,
+        get_related_ids=user_bitmap_index.get_hobby_ids
+    )
+
+
+@receiver(m2m_changed, sender=CustomUser.districts.through)
+def touch_users_on_districts_change(
+    sender: Model,
+    instance: Model,
+    action: str,
+    reverse: bool,
+    pk_set: Optional[Set[int]],
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Bump datetime_updated of the users whose districts are changed."""
+    if action == "pre_clear" and reverse:
+        # Users of the district are not known after the clear is done
+        instance._cleared_user_ids = set(
+            instance.users.values_list("id", flat=True)
+        )
+        return
+    if action not in ("post_add", "post_remove", "post_clear") or \
+            (action != "post_clear" and not pk_set):
+        return
+    user_ids: Iterable[int] = {instance.pk}
+    if reverse:
+        user_ids = pk_set if action != "post_clear" \
+            else getattr(instance, "_cleared_user_ids", ())
+    datetime_updated: datetime = timezone.now()
+    CustomUser.objects.filter(id__in=user_ids).update(
+        datetime_updated=datetime_updated
+    )
+    if not reverse:
+        instance.datetime_updated = datetime_updated
+
+
+@receiver(post_save, sender=CustomUser)
+def refresh_recommendations_on_save(
+    sender: CustomUser,
+    instance: CustomUser,
+    update_fields: Optional[frozenset] = None,
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Refresh recommendations after matching fields of user are saved."""
+    if update_fields is not None and \
+            not RECOMMENDATION_FIELDS.intersection(update_fields):
+        return
+    schedule_recommendations_refresh(user_id=instance.id)
+
+
+@receiver(m2m_changed, sender=CustomUser.districts.through)
+def refresh_recommendations_on_districts_change(
+    sender: Model,
+    instance: Model,
+    action: str,
+    reverse: bool,
+    pk_set: Optional[Set[int]],
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Refresh recommendations after districts of user are changed."""
+    if not settings.AUTHS_RECOMMENDATIONS_INCREMENTAL:
+        return
+    if action == "pre_clear" and not reverse:
+        # Removed districts are not known after the clear is done
+        instance._cleared_district_ids = set(
+            instance.districts.values_list("id", flat=True)
+        )
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        schedule_recommendations_refresh(
+            user_id=instance.pk,
+            district_ids=pk_set or getattr(
+                instance,
+                "_cleared_district_ids",
+                ()
+            )
+        )
+        return
+    user_id: int
+    for user_id in pk_set or ():
+        schedule_recommendations_refresh(
+            user_id=user_id,
+            district_ids=(instance.pk,)
+        )
+
+
+@receiver(m2m_changed, sender=CustomUser.hobby_categories.through)
+def refresh_recommendations_on_hobbies_change(
+    sender: Model,
+    instance: Model,
+    action: str,
+    reverse: bool,
+    pk_set: Optional[Set[int]],
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Refresh recommendations after hobbies of user are changed."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    user_id: int
+    for user_id in (pk_set or ()) if reverse else (instance.pk,):
+        schedule_recommendations_refresh(user_id=user_id)
+
+
+@receiver(post_save, sender=CustomUser)
+def update_hobby_index_on_save(
+    sender: CustomUser,
+    instance: CustomUser,
+    update_fields: Optional[frozenset] = None,
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Keep hobby similarity index up to date after user is saved."""
+    if update_fields is not None and \
+            not HOBBY_INDEX_FIELDS.intersection(update_fields):
+        return
+    schedule_hobby_index_refresh(user_ids=(instance.id,))
+
+
+@receiver(post_delete, sender=CustomUser)
+def update_hobby_index_on_delete(
+    sender: CustomUser,
+    instance: CustomUser,
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Keep hobby similarity index up to date after user is deleted."""
+    schedule_hobby_index_refresh(user_ids=(instance.id,))
+
+
+@receiver(m2m_changed, sender=CustomUser.hobby_categories.through)
+def update_hobby_index_on_hobbies_change(
+    sender: Model,
+    instance: Model,
+    action: str,
+    reverse: bool,
+    pk_set: Optional[Set[int]],
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Keep hobby similarity index up to date after hobbies are changed."""
+    if action == "pre_clear" and reverse:
+        # Owners of the cleared hobby are known only before the clear
+        schedule_hobby_index_refresh(
+            user_ids=sender.objects.filter(
+                subcategory_id=instance.pk
+            ).values_list("customuser_id", flat=True)
+        )
+    elif action in ("post_add", "post_remove", "post_clear"):
+        schedule_hobby_index_refresh(
+            user_ids=(pk_set or ()) if reverse else (instance.pk,)
+        )
+
+
+@receiver(post_save, sender=CustomUser)
+def create_photo_variants_on_save(
+    sender: CustomUser,
+    instance: CustomUser,
+    update_fields: Optional[frozenset] = None,
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Generate variants of the uploaded or downloaded photo."""
+    # Unchanged photo already has its variants, so the storage isn't touched
+    if not instance.photo or not instance.is_photo_changed() or \
+            (update_fields is not None and "photo" not in update_fields):
+        return
+    schedule_photo_variants(user_id=instance.id)
@@ -0,0 +1,491 @@
+# Python
+import os
+import json
+import fcntl
+import logging
+from array import array
+from contextlib import contextmanager
+from random import Random
+from threading import RLock
+from time import time_ns
+from typing import (
+    Optional,
+    Iterable,
+    Iterator,
+    FrozenSet,
+    Tuple,
+    List,
+    Dict,
+    Set,
+    BinaryIO,
+)
+
+# Django
+from django.conf import settings
+from django.db.models import QuerySet
+
+# Project
+from abstracts.cache import CacheVersion
+from auths.models import CustomUser
+
+
+HOBBY_INDEX_VERSION_KEY = "auths:hobby_index_version"
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+def get_jaccard_similarity(
+    first: FrozenSet[int],
+    second: FrozenSet[int]
+) -> float:
+    """Get exact Jaccard similarity of two sets."""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+class HobbyLSHIndex:
+    """MinHash signatures of users' hobbies with LSH buckets over them.
+
+    The snapshot file with the log of changes next to it is the copy
+    shared by the processes. Committed changes are appended to the log
+    under the file lock and the shared version is bumped, so the other
+    processes apply the new records before their next query. The log
+    longer than the snapshot is compacted into a new one.
+    """
+
+    FILE_VERSION = 2
+    LOG_HEADER_SIZE = 8
+    PERMUTATIONS_NUMBER = 64
+    # 16 bands of 4 rows keep pairs above Jaccard (1/16)^(1/4) = 0.5:
+    # pairs at 0.2 collide with probability 0.03 and pairs at 0.75 with 0.99
+    BANDS_NUMBER = 16
+    PRIME = (1 << 61) - 1
+
+    def __init__(self, seed: int = 42) -> None:
+        self.__lock: RLock = RLock()
+        self.__rows_number: int = \
+            self.PERMUTATIONS_NUMBER // self.BANDS_NUMBER
+        random: Random = Random(seed)
+        self.__seed: int = seed
+        self.__permutations: List[Tuple[int, int]] = [
+            (random.randrange(1, self.PRIME), random.randrange(0, self.PRIME))
+            for _ in range(self.PERMUTATIONS_NUMBER)
+        ]
+        self.__hobbies: Dict[int, FrozenSet[int]] = {}
+        self.__signatures: Dict[int, Tuple[int]] = {}
+        self.__buckets: Dict[Tuple[int, Tuple[int]], Set[int]] = {}
+        self.__shared_version: CacheVersion = CacheVersion(
+            key=HOBBY_INDEX_VERSION_KEY
+        )
+        self.__version: Optional[int] = None
+        # Snapshot and its log of changes share the generation
+        self.__generation: Optional[int] = None
+        self.__log_offset: int = self.LOG_HEADER_SIZE
+        self.is_loaded: bool = False
+
+    def __len__(self) -> int:
+        return len(self.__signatures)
+
+    def get_signature(self, hobby_ids: Iterable[int]) -> Tuple[int]:
+        """Get MinHash signature of the hobby set."""
+        hobby_ids = tuple(hobby_ids)
+        return tuple(
+            min((a * hobby_id + b) % self.PRIME for hobby_id in hobby_ids)
+            for a, b in self.__permutations
+        )
+
+    def __get_bands(
+        self,
+        signature: Tuple[int]
+    ) -> List[Tuple[int, Tuple[int]]]:
+        """Get LSH bucket keys of the signature."""
+        return [
+            (band, signature[start:start + self.__rows_number])
+            for band, start in enumerate(
+                range(0, self.PERMUTATIONS_NUMBER, self.__rows_number)
+            )
+        ]
+
+    def __add_signature(
+        self,
+        user_id: int,
+        hobby_ids: FrozenSet[int],
+        signature: Tuple[int]
+    ) -> None:
+        """Put already calculated signature of the user into the buckets."""
+        self.__hobbies[user_id] = hobby_ids
+        self.__signatures[user_id] = signature
+        bucket: Tuple[int, Tuple[int]]
+        for bucket in self.__get_bands(signature=signature):
+            self.__buckets.setdefault(bucket, set()).add(user_id)
+
+    def remove_user(self, user_id: int) -> None:
+        """Remove the user from the index."""
+        with self.__lock:
+            signature: Optional[Tuple[int]] = self.__signatures.pop(
+                user_id,
+                None
+            )
+            self.__hobbies.pop(user_id, None)
+            if signature is None:
+                return
+            bucket: Tuple[int, Tuple[int]]
+            for bucket in self.__get_bands(signature=signature):
+                users: Set[int] = self.__buckets.get(bucket, set())
+                users.discard(user_id)
+                if not users:
+                    self.__buckets.pop(bucket, None)
+
+    def update_user(self, user_id: int, hobby_ids: Iterable[int]) -> None:
+        """Put the user with the provided hobbies into the index."""
+        hobby_ids = frozenset(hobby_ids)
+        with self.__lock:
+            self.remove_user(user_id=user_id)
+            if hobby_ids:
+                self.__add_signature(
+                    user_id=user_id,
+                    hobby_ids=hobby_ids,
+                    signature=self.get_signature(hobby_ids=hobby_ids)
+                )
+
+    def get_hobby_ids(self, user_id: int) -> FrozenSet[int]:
+        """Get indexed hobbies of the user."""
+        return self.__hobbies.get(user_id, frozenset())
+
+    def get_user_ids(self) -> List[int]:
+        """Get ids of all the users present in the index."""
+        with self.__lock:
+            return list(self.__hobbies)
+
+    def __get_grouped_ids(
+        self,
+        user_ids: Optional[Iterable[int]] = None
+    ) -> Dict[int, Set[int]]:
+        """Get hobbies of the active users grouped by the users."""
+        through: type = CustomUser.hobby_categories.through
+        rows: QuerySet = through.objects.filter(
+            customuser__is_active_account=True,
+            customuser__datetime_deleted__isnull=True
+        )
+        if user_ids is not None:
+            rows = rows.filter(customuser_id__in=user_ids)
+        grouped_ids: Dict[int, Set[int]] = {}
+        user_id: int
+        hobby_id: int
+        for user_id, hobby_id in rows.values_list(
+            "customuser_id",
+            "subcategory_id"
+        ).iterator():
+            grouped_ids.setdefault(user_id, set()).add(hobby_id)
+        return grouped_ids
+
+    def build(self) -> None:
+        """Build the index from hobbies of the active users."""
+        grouped_ids: Dict[int, Set[int]] = self.__get_grouped_ids()
+        with self.__lock:
+            self.__hobbies, self.__signatures, self.__buckets = {}, {}, {}
+            hobby_ids: Set[int]
+            for user_id, hobby_ids in grouped_ids.items():
+                self.update_user(user_id=user_id, hobby_ids=hobby_ids)
+            self.is_loaded = True
+
+    def get_candidate_ids(
+        self,
+        hobby_ids: Iterable[int],
+        excluded_user_id: Optional[int] = None
+    ) -> Set[int]:
+        """Get users sharing at least one LSH bucket with the hobby set."""
+        hobby_ids = frozenset(hobby_ids)
+        if not hobby_ids:
+            return set()
+        signature: Tuple[int] = self.get_signature(hobby_ids=hobby_ids)
+        candidate_ids: Set[int] = set()
+        with self.__lock:
+            bucket: Tuple[int, Tuple[int]]
+            for bucket in self.__get_bands(signature=signature):
+                candidate_ids |= self.__buckets.get(bucket, set())
+        candidate_ids.discard(excluded_user_id)
+        return candidate_ids
+
+    def query(
+        self,
+        hobby_ids: Iterable[int],
+        top_n: int = 10,
+        excluded_user_id: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """Get approximately most similar users with their similarity."""
+        hobby_ids = frozenset(hobby_ids)
+        with self.__lock:
+            candidate_ids: Set[int] = self.get_candidate_ids(
+                hobby_ids=hobby_ids,
+                excluded_user_id=excluded_user_id
+            )
+            # Candidates are few, so they are ranked by exact similarity
+            similarities: List[Tuple[int, float]] = [
+                (
+                    candidate_id,
+                    get_jaccard_similarity(
+                        hobby_ids,
+                        self.__hobbies[candidate_id]
+                    )
+                )
+                for candidate_id in candidate_ids
+            ]
+        similarities.sort(key=lambda pair: (-pair[1], -pair[0]))
+        return similarities[:top_n]
+
+    def query_exact(
+        self,
+        hobby_ids: Iterable[int],
+        top_n: int = 10,
+        excluded_user_id: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """Get most similar users by scanning all of them."""
+        hobby_ids = frozenset(hobby_ids)
+        with self.__lock:
+            similarities: List[Tuple[int, float]] = [
+                (user_id, get_jaccard_similarity(hobby_ids, user_hobby_ids))
+                for user_id, user_hobby_ids in self.__hobbies.items()
+                if user_id != excluded_user_id
+            ]
+        similarities.sort(key=lambda pair: (-pair[1], -pair[0]))
+        return [pair for pair in similarities[:top_n] if pair[1] > 0]
+
+    def dump(self, file: BinaryIO) -> None:
+        """Write the index into the binary file."""
+        with self.__lock:
+            user_ids: array = array("q", self.__signatures)
+            signatures: array = array("Q")
+            hobby_sizes: array = array("q")
+            hobby_ids: array = array("q")
+            user_id: int
+            for user_id in user_ids:
+                signatures.extend(self.__signatures[user_id])
+                hobby_sizes.append(len(self.__hobbies[user_id]))
+                hobby_ids.extend(sorted(self.__hobbies[user_id]))
+            generation: Optional[int] = self.__generation
+        header: bytes = json.dumps({
+            "version": self.FILE_VERSION,
+            "seed": self.__seed,
+            "permutations": self.PERMUTATIONS_NUMBER,
+            "bands": self.BANDS_NUMBER,
+            "generation": generation,
+            "users": len(user_ids),
+            "hobbies": len(hobby_ids),
+        }).encode()
+        file.write(len(header).to_bytes(4, byteorder="little"))
+        file.write(header)
+        data: array
+        for data in (user_ids, signatures, hobby_sizes, hobby_ids):
+            data.tofile(file)
+
+    def __read_header(self, file: BinaryIO) -> Optional[Dict[str, int]]:
+        """Read the header of the binary file if it's compatible."""
+        header_size: int = int.from_bytes(file.read(4), byteorder="little")
+        header: Dict[str, int] = json.loads(file.read(header_size))
+        if (
+            header.get("version"),
+            header.get("seed"),
+            header.get("permutations"),
+            header.get("bands"),
+        ) != (
+            self.FILE_VERSION,
+            self.__seed,
+            self.PERMUTATIONS_NUMBER,
+            self.BANDS_NUMBER,
+        ):
+            return None
+        return header
+
+    def load(self, file: BinaryIO) -> bool:
+        """Read the index from the binary file if it's compatible."""
+        header: Optional[Dict[str, int]] = self.__read_header(file=file)
+        if header is None:
+            return False
+        users_number: int = header["users"]
+        user_ids: array = array("q")
+        user_ids.fromfile(file, users_number)
+        signatures: array = array("Q")
+        signatures.fromfile(file, users_number * self.PERMUTATIONS_NUMBER)
+        hobby_sizes: array = array("q")
+        hobby_sizes.fromfile(file, users_number)
+        hobby_ids: array = array("q")
+        hobby_ids.fromfile(file, header["hobbies"])
+        with self.__lock:
+            self.__hobbies, self.__signatures, self.__buckets = {}, {}, {}
+            hobby_start: int = 0
+            position: int
+            for position, user_id in enumerate(user_ids):
+                signature_start: int = position * self.PERMUTATIONS_NUMBER
+                hobby_end: int = hobby_start + hobby_sizes[position]
+                self.__add_signature(
+                    user_id=user_id,
+                    hobby_ids=frozenset(hobby_ids[hobby_start:hobby_end]),
+                    signature=tuple(
+                        signatures[
+                            signature_start:
+                            signature_start + self.PERMUTATIONS_NUMBER
+                        ]
+                    )
+                )
+                hobby_start = hobby_end
+            self.__generation = header.get("generation")
+            self.__log_offset = self.LOG_HEADER_SIZE
+            self.is_loaded = True
+        return True
+
+    def __apply_log(self, file: BinaryIO) -> bool:
+        """Apply records of the log which are not applied yet."""
+        # Log belongs to the snapshot with the same generation only
+        generation: array = array("q")
+        generation.frombytes(file.read(self.LOG_HEADER_SIZE))
+        if not generation or generation[0] != self.__generation:
+            return False
+        file.seek(self.__log_offset)
+        words: array = array("q")
+        data: bytes = file.read()
+        words.frombytes(data[:len(data) - len(data) % words.itemsize])
+        position: int = 0
+        # Record is the user id, the number of hobbies and the hobbies;
+        # the record written meanwhile is applied by the next reload
+        while position + 2 <= len(words) and \
+                0 <= words[position + 1] <= len(words) - position - 2:
+            hobbies_number: int = words[position + 1]
+            self.update_user(
+                user_id=words[position],
+                hobby_ids=words[position + 2:position + 2 + hobbies_number]
+            )
+            position += 2 + hobbies_number
+        self.__log_offset += position * words.itemsize
+        return True
+
+    def __get_generation(self, path: str) -> Optional[int]:
+        """Get generation of the snapshot file."""
+        with open(path, "rb") as file:
+            header: Optional[Dict[str, int]] = self.__read_header(file=file)
+        return header.get("generation") if header else None
+
+    @contextmanager
+    def __lock_file(self, path: str) -> Iterator[None]:
+        """Keep the other processes from saving the file meanwhile."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def __save(self, path: str) -> None:
+        """Replace the snapshot with an empty log of its generation."""
+        with self.__lock:
+            self.__generation = time_ns()
+            self.__log_offset = self.LOG_HEADER_SIZE
+        temp_path: str = f"{path}.tmp"
+        with open(temp_path, "wb") as file:
+            self.dump(file=file)
+        os.replace(temp_path, path)
+        with open(temp_path, "wb") as file:
+            array("q", (self.__generation,)).tofile(file)
+        os.replace(temp_path, f"{path}.log")
+        with self.__lock:
+            self.__version = self.__shared_version.bump()
+
+    def __append(self, path: str, user_ids: Iterable[int]) -> None:
+        """Append the users to the log or compact it into the snapshot."""
+        log_path: str = f"{path}.log"
+        # Long log makes every reload slower than the snapshot itself
+        if os.path.getsize(log_path) > os.path.getsize(path):
+            self.__save(path=path)
+            return
+        with self.__lock:
+            records: array = array("q")
+            user_id: int
+            for user_id in user_ids:
+                hobby_ids: FrozenSet[int] = self.get_hobby_ids(user_id=user_id)
+                records.extend((user_id, len(hobby_ids), *sorted(hobby_ids)))
+        with open(log_path, "ab") as file:
+            records.tofile(file)
+        with self.__lock:
+            self.__log_offset += len(records) * records.itemsize
+            self.__version = self.__shared_version.bump()
+
+    def __reload(self, path: str) -> bool:
+        """Load the changes if the copy of the process is outdated."""
+        version: int = self.__shared_version.get()
+        with self.__lock:
+            if self.is_loaded and self.__version == version:
+                return True
+            try:
+                is_loaded: bool = self.is_loaded and \
+                    self.__get_generation(path=path) == self.__generation
+                if not is_loaded:
+                    with open(path, "rb") as file:
+                        is_loaded = self.load(file=file)
+                if is_loaded:
+                    with open(f"{path}.log", "rb") as file:
+                        if self.__apply_log(file=file):
+                            self.__version = version
+                            return True
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, EOFError, KeyError):
+                logger.exception("Hobby index file %s is damaged", path)
+        return False
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Persist the index into the file."""
+        path = path or settings.AUTHS_HOBBY_INDEX_PATH
+        with self.__lock_file(path=path):
+            self.__save(path=path)
+
+    def rebuild(self, path: Optional[str] = None) -> None:
+        """Build the index from the database and persist it."""
+        path = path or settings.AUTHS_HOBBY_INDEX_PATH
+        # Changes committed during the build are saved after it, not before
+        with self.__lock_file(path=path):
+            self.build()
+            self.__save(path=path)
+
+    def ensure_loaded(self) -> None:
+        """Load the current file or build and persist the index."""
+        path: str = settings.AUTHS_HOBBY_INDEX_PATH
+        if self.__reload(path=path):
+            return
+        with self.__lock_file(path=path):
+            # Another process may have just saved the file
+            if not self.__reload(path=path):
+                self.build()
+                self.__save(path=path)
+
+    def refresh_users(self, user_ids: Iterable[int]) -> None:
+        """Apply committed hobbies of the users and persist them."""
+        user_ids = set(user_ids)
+        path: str = settings.AUTHS_HOBBY_INDEX_PATH
+        with self.__lock_file(path=path):
+            # Nobody saves meanwhile, so changes of the others aren't lost
+            is_reloaded: bool = self.__reload(path=path)
+            if not is_reloaded:
+                self.build()
+            grouped_ids: Dict[int, Set[int]] = self.__get_grouped_ids(
+                user_ids=user_ids
+            )
+            changed_ids: List[int] = []
+            with self.__lock:
+                user_id: int
+                for user_id in user_ids:
+                    hobby_ids: FrozenSet[int] = frozenset(
+                        grouped_ids.get(user_id, ())
+                    )
+                    if hobby_ids != self.get_hobby_ids(user_id=user_id):
+                        self.update_user(user_id=user_id, hobby_ids=hobby_ids)
+                        changed_ids.append(user_id)
+            # Only the changed users are appended to the shared file
+            if not is_reloaded:
+                self.__save(path=path)
+            elif changed_ids:
+                self.__append(path=path, user_ids=changed_ids)
+
+
+hobby_lsh_index: HobbyLSHIndex = HobbyLSHIndex()
@@ -0,0 +1,106 @@
+# Python
+from typing import (
+    Optional,
+    Dict,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import QuerySet
+
+# Project
+from auths.models import CustomUser
+
+
+BUDGET_CEILING_CACHE_KEY = "auths:budget_ceiling:{gender}"
+ALL_GENDERS = "all"
+
+
+def _get_cache_key(gender: Optional[str] = None) -> str:
+    """Get cache key of the budget ceiling for the provided gender."""
+    return BUDGET_CEILING_CACHE_KEY.format(gender=gender or ALL_GENDERS)
+
+
+def _get_cache_genders() -> tuple[Optional[str]]:
+    """Get all genders which have their own budget ceiling."""
+    return (None,) + tuple(gender for gender, _ in CustomUser.GENDERS)
+
+
+def _is_counted_user(user: CustomUser, gender: Optional[str]) -> bool:
+    """Check whether the user takes part in the budget ceiling."""
+    return bool(
+        not user.datetime_deleted and
+        user.is_active and
+        (not gender or user.gender == gender)
+    )
+
+
+def refresh_budget_ceiling(gender: Optional[str] = None) -> int:
+    """Recalculate max month budjet of the users and cache it."""
+    queryset: QuerySet[CustomUser] = CustomUser.objects.get_not_deleted(
+    ).filter(
+        is_active=True
+    )
+    if gender:
+        queryset = queryset.filter(gender=gender)
+    top_user: Optional[Dict[str, Any]] = queryset.order_by(
+        "-month_budjet"
+    ).values("id", "month_budjet").first()
+    stats: Dict[str, Any] = {
+        "max": top_user["month_budjet"] if top_user else 0,
+        "user_id": top_user["id"] if top_user else None,
+    }
+    cache.set(
+        key=_get_cache_key(gender=gender),
+        value=stats,
+        timeout=settings.AUTHS_BUDGET_CEILING_TIMEOUT
+    )
+    return stats["max"]
+
+
+def get_budget_ceiling(gender: Optional[str] = None) -> int:
+    """Get cached max month budjet of the users."""
+    stats: Optional[Dict[str, Any]] = cache.get(
+        key=_get_cache_key(gender=gender)
+    )
+    if stats is None:
+        return refresh_budget_ceiling(gender=gender)
+    return stats["max"]
+
+
+def update_budget_ceiling(
+    user: CustomUser,
+    is_removed: bool = False
+) -> None:
+    """Apply changes of the single user to the cached budget ceilings."""
+    gender: Optional[str]
+    for gender in _get_cache_genders():
+        key: str = _get_cache_key(gender=gender)
+        stats: Optional[Dict[str, Any]] = cache.get(key=key)
+        if stats is None:
+            continue
+        is_counted: bool = not is_removed and \
+            _is_counted_user(user=user, gender=gender)
+        if is_counted and user.month_budjet > stats["max"]:
+            cache.set(
+                key=key,
+                value={"max": user.month_budjet, "user_id": user.id},
+                timeout=settings.AUTHS_BUDGET_CEILING_TIMEOUT
+            )
+        # The ceiling holder has gone, so it's recalculated on the next read
+        elif stats["user_id"] == user.id and (
+            not is_counted or user.month_budjet < stats["max"]
+        ):
+            cache.delete(key=key)
+
+
+def invalidate_budget_ceiling() -> None:
+    """Drop all cached budget ceilings after bulk changes of the users."""
+    cache.delete_many(
+        keys=[
+            _get_cache_key(gender=gender)
+            for gender in _get_cache_genders()
+        ]
+    )
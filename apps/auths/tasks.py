@@ -0,0 +1,274 @@
+# Python
+import logging
+from queue import (
+    Full,
+    Queue,
+)
+from threading import (
+    Lock,
+    Thread,
+)
+from typing import (
+    Callable,
+    Optional,
+    Iterable,
+    Tuple,
+    List,
+    Dict,
+    Set,
+    Any,
+)
+
+# Django
+from django.conf import settings
+from django.db import (
+    connections,
+    transaction,
+)
+from django.utils import timezone
+
+# Project
+from auths.models import CustomUser
+from auths.images import generate_photo_variants
+from auths.recommendations import (
+    mark_recommendations_stale,
+    refresh_user_recommendations,
+)
+from auths.similarity import hobby_lsh_index
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class BackgroundWorker:
+    """Threads running queued tasks outside of the request."""
+
+    def __init__(
+        self,
+        name: str,
+        workers_setting: str,
+        queue_size_setting: str
+    ) -> None:
+        self.__name: str = name
+        # Limits are read on start, so they follow the overridden settings
+        self.__workers_setting: str = workers_setting
+        self.__queue_size_setting: str = queue_size_setting
+        self.__lock: Lock = Lock()
+        self.__queue: Optional[Queue] = None
+        self.__threads: List[Thread] = []
+
+    def __start(self) -> Queue:
+        """Start the threads on first usage with the configured limits."""
+        with self.__lock:
+            if self.__queue is None:
+                self.__queue = Queue(
+                    maxsize=getattr(settings, self.__queue_size_setting)
+                )
+                number: int
+                for number in range(
+                    getattr(settings, self.__workers_setting)
+                ):
+                    thread: Thread = Thread(
+                        target=self.__run,
+                        name=f"{self.__name}-{number}",
+                        daemon=True
+                    )
+                    thread.start()
+                    self.__threads.append(thread)
+            return self.__queue
+
+    def __run(self) -> None:
+        """Run the tasks of the queue one by one."""
+        while True:
+            function: Callable
+            args: Tuple[Any]
+            function, args = self.__queue.get()
+            try:
+                function(*args)
+            except Exception:
+                logger.exception("Task of %s worker failed", self.__name)
+            finally:
+                # Every thread has its own connection which is not reused
+                connections.close_all()
+                self.__queue.task_done()
+
+    def submit(self, function: Callable, *args: Any) -> bool:
+        """Put the task into the queue if there is a place for it."""
+        try:
+            self.__start().put_nowait((function, args))
+            return True
+        except Full:
+            logger.warning(
+                "Queue of %s worker is full, task is skipped",
+                self.__name
+            )
+            return False
+
+    def join(self) -> None:
+        """Wait until all the queued tasks are done."""
+        if self.__queue is not None:
+            self.__queue.join()
+
+
+photo_worker: BackgroundWorker = BackgroundWorker(
+    name="photo-ingestion",
+    workers_setting="AUTHS_PHOTO_WORKERS",
+    queue_size_setting="AUTHS_PHOTO_QUEUE_SIZE"
+)
+recommendations_worker: BackgroundWorker = BackgroundWorker(
+    name="recommendations",
+    workers_setting="AUTHS_RECOMMENDATIONS_WORKERS",
+    queue_size_setting="AUTHS_RECOMMENDATIONS_QUEUE_SIZE"
+)
+hobby_index_worker: BackgroundWorker = BackgroundWorker(
+    name="hobby-index",
+    workers_setting="AUTHS_HOBBY_INDEX_WORKERS",
+    queue_size_setting="AUTHS_HOBBY_INDEX_QUEUE_SIZE"
+)
+# Removed districts of the users waiting for the refresh in the queue
+_pending_refreshes: Dict[int, Set[int]] = {}
+_pending_refreshes_lock: Lock = Lock()
+# Users waiting for the hobby index refresh in the queue
+_pending_index_user_ids: Set[int] = set()
+_pending_index_lock: Lock = Lock()
+
+
+def ingest_remote_photo(user_id: int, image_url: str) -> None:
+    """Save remote photo of the user if he still has none."""
+    user: Optional[CustomUser] = CustomUser.objects.filter(
+        id=user_id
+    ).first()
+    if user:
+        user.save_remote_image(image_url=image_url)
+
+
+def schedule_remote_photo(user_id: int, image_url: str) -> None:
+    """Ingest remote photo in background after the user is committed."""
+    if not settings.AUTHS_PHOTO_ASYNC:
+        ingest_remote_photo(user_id=user_id, image_url=image_url)
+        return
+    transaction.on_commit(
+        lambda: photo_worker.submit(ingest_remote_photo, user_id, image_url)
+    )
+
+
+def create_photo_variants(user_id: int) -> None:
+    """Generate resized variants of the user's photo."""
+    user: Optional[CustomUser] = CustomUser.objects.filter(
+        id=user_id
+    ).only("id", "photo").first()
+    if user and user.photo:
+        generate_photo_variants(photo=user.photo)
+        mark_photo_variants(user_id=user.id, photo_name=user.photo.name)
+
+
+def mark_photo_variants(user_id: int, photo_name: str) -> None:
+    """Remember that variants of the photo are generated."""
+    # Photo urls of the representation change once the variants exist;
+    # the photo replaced meanwhile keeps its own state
+    CustomUser.objects.filter(
+        id=user_id,
+        photo=photo_name
+    ).update(
+        variants_photo_name=photo_name,
+        datetime_updated=timezone.now()
+    )
+
+
+def schedule_photo_variants(user_id: int) -> None:
+    """Generate photo variants in background after the user is committed."""
+    if not settings.AUTHS_PHOTO_ASYNC:
+        create_photo_variants(user_id=user_id)
+        return
+    transaction.on_commit(
+        lambda: photo_worker.submit(create_photo_variants, user_id)
+    )
+
+
+def _refresh_pending_recommendations(user_id: int) -> None:
+    """Refresh recommendations affected by the user's queued changes."""
+    with _pending_refreshes_lock:
+        district_ids: Set[int] = _pending_refreshes.pop(user_id, set())
+    refresh_user_recommendations(user_id=user_id, district_ids=district_ids)
+
+
+def _submit_recommendations_refresh(
+    user_id: int,
+    district_ids: Iterable[int]
+) -> None:
+    """Queue the refresh merging it with the one already queued."""
+    with _pending_refreshes_lock:
+        is_queued: bool = user_id in _pending_refreshes
+        _pending_refreshes.setdefault(user_id, set()).update(district_ids)
+    if is_queued:
+        return
+    if not recommendations_worker.submit(
+        _refresh_pending_recommendations,
+        user_id
+    ):
+        with _pending_refreshes_lock:
+            district_ids = _pending_refreshes.pop(user_id, set())
+        # Skipped refresh is left to the reads recomputing stale lists
+        mark_recommendations_stale(
+            candidate_id=user_id,
+            district_ids=district_ids
+        )
+
+
+def schedule_recommendations_refresh(
+    user_id: int,
+    district_ids: Iterable[int] = ()
+) -> None:
+    """Refresh recommendations affected by the user after commit."""
+    if not settings.AUTHS_RECOMMENDATIONS_INCREMENTAL:
+        return
+    district_ids = set(district_ids)
+    if not settings.AUTHS_RECOMMENDATIONS_ASYNC:
+        transaction.on_commit(
+            lambda: refresh_user_recommendations(
+                user_id=user_id,
+                district_ids=district_ids
+            )
+        )
+        return
+    transaction.on_commit(
+        lambda: _submit_recommendations_refresh(
+            user_id=user_id,
+            district_ids=district_ids
+        )
+    )
+
+
+def _refresh_pending_hobby_index() -> None:
+    """Apply queued changes of the users to the shared hobby index."""
+    with _pending_index_lock:
+        user_ids: Set[int] = set(_pending_index_user_ids)
+        _pending_index_user_ids.clear()
+    hobby_lsh_index.refresh_users(user_ids=user_ids)
+
+
+def _submit_hobby_index_refresh(user_ids: Set[int]) -> None:
+    """Queue the refresh merging it with the one already queued."""
+    with _pending_index_lock:
+        is_queued: bool = bool(_pending_index_user_ids)
+        _pending_index_user_ids.update(user_ids)
+    if is_queued:
+        return
+    if not hobby_index_worker.submit(_refresh_pending_hobby_index):
+        with _pending_index_lock:
+            _pending_index_user_ids.clear()
+
+
+def schedule_hobby_index_refresh(user_ids: Iterable[int]) -> None:
+    """Refresh the hobby index of the users after commit."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    if not settings.AUTHS_HOBBY_INDEX_ASYNC:
+        transaction.on_commit(
+            lambda: hobby_lsh_index.refresh_users(user_ids=user_ids)
+        )
+        return
+    transaction.on_commit(
+        lambda: _submit_hobby_index_refresh(user_ids=user_ids)
+    )
@@ -1,3 +1,1675 @@
-from django.test import TestCase  # noqa
+# Python
+import os
+import fcntl
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+from datetime import (
+    datetime,
+    timedelta,
+)
+from random import Random
+from threading import (
+    Event,
+    Thread,
+)
+from time import (
+    monotonic,
+    sleep,
+)
+from tempfile import (
+    SpooledTemporaryFile,
+    TemporaryDirectory,
+)
+from unittest.mock import patch
+from typing import (
+    Callable,
+    Optional,
+    Iterable,
+    FrozenSet,
+    Tuple,
+    List,
+    Set,
+    Dict,
+    Any,
+)
 
-# Create your tests here.
+# Third party
+from PIL import Image
+from rest_framework.exceptions import ParseError
+from rest_framework.request import Request as DRF_Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Django
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    identify_hasher,
+    make_password,
+)
+from django.contrib.auth.models import update_last_login
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import connection
+from django.db.models import (
+    QuerySet,
+    Q,
+)
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.test import (
+    SimpleTestCase,
+    override_settings,
+)
+
+# Project
+from abstracts.paginators import AbstractCursorPaginator
+from abstracts.testing import SharedCacheTestCase
+from auths.models import (
+    CustomUser,
+    CustomUserRecommendation,
+)
+from auths.indexes import USER_INDEX_VERSION_KEY
+from auths.identifiers import AmbiguousLoginError
+from auths.hashing import HashingExecutor
+from auths.images import get_variant_url
+from auths.serializers import (
+    CustomUserListSerializer,
+    CustomUserDetailSerializer,
+    CustomUserValuesSerializer,
+)
+from auths.recommendations import (
+    compute_recommendation,
+    save_recommendations,
+    get_recommended_queryset,
+    get_users_by_ids,
+)
+from auths.photos import (
+    PhotoDownloadError,
+    RemotePhotoDownloader,
+    photo_downloader,
+)
+from auths.tasks import (
+    BackgroundWorker,
+    photo_worker,
+    recommendations_worker,
+    _refresh_pending_recommendations,
+)
+from auths.similarity import (
+    HOBBY_INDEX_VERSION_KEY,
+    HobbyLSHIndex,
+    get_jaccard_similarity,
+)
+from auths.matching import (
+    get_districts_exists,
+    get_matched_queryset,
+    filter_by_budjet,
+)
+from auths.stats import (
+    get_budget_ceiling,
+    update_budget_ceiling,
+)
+from locations.models import (
+    District,
+    City,
+)
+from events.models import (
+    Category,
+    SubCategory,
+)
+from abstracts.cache import CacheVersion
+
+
+FAST_PASSWORD_HASHERS = (
+    "django.contrib.auth.hashers.MD5PasswordHasher",
+)
+
+
+def _bump_hobby_index_version() -> None:
+    """Bump version of the hobby index like another worker does."""
+    CacheVersion(key=HOBBY_INDEX_VERSION_KEY).bump()
+
+
+def _raise_budget_ceiling() -> None:
+    """Apply the saved user with the highest budjet to the ceiling."""
+    update_budget_ceiling(
+        user=CustomUser(id=10 ** 6, gender="M", month_budjet=90000)
+    )
+
+
+@override_settings(PASSWORD_HASHERS=FAST_PASSWORD_HASHERS)
+class AuthsTestCase(SharedCacheTestCase):
+    """Test case with users in districts and a cache shared by processes."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.index_dir: TemporaryDirectory = TemporaryDirectory()
+        self.addCleanup(self.index_dir.cleanup)
+        self.settings_override: override_settings = override_settings(
+            AUTHS_HOBBY_INDEX_PATH=os.path.join(
+                self.index_dir.name,
+                "hobby_lsh.index"
+            ),
+            AUTHS_HOBBY_INDEX_ASYNC=False,
+            AUTHS_RECOMMENDATIONS_ASYNC=False
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.city: City = City.objects.create(name="Алматы")
+        self.districts: List[District] = [
+            District.objects.create(name=f"Район {number}", city=self.city)
+            for number in range(4)
+        ]
+        category: Category = Category.objects.create(name="Спорт")
+        self.hobbies: List[SubCategory] = [
+            SubCategory.objects.create(
+                name=f"Хобби {number}",
+                main_category=category
+            )
+            for number in range(6)
+        ]
+        self.users_cnt: int = 0
+
+    def create_user(
+        self,
+        month_budjet: int = 50000,
+        gender: str = "M",
+        districts: Iterable[District] = (),
+        hobbies: Iterable[SubCategory] = (),
+        **fields: Dict[str, Any]
+    ) -> CustomUser:
+        """Create user with unique identifiers."""
+        self.users_cnt += 1
+        number: int = self.users_cnt
+        user: CustomUser = CustomUser.objects.create_user(
+            email=f"user{number}@mail.ru",
+            phone=f"+7701{number:07d}",
+            first_name=f"User{number}",
+            telegram_username=f"user{number}",
+            gender=gender,
+            password="12345",
+            month_budjet=month_budjet,
+            **fields
+        )
+        user.districts.add(*districts)
+        user.hobby_categories.add(*hobbies)
+        return user
+
+
+class BudgetCeilingTests(AuthsTestCase):
+    """Tests of the cached budget ceiling."""
+
+    def test_ceiling_follows_saved_users(self) -> None:
+        self.create_user(month_budjet=10000)
+        top_user: CustomUser = self.create_user(month_budjet=30000)
+        self.assertEqual(get_budget_ceiling(), 30000)
+        self.create_user(month_budjet=40000, gender="F")
+        self.assertEqual(get_budget_ceiling(), 40000)
+        self.assertEqual(get_budget_ceiling(gender="M"), 30000)
+        top_user.month_budjet = 5000
+        top_user.save()
+        self.assertEqual(get_budget_ceiling(gender="M"), 10000)
+
+    def test_ceiling_changed_in_other_process_is_shared(self) -> None:
+        self.create_user(month_budjet=30000)
+        self.assertEqual(get_budget_ceiling(), 30000)
+        self.run_in_other_process(target=_raise_budget_ceiling)
+        self.assertEqual(get_budget_ceiling(), 90000)
+
+
+class BudjetMatchTests(AuthsTestCase):
+    """Tests of the strict and widened budjet matches."""
+
+    def __get_two_queries_ids(self, final_budjet: int) -> Set[int]:
+        """Get ids matched like before: strict count, then widened list."""
+        queryset: QuerySet[CustomUser] = get_matched_queryset(
+            district_ids=[district.id for district in self.districts]
+        )
+        strict_queryset: QuerySet[CustomUser] = queryset.filter(
+            month_budjet__lte=final_budjet
+        )
+        if strict_queryset.count() == 0:
+            strict_queryset = queryset.filter(
+                month_budjet__lte=int(final_budjet*1.2)
+            )
+        return set(strict_queryset.values_list("id", flat=True))
+
+    def __get_ids(self, final_budjet: int) -> Set[int]:
+        """Get ids matched by the single statement."""
+        with self.assertNumQueries(1):
+            return set(
+                filter_by_budjet(
+                    queryset=get_matched_queryset(
+                        district_ids=[
+                            district.id for district in self.districts
+                        ]
+                    ),
+                    final_budjet=final_budjet
+                ).values_list("id", flat=True)
+            )
+
+    def test_strict_match(self) -> None:
+        strict_user: CustomUser = self.create_user(
+            month_budjet=20000,
+            districts=self.districts[:1]
+        )
+        self.create_user(month_budjet=35000, districts=self.districts[:1])
+        self.assertEqual(
+            self.__get_ids(final_budjet=30000),
+            {strict_user.id}
+        )
+        self.assertEqual(
+            self.__get_ids(final_budjet=30000),
+            self.__get_two_queries_ids(final_budjet=30000)
+        )
+
+    def test_widened_match(self) -> None:
+        widened_user: CustomUser = self.create_user(
+            month_budjet=35000,
+            districts=self.districts[:1]
+        )
+        self.create_user(month_budjet=40000, districts=self.districts[:1])
+        self.assertEqual(
+            self.__get_ids(final_budjet=30000),
+            {widened_user.id}
+        )
+        self.assertEqual(
+            self.__get_ids(final_budjet=30000),
+            self.__get_two_queries_ids(final_budjet=30000)
+        )
+
+    def test_no_match(self) -> None:
+        self.create_user(month_budjet=40000, districts=self.districts[:1])
+        self.assertEqual(self.__get_ids(final_budjet=30000), set())
+        self.assertEqual(self.__get_two_queries_ids(final_budjet=30000), set())
+
+
+def _bump_user_index_version() -> None:
+    """Bump version of the user index like another worker does."""
+    CacheVersion(key=USER_INDEX_VERSION_KEY).bump()
+
+
+class UserIndexTests(AuthsTestCase):
+    """Tests of the bitmap index path of the users matching."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.male_user: CustomUser = self.create_user(
+            districts=self.districts[:2]
+        )
+        self.female_user: CustomUser = self.create_user(
+            gender="F",
+            districts=self.districts[1:3]
+        )
+        self.deleted_user: CustomUser = self.create_user(
+            districts=self.districts[:1],
+            datetime_deleted=timezone.now()
+        )
+        self.deactivated_user: CustomUser = self.create_user(
+            districts=self.districts[:1],
+            is_active_account=False
+        )
+        self.create_user()
+
+    def __get_ids(
+        self,
+        is_index_enabled: bool,
+        district_ids: Iterable[int],
+        **user_params: Dict[str, Any]
+    ) -> Set[int]:
+        """Get ids of the matched users with the index on or off."""
+        with override_settings(AUTHS_USER_INDEX_ENABLED=is_index_enabled):
+            return set(
+                get_matched_queryset(
+                    district_ids=district_ids,
+                    **user_params
+                ).values_list("id", flat=True)
+            )
+
+    def test_index_and_database_paths_match(self) -> None:
+        district_ids: Tuple[int, ...]
+        for district_ids in (
+            (self.districts[0].id,),
+            (self.districts[1].id, self.districts[2].id),
+            tuple(district.id for district in self.districts),
+        ):
+            user_params: Dict[str, Any]
+            for user_params in ({}, {"gender": "M"}, {"gender": "F"}):
+                with self.subTest(
+                    district_ids=district_ids,
+                    **user_params
+                ):
+                    self.assertEqual(
+                        self.__get_ids(
+                            is_index_enabled=True,
+                            district_ids=district_ids,
+                            **user_params
+                        ),
+                        self.__get_ids(
+                            is_index_enabled=False,
+                            district_ids=district_ids,
+                            **user_params
+                        )
+                    )
+        self.assertEqual(
+            self.__get_ids(
+                is_index_enabled=True,
+                district_ids=(self.districts[0].id,)
+            ),
+            {self.male_user.id}
+        )
+
+    def test_saved_users_are_applied_to_index(self) -> None:
+        district_ids: Tuple[int] = (self.districts[0].id,)
+        self.__get_ids(is_index_enabled=True, district_ids=district_ids)
+        self.male_user.deactivate()
+        self.deactivated_user.activate()
+        self.assertEqual(
+            self.__get_ids(is_index_enabled=True, district_ids=district_ids),
+            {self.deactivated_user.id}
+        )
+
+    def test_bump_in_other_process_rebuilds_index(self) -> None:
+        district_ids: Tuple[int] = (self.districts[0].id,)
+        self.assertEqual(
+            self.__get_ids(is_index_enabled=True, district_ids=district_ids),
+            {self.male_user.id}
+        )
+        # update() sends no signals, so this process keeps its bitmaps
+        CustomUser.objects.filter(id=self.male_user.id).update(
+            is_active_account=False
+        )
+        self.assertEqual(
+            self.__get_ids(is_index_enabled=True, district_ids=district_ids),
+            {self.male_user.id}
+        )
+        self.run_in_other_process(target=_bump_user_index_version)
+        self.assertEqual(
+            self.__get_ids(is_index_enabled=True, district_ids=district_ids),
+            set()
+        )
+
+
+class HobbyIndexTests(AuthsTestCase):
+    """Tests of the hobby similarity index shared through the file."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.runner: CustomUser = self.create_user(hobbies=self.hobbies[:3])
+        self.twin: CustomUser = self.create_user(
+            hobbies=self.hobbies[:3]
+        )
+        self.create_user(hobbies=self.hobbies[4:])
+
+    def __get_similar_ids(self, index: HobbyLSHIndex) -> List[int]:
+        """Get users similar to the runner by the index."""
+        index.ensure_loaded()
+        return [
+            user_id
+            for user_id, _ in index.query(
+                hobby_ids=[hobby.id for hobby in self.hobbies[:3]],
+                excluded_user_id=self.runner.id
+            )
+        ]
+
+    def test_candidates_are_few_for_dissimilar_users(self) -> None:
+        random: Random = Random(0)
+        index: HobbyLSHIndex = HobbyLSHIndex()
+        users_number: int = 2000
+        user_id: int
+        for user_id in range(users_number):
+            index.update_user(
+                user_id=user_id,
+                hobby_ids=random.sample(range(40), 3)
+            )
+        candidates_cnt: int = 0
+        queries_number: int = 20
+        for _ in range(queries_number):
+            hobby_ids: FrozenSet[int] = frozenset(random.sample(range(40), 3))
+            candidate_ids: Set[int] = index.get_candidate_ids(
+                hobby_ids=hobby_ids
+            )
+            candidates_cnt += len(candidate_ids)
+            # Users with the same hobbies always share the buckets
+            self.assertFalse(
+                {
+                    user_id
+                    for user_id in range(users_number)
+                    if index.get_hobby_ids(user_id=user_id) == hobby_ids
+                } - candidate_ids
+            )
+            # A fifth of the users shares one of three hobbies with Jaccard
+            # 0.2, yet they must not turn the query into a full scan
+            self.assertGreater(
+                sum(
+                    get_jaccard_similarity(
+                        hobby_ids,
+                        index.get_hobby_ids(user_id=user_id)
+                    ) > 0
+                    for user_id in range(users_number)
+                ),
+                users_number // 10
+            )
+        self.assertLess(
+            candidates_cnt / queries_number,
+            users_number * 0.05
+        )
+
+    def test_damaged_file_is_rebuilt(self) -> None:
+        self.assertEqual(
+            self.__get_similar_ids(index=HobbyLSHIndex()),
+            [self.twin.id]
+        )
+        path: str = os.path.join(self.index_dir.name, "hobby_lsh.index")
+        with open(path, "r+b") as file:
+            file.truncate(os.path.getsize(path) // 2)
+        self.run_in_other_process(target=_bump_hobby_index_version)
+        with self.assertLogs("auths.similarity", level="ERROR"):
+            self.assertEqual(
+                self.__get_similar_ids(index=HobbyLSHIndex()),
+                [self.twin.id]
+            )
+        # The rebuilt file is saved back, so it's loaded without errors
+        with self.assertNoLogs("auths.similarity", level="ERROR"):
+            self.assertEqual(
+                self.__get_similar_ids(index=HobbyLSHIndex()),
+                [self.twin.id]
+            )
+
+    def test_change_in_other_process_is_loaded(self) -> None:
+        index: HobbyLSHIndex = HobbyLSHIndex()
+        self.assertEqual(
+            self.__get_similar_ids(index=index),
+            [self.twin.id]
+        )
+        # Queued refresh isn't run, so only the database is changed here
+        self.twin.hobby_categories.set(self.hobbies[4:])
+        self.assertEqual(
+            self.__get_similar_ids(index=index),
+            [self.twin.id]
+        )
+        twin_id: int = self.twin.id
+        self.run_in_other_process(
+            target=lambda: HobbyLSHIndex().refresh_users(user_ids=(twin_id,))
+        )
+        self.assertEqual(self.__get_similar_ids(index=index), [])
+
+    def test_changes_are_appended_to_log(self) -> None:
+        index: HobbyLSHIndex = HobbyLSHIndex()
+        self.assertEqual(
+            self.__get_similar_ids(index=index),
+            [self.twin.id]
+        )
+        path: str = os.path.join(self.index_dir.name, "hobby_lsh.index")
+        snapshot_stat: os.stat_result = os.stat(path)
+        log_size: int = os.path.getsize(f"{path}.log")
+        self.twin.hobby_categories.set(self.hobbies[4:])
+        twin_id: int = self.twin.id
+        self.run_in_other_process(
+            target=lambda: HobbyLSHIndex().refresh_users(user_ids=(twin_id,))
+        )
+        # Snapshot isn't rewritten, only the changed user is appended
+        self.assertEqual(
+            (os.stat(path).st_ino, os.stat(path).st_mtime_ns),
+            (snapshot_stat.st_ino, snapshot_stat.st_mtime_ns)
+        )
+        self.assertEqual(
+            os.path.getsize(f"{path}.log") - log_size,
+            8 * (2 + len(self.hobbies[4:]))
+        )
+        self.assertEqual(self.__get_similar_ids(index=index), [])
+
+    def test_long_log_is_compacted(self) -> None:
+        index: HobbyLSHIndex = HobbyLSHIndex()
+        index.ensure_loaded()
+        path: str = os.path.join(self.index_dir.name, "hobby_lsh.index")
+        log_sizes: List[int] = []
+        hobbies: List[SubCategory]
+        for hobbies in [self.hobbies[:2], self.hobbies[:3]] * 30:
+            self.twin.hobby_categories.set(hobbies)
+            index.refresh_users(user_ids=(self.twin.id,))
+            log_sizes.append(os.path.getsize(f"{path}.log"))
+            self.assertLessEqual(
+                log_sizes[-1],
+                os.path.getsize(path) + 8 * (2 + len(self.hobbies))
+            )
+        # Log is started anew after the snapshot is replaced
+        self.assertIn(8, log_sizes)
+        self.assertEqual(
+            self.__get_similar_ids(index=HobbyLSHIndex()),
+            [self.twin.id]
+        )
+
+    def test_rebuild_is_locked(self) -> None:
+        path: str = os.path.join(self.index_dir.name, "hobby_lsh.index")
+        index: HobbyLSHIndex = HobbyLSHIndex()
+        build: Callable[[], None] = index.build
+
+        def build_locked() -> None:
+            """Check that the other savers wait for the build."""
+            with open(f"{path}.lock", "a") as lock_file:
+                with self.assertRaises(BlockingIOError):
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            build()
+
+        with patch.object(index, "build", side_effect=build_locked):
+            index.rebuild()
+        self.assertEqual(
+            self.__get_similar_ids(index=HobbyLSHIndex()),
+            [self.twin.id]
+        )
+
+    def test_committed_hobbies_are_saved_to_file(self) -> None:
+        index: HobbyLSHIndex = HobbyLSHIndex()
+        self.assertEqual(
+            self.__get_similar_ids(index=index),
+            [self.twin.id]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            user: CustomUser = self.create_user(hobbies=self.hobbies[:3])
+        self.assertEqual(
+            self.__get_similar_ids(index=index),
+            [user.id, self.twin.id]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            user.deactivate()
+        self.assertEqual(
+            self.__get_similar_ids(index=index),
+            [self.twin.id]
+        )
+
+
+@override_settings(AUTHS_USER_INDEX_ENABLED=False)
+class DistrictsExistsTests(AuthsTestCase):
+    """Tests of the districts filter made by the correlated EXISTS."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.create_user(districts=self.districts[:3])
+        self.create_user(gender="F", districts=self.districts[1:2])
+        self.create_user(month_budjet=20000, districts=self.districts[2:])
+        self.create_user(month_budjet=60000)
+        self.create_user(
+            districts=self.districts[:2],
+            datetime_deleted=timezone.now()
+        )
+
+    def __get_joined_queryset(
+        self,
+        district_ids: Iterable[int],
+        **user_params: Dict[str, Any]
+    ) -> QuerySet[CustomUser]:
+        """Get users matched by the former join with DISTINCT."""
+        return CustomUser.objects.get_not_deleted().filter(
+            districts__in=district_ids,
+            **user_params,
+            is_active_account=True
+        ).distinct()
+
+    def test_users_match_joined_filter(self) -> None:
+        district_ids: Tuple[int, ...]
+        for district_ids in (
+            (self.districts[0].id,),
+            (self.districts[1].id, self.districts[2].id),
+            tuple(district.id for district in self.districts),
+        ):
+            user_params: Dict[str, Any]
+            for user_params in ({}, {"gender": "M"}):
+                with self.subTest(district_ids=district_ids, **user_params):
+                    user_ids: List[int] = list(
+                        filter_by_budjet(
+                            queryset=get_matched_queryset(
+                                district_ids=district_ids,
+                                **user_params
+                            ),
+                            final_budjet=50000
+                        ).values_list("id", flat=True)
+                    )
+                    self.assertEqual(
+                        user_ids,
+                        list(
+                            filter_by_budjet(
+                                queryset=self.__get_joined_queryset(
+                                    district_ids=district_ids,
+                                    **user_params
+                                ),
+                                final_budjet=50000
+                            ).values_list("id", flat=True)
+                        )
+                    )
+                    # User in several of the districts is listed once
+                    self.assertEqual(len(user_ids), len(set(user_ids)))
+
+    def test_owners_match_joined_filter(self) -> None:
+        district_ids: Set[int] = {self.districts[1].id, self.districts[2].id}
+        self.assertEqual(
+            list(
+                CustomUser.objects.filter(
+                    get_districts_exists(district_ids=district_ids) |
+                    ~get_districts_exists(district_ids=None)
+                ).values_list("id", flat=True)
+            ),
+            list(
+                CustomUser.objects.filter(
+                    Q(districts__in=district_ids) |
+                    Q(districts__isnull=True)
+                ).distinct().values_list("id", flat=True)
+            )
+        )
+
+    def __get_top_plan_nodes(self, plan: str) -> List[str]:
+        """Get PostgreSQL plan nodes above the first scan or join."""
+        nodes: List[str] = []
+        line: str
+        for line in plan.upper().splitlines():
+            if nodes and "->" not in line:
+                continue
+            node: str = line.split("->")[-1].split("  (")[0].strip()
+            if "SCAN" in node or "JOIN" in node or "NESTED LOOP" in node:
+                break
+            nodes.append(node)
+        return nodes
+
+    def __check_sqlite_plans(self, queryset: QuerySet[CustomUser]) -> None:
+        """Check plans of the districts and budjet filters in SQLite."""
+        plan: str = queryset.explain().upper()
+        self.assertIn("CORRELATED", plan)
+        self.assertNotIn("DISTINCT", plan)
+        # The former filter needed a temporary b-tree to drop duplicates
+        self.assertIn(
+            "DISTINCT",
+            self.__get_joined_queryset(
+                district_ids=[district.id for district in self.districts]
+            ).explain().upper()
+        )
+        # Budjet variant is chosen by the scalar subquery run only once
+        budjet_plan: List[str] = filter_by_budjet(
+            queryset=queryset,
+            final_budjet=50000
+        ).explain().upper().splitlines()
+        self.assertIn(
+            "SCALAR SUBQUERY",
+            [line.split(" ", 3)[-1].rsplit(" ", 1)[0] for line in budjet_plan]
+        )
+
+    def __check_postgresql_plans(
+        self,
+        queryset: QuerySet[CustomUser]
+    ) -> None:
+        """Check plans of the districts and budjet filters in PostgreSQL."""
+        plan: str = queryset.explain().upper()
+        self.assertTrue("SEMI JOIN" in plan or "SUBPLAN" in plan, plan)
+        # Rows are not deduplicated after the users are matched
+        self.assertFalse(
+            [
+                node for node in self.__get_top_plan_nodes(plan=plan)
+                if "UNIQUE" in node or "AGGREGATE" in node
+            ],
+            plan
+        )
+        joined_plan: str = self.__get_joined_queryset(
+            district_ids=[district.id for district in self.districts]
+        ).explain().upper()
+        self.assertTrue(
+            [
+                node for node in self.__get_top_plan_nodes(plan=joined_plan)
+                if "UNIQUE" in node or "AGGREGATE" in node
+            ],
+            joined_plan
+        )
+        # Budjet variant is chosen by the init plan run only once
+        budjet_plan: str = filter_by_budjet(
+            queryset=queryset,
+            final_budjet=50000
+        ).explain().upper()
+        self.assertIn("INITPLAN", budjet_plan)
+
+    def test_plan_has_no_join_and_distinct(self) -> None:
+        queryset: QuerySet[CustomUser] = get_matched_queryset(
+            district_ids=[district.id for district in self.districts]
+        )
+        sql: str = str(queryset.query).upper()
+        self.assertIn("EXISTS", sql)
+        self.assertNotIn("JOIN", sql)
+        self.assertNotIn("DISTINCT", sql)
+        if connection.vendor == "sqlite":
+            self.__check_sqlite_plans(queryset=queryset)
+        elif connection.vendor == "postgresql":
+            self.__check_postgresql_plans(queryset=queryset)
+        else:
+            self.skipTest("Plans are checked in SQLite and PostgreSQL")
+
+
+@override_settings(
+    AUTHS_RECOMMENDATIONS_TOP_K=2,
+    AUTHS_RECOMMENDATIONS_ASYNC=False
+)
+class RecommendationsRefreshTests(AuthsTestCase):
+    """Tests of the stored recommendations refreshed on user changes."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.owner: CustomUser = self.create_user(
+            month_budjet=30000,
+            districts=self.districts[:1],
+            hobbies=self.hobbies[:2]
+        )
+        self.candidates: List[CustomUser] = [
+            self.create_user(
+                month_budjet=month_budjet,
+                gender=gender,
+                districts=self.districts[:2],
+                hobbies=self.hobbies[1:3]
+            )
+            for month_budjet, gender in (
+                (20000, "M"),
+                (25000, "F"),
+                (28000, "M"),
+            )
+        ]
+        self.other_owner: CustomUser = self.create_user(
+            month_budjet=10000,
+            districts=self.districts[1:2]
+        )
+        self.homeless_owner: CustomUser = self.create_user(
+            month_budjet=40000
+        )
+        save_recommendations(
+            rows=[
+                (user.id, *compute_recommendation(user=user))
+                for user in CustomUser.objects.all()
+            ]
+        )
+
+    def __assert_equal_to_rebuild(self) -> None:
+        """Check that every stored list equals the recomputed one."""
+        recommendation: CustomUserRecommendation
+        for recommendation in CustomUserRecommendation.objects.all():
+            with self.subTest(user_id=recommendation.user_id):
+                self.assertEqual(
+                    (recommendation.candidate_ids, recommendation.scores),
+                    compute_recommendation(user=recommendation.user)
+                )
+
+    def test_removed_candidate_is_backfilled(self) -> None:
+        removed: CustomUser = self.candidates[2]
+        self.assertIn(
+            removed.id,
+            self.owner.recommendation.candidate_ids
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            removed.deactivate()
+        self.owner.recommendation.refresh_from_db()
+        self.assertEqual(len(self.owner.recommendation.candidate_ids), 2)
+        self.assertNotIn(removed.id, self.owner.recommendation.candidate_ids)
+        self.__assert_equal_to_rebuild()
+
+    def test_widened_list_takes_strict_match(self) -> None:
+        # Nobody fits even the 20% wider budjet of this owner yet
+        self.assertEqual(
+            self.other_owner.recommendation.candidate_ids,
+            []
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_owner.month_budjet = 17000
+            self.other_owner.save()
+        self.other_owner.recommendation.refresh_from_db()
+        # The list is built from the widened budjet now
+        self.assertEqual(
+            self.other_owner.recommendation.candidate_ids,
+            [self.candidates[0].id]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_user(month_budjet=9000, districts=self.districts[1:2])
+        self.__assert_equal_to_rebuild()
+        self.other_owner.recommendation.refresh_from_db()
+        # Strict match drops the candidate of the widened budjet
+        self.assertEqual(len(self.other_owner.recommendation.candidate_ids), 1)
+
+    def test_changes_of_districts_and_budjets_match_rebuild(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            self.candidates[0].sync_districts(
+                district_ids=[self.districts[2].id]
+            )
+        self.__assert_equal_to_rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.candidates[1].month_budjet = 60000
+            self.candidates[1].save()
+        self.__assert_equal_to_rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.candidates[1].hobby_categories.set(self.hobbies[:2])
+        self.__assert_equal_to_rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_user(
+                month_budjet=29000,
+                districts=self.districts[:1],
+                hobbies=self.hobbies[:2]
+            )
+        self.__assert_equal_to_rebuild()
+
+    @override_settings(AUTHS_RECOMMENDATIONS_ASYNC=True)
+    def test_refresh_is_queued_once_per_user(self) -> None:
+        user: CustomUser = self.candidates[0]
+        with patch.object(
+            recommendations_worker,
+            "submit",
+            return_value=True
+        ) as submit, CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                user.month_budjet = 60000
+                user.save()
+                user.sync_districts(district_ids=[self.districts[2].id])
+        # Request thread only writes the user, the lists are left to worker
+        self.assertFalse(
+            [
+                query["sql"]
+                for query in queries
+                if CustomUserRecommendation._meta.db_table in query["sql"]
+            ]
+        )
+        submit.assert_called_once_with(
+            _refresh_pending_recommendations,
+            user.id
+        )
+        _refresh_pending_recommendations(user_id=user.id)
+        self.__assert_equal_to_rebuild()
+
+    def test_deleted_users_are_not_recommended(self) -> None:
+        candidate_ids: List[int] = self.owner.recommendation.candidate_ids
+        # Stored list isn't refreshed yet when the user is read
+        CustomUser.objects.filter(id=candidate_ids[0]).update(
+            datetime_deleted=timezone.now()
+        )
+        self.assertEqual(
+            list(
+                get_users_by_ids(user_ids=candidate_ids).values_list(
+                    "id",
+                    flat=True
+                )
+            ),
+            candidate_ids[1:]
+        )
+
+    def test_new_candidate_is_patched_without_recomputation(self) -> None:
+        with patch(
+            "auths.recommendations.compute_recommendation",
+            wraps=compute_recommendation
+        ) as compute, self.captureOnCommitCallbacks(execute=True):
+            self.create_user(
+                month_budjet=29000,
+                gender=self.owner.gender,
+                districts=self.districts[:1],
+                hobbies=self.hobbies[:2]
+            )
+        # Only the single candidate is inserted into the stored lists
+        compute.assert_not_called()
+        self.__assert_equal_to_rebuild()
+
+    def test_lowered_score_of_full_list_is_recomputed(self) -> None:
+        listed: CustomUser = CustomUser.objects.get(
+            id=self.owner.recommendation.candidate_ids[0]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            listed.hobby_categories.clear()
+            listed.gender = "F" if listed.gender == "M" else "M"
+            listed.save()
+        self.__assert_equal_to_rebuild()
+
+    def test_random_changes_match_rebuild(self) -> None:
+        random: Random = Random(7)
+        users: List[CustomUser] = list(CustomUser.objects.all())
+        step: int
+        for step in range(20):
+            user: CustomUser = random.choice(users)
+            with self.subTest(step=step), \
+                    self.captureOnCommitCallbacks(execute=True):
+                user.month_budjet = random.randrange(8000, 45000, 1000)
+                user.gender = random.choice(("M", "F"))
+                user.save()
+                user.sync_districts(
+                    district_ids=[
+                        district.id
+                        for district in random.sample(
+                            self.districts,
+                            random.randint(0, 2)
+                        )
+                    ]
+                )
+                user.hobby_categories.set(
+                    random.sample(self.hobbies, random.randint(0, 3))
+                )
+            self.__assert_equal_to_rebuild()
+
+    @override_settings(AUTHS_RECOMMENDATIONS_ASYNC=True)
+    def test_skipped_refresh_makes_lists_stale(self) -> None:
+        user: CustomUser = self.candidates[2]
+        with patch.object(
+            recommendations_worker,
+            "submit",
+            return_value=False
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                user.month_budjet = 60000
+                user.save()
+        stale_time: datetime = timezone.now() - timedelta(
+            seconds=settings.AUTHS_RECOMMENDATIONS_TIMEOUT
+        )
+        self.assertLess(
+            CustomUserRecommendation.objects.get(
+                user_id=self.owner.id
+            ).datetime_updated,
+            stale_time
+        )
+        # Next read recomputes the list without the skipped candidate
+        self.assertNotIn(
+            user.id,
+            get_recommended_queryset(user=self.owner).values_list(
+                "id",
+                flat=True
+            )
+        )
+        self.owner.recommendation.refresh_from_db()
+        self.assertEqual(
+            (
+                self.owner.recommendation.candidate_ids,
+                self.owner.recommendation.scores,
+            ),
+            compute_recommendation(user=self.owner)
+        )
+
+
+def _fail_task() -> None:
+    """Fail like a task with an unexpected error."""
+    raise RuntimeError("task failed")
+
+
+class BackgroundErrorsTests(AuthsTestCase):
+    """Tests of the errors of the background work written to the log."""
+
+    def test_failed_task_is_logged(self) -> None:
+        worker: BackgroundWorker = BackgroundWorker(
+            name="test",
+            workers_setting="AUTHS_PHOTO_WORKERS",
+            queue_size_setting="AUTHS_PHOTO_QUEUE_SIZE"
+        )
+        with self.assertLogs("auths.tasks", level="ERROR") as logs:
+            self.assertTrue(worker.submit(_fail_task))
+            worker.join()
+        self.assertIn("task failed", logs.output[0])
+
+    def test_failed_photo_download_is_logged(self) -> None:
+        user: CustomUser = self.create_user()
+        with patch.object(
+            photo_downloader,
+            "download",
+            side_effect=PhotoDownloadError("timeout")
+        ), self.assertLogs("auths.models", level="WARNING"):
+            self.assertFalse(
+                user.save_remote_image(image_url="https://example.com/1.jpg")
+            )
+
+
+def _get_jpeg_file() -> SpooledTemporaryFile:
+    """Get downloaded-like file with a small JPEG image."""
+    file: SpooledTemporaryFile = SpooledTemporaryFile()
+    Image.new("RGB", (400, 300), color=(200, 100, 50)).save(
+        file,
+        format="JPEG"
+    )
+    file.seek(0)
+    return file
+
+
+class _PhotoRequestHandler(BaseHTTPRequestHandler):
+    """Image host answering every path with its own misbehaviour."""
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Keep the output of the tests clean."""
+
+    def __send_head(self, content_type: str, length: Optional[int]) -> None:
+        """Send status and headers of the successful response."""
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if length is not None:
+            self.send_header("Content-Length", str(length))
+        self.end_headers()
+
+    def do_GET(self) -> None:
+        """Answer the request dropped by the client too."""
+        try:
+            self.__answer()
+        except ConnectionError:
+            pass
+
+    def __answer(self) -> None:
+        """Answer depending on the requested path."""
+        body: bytes = _get_jpeg_file().read()
+        if self.path == "/photo.jpg":
+            self.__send_head(content_type="image/jpeg", length=len(body))
+            self.wfile.write(body)
+        elif self.path == "/page.html":
+            self.__send_head(content_type="text/html", length=len(body))
+            self.wfile.write(body)
+        elif self.path == "/large.jpg":
+            # Length is unknown until the body is read to the end
+            self.__send_head(content_type="image/jpeg", length=None)
+            self.wfile.write(b"0" * PHOTO_MAX_SIZE * 2)
+        elif self.path == "/large-declared.jpg":
+            self.__send_head(
+                content_type="image/jpeg",
+                length=PHOTO_MAX_SIZE * 2
+            )
+        elif self.path == "/slow.jpg":
+            self.__send_head(content_type="image/jpeg", length=len(body))
+            byte: int
+            for byte in body[:100]:
+                self.wfile.write(bytes((byte,)))
+                self.wfile.flush()
+                sleep(0.05)
+        elif self.path.startswith("/redirect"):
+            self.send_response(302)
+            self.send_header(
+                "Location",
+                self.path if self.path == "/redirect-loop" else "/photo.jpg"
+            )
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            self.send_error(404)
+
+
+PHOTO_MAX_SIZE = 100 * 1024
+
+
+@override_settings(
+    AUTHS_PHOTO_MAX_SIZE=PHOTO_MAX_SIZE,
+    AUTHS_PHOTO_DOWNLOAD_TIMEOUT=1
+)
+class RemotePhotoDownloaderTests(SimpleTestCase):
+    """Tests of the downloads from the local image host."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.server: ThreadingHTTPServer = ThreadingHTTPServer(
+            ("127.0.0.1", 0),
+            _PhotoRequestHandler
+        )
+        cls.server.daemon_threads = True
+        Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+
+    def setUp(self) -> None:
+        self.downloader: RemotePhotoDownloader = RemotePhotoDownloader()
+
+    def __download(self, path: str) -> SpooledTemporaryFile:
+        """Download the file of the path from the local host."""
+        return self.downloader.download(
+            url="http://127.0.0.1:{}{}".format(
+                self.server.server_address[1],
+                path
+            )
+        )
+
+    def test_photo_is_downloaded(self) -> None:
+        file: SpooledTemporaryFile
+        with self.__download(path="/photo.jpg") as file:
+            self.assertEqual(file.read(), _get_jpeg_file().read())
+
+    def test_oversized_body_is_rejected(self) -> None:
+        path: str
+        for path in ("/large.jpg", "/large-declared.jpg"):
+            with self.subTest(path=path), \
+                    self.assertRaisesMessage(
+                        PhotoDownloadError,
+                        "Фото слишком большое"
+                    ):
+                self.__download(path=path)
+
+    def test_slow_response_is_cut_by_deadline(self) -> None:
+        started: float = monotonic()
+        with self.assertRaises(PhotoDownloadError):
+            self.__download(path="/slow.jpg")
+        # Bytes keep coming, so only the total deadline stops the download
+        self.assertLess(monotonic() - started, 3)
+
+    def test_wrong_content_type_is_rejected(self) -> None:
+        with self.assertRaisesMessage(PhotoDownloadError, "text/html"):
+            self.__download(path="/page.html")
+
+    def test_redirects_are_limited(self) -> None:
+        file: SpooledTemporaryFile
+        with self.__download(path="/redirect") as file:
+            self.assertEqual(file.read(), _get_jpeg_file().read())
+        with self.assertRaises(PhotoDownloadError):
+            self.__download(path="/redirect-loop")
+
+
+@override_settings(AUTHS_PHOTO_ASYNC=True)
+class PhotoTestCase(AuthsTestCase):
+    """Test case keeping the saved photos in a temporary directory."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.media_dir: TemporaryDirectory = TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        media_override: override_settings = override_settings(
+            MEDIA_ROOT=self.media_dir.name
+        )
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+
+class UserValidatorsTests(PhotoTestCase):
+    """Tests of the ETag and Last-Modified of the user's representation."""
+
+    def test_saves_of_listed_fields_change_etag(self) -> None:
+        viewer: CustomUser = self.create_user()
+        user: CustomUser = self.create_user()
+        headers: Dict[str, str] = {
+            "HTTP_AUTHORIZATION": "JWT {}".format(
+                RefreshToken.for_user(user=viewer).access_token
+            ),
+        }
+        url: str = f"/api/v1/auths/users/{user.id}"
+        etag: str = self.client.get(url, **headers)["ETag"]
+        change: Callable[[], Any]
+        for change in (
+            user.confirm_account,
+            lambda: update_last_login(sender=None, user=user),
+        ):
+            change()
+            response: Any = self.client.get(
+                url,
+                HTTP_IF_NONE_MATCH=etag,
+                **headers
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["ETag"], etag)
+            etag = response["ETag"]
+        self.assertTrue(response.data["data"]["is_confirmed_account"])
+
+    def test_photo_attached_in_background_changes_etag(self) -> None:
+        with self.captureOnCommitCallbacks() as callbacks:
+            response: Any = self.client.post(
+                "/api/v1/auths/users/register_user",
+                data={
+                    "email": "new@mail.ru",
+                    "phone": "+77010000001",
+                    "first_name": "New",
+                    "telegram_username": "new_user",
+                    "gender": "M",
+                    "month_budjet": 50000,
+                    "password": "12345",
+                    "photo_url": "https://example.com/new.jpg",
+                },
+                content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 200)
+        etag: str = response["ETag"]
+        headers: Dict[str, str] = {
+            "HTTP_AUTHORIZATION": f"JWT {response.data['access']}",
+        }
+        url: str = "/api/v1/auths/users/{}".format(
+            CustomUser.objects.get(email="new@mail.ru").id
+        )
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag, **headers)
+            .status_code,
+            304
+        )
+        with patch.object(
+            photo_downloader,
+            "download",
+            return_value=_get_jpeg_file()
+        ), patch.object(
+            photo_worker,
+            "submit",
+            side_effect=lambda function, *args: function(*args)
+        ), self.captureOnCommitCallbacks(execute=True):
+            callback: Callable[[], Any]
+            for callback in callbacks:
+                callback()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertTrue(response.data["data"]["photo"])
+
+
+class PhotoVariantsTests(PhotoTestCase):
+    """Tests of the generated photo variants and their urls."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.user: CustomUser = self.create_user()
+        with self.captureOnCommitCallbacks() as self.callbacks:
+            self.__save_photo(user=self.user, name="first.jpg")
+
+    def __save_photo(self, user: CustomUser, name: str) -> None:
+        """Replace the photo of the user with a new JPEG image."""
+        with _get_jpeg_file() as file:
+            user.photo.save(name=name, content=File(file))
+
+    def __get_photo_urls(self) -> Tuple[str, str]:
+        """Get thumbnail urls of the model and values serializers."""
+        context: Dict[str, Any] = {"photo_variant": "thumbnail"}
+        return (
+            CustomUserDetailSerializer(
+                CustomUser.objects.get(id=self.user.id),
+                context=context
+            ).data["photo"],
+            CustomUserValuesSerializer(
+                CustomUser.objects.filter(id=self.user.id).values(
+                    *CustomUserValuesSerializer.VALUE_FIELDS
+                ).first(),
+                context=context
+            ).data["photo"],
+        )
+
+    def test_original_url_is_used_until_variants_are_generated(self) -> None:
+        self.assertEqual(
+            self.__get_photo_urls(),
+            (self.user.photo.url, self.user.photo.url)
+        )
+        callback: Callable[[], Any]
+        with patch.object(
+            photo_worker,
+            "submit",
+            side_effect=lambda function, *args: function(*args)
+        ):
+            for callback in self.callbacks:
+                callback()
+        thumbnail_url: str = get_variant_url(
+            photo=self.user.photo,
+            variant="thumbnail"
+        )
+        self.assertNotEqual(thumbnail_url, self.user.photo.url)
+        self.assertEqual(
+            self.__get_photo_urls(),
+            (thumbnail_url, thumbnail_url)
+        )
+
+    def test_variants_are_scheduled_only_for_changed_photo(self) -> None:
+        user: CustomUser = CustomUser.objects.get(id=self.user.id)
+        with patch(
+            "auths.signals.schedule_photo_variants"
+        ) as schedule_photo_variants:
+            with patch.object(user.photo.storage, "exists") as exists:
+                user.month_budjet = 60000
+                user.save()
+            exists.assert_not_called()
+            schedule_photo_variants.assert_not_called()
+            self.__save_photo(user=user, name="second.jpg")
+            schedule_photo_variants.assert_called_once_with(user_id=user.id)
+            user.save()
+            schedule_photo_variants.assert_called_once()
+
+
+class UserValuesSerializerTests(PhotoTestCase):
+    """Tests of the list serializer working with the values() rows."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        other_city: City = City.objects.create(
+            name="Астана",
+            datetime_deleted=timezone.now()
+        )
+        self.districts.append(
+            District.objects.create(
+                name="Район Астаны",
+                city=other_city,
+                datetime_deleted=timezone.now()
+            )
+        )
+        photo_user: CustomUser = self.create_user(
+            gender="F",
+            districts=self.districts[2:],
+            comment="Комментарий",
+            telegram_user_id="12345",
+            last_login=timezone.now()
+        )
+        with self.captureOnCommitCallbacks() as callbacks, \
+                _get_jpeg_file() as file:
+            photo_user.photo.save(name="photo.jpg", content=File(file))
+        with patch.object(
+            photo_worker,
+            "submit",
+            side_effect=lambda function, *args: function(*args)
+        ):
+            callback: Callable[[], Any]
+            for callback in callbacks:
+                callback()
+        no_variants_user: CustomUser = self.create_user(
+            districts=self.districts[:1]
+        )
+        with _get_jpeg_file() as file:
+            no_variants_user.photo.save(name="new.jpg", content=File(file))
+        self.create_user(districts=self.districts, is_superuser=True)
+        self.create_user(datetime_deleted=timezone.now())
+
+    def test_representation_equals_model_serializer(self) -> None:
+        request: Any = RequestFactory().get("/api/v1/auths/users")
+        photo_variant: Optional[str]
+        for photo_variant in (None, "thumbnail", "unknown"):
+            context: Dict[str, Any] = {
+                "request": request,
+                "photo_variant": photo_variant,
+            }
+            with self.subTest(photo_variant=photo_variant):
+                self.assertEqual(
+                    CustomUserValuesSerializer(
+                        CustomUser.objects.values(
+                            *CustomUserValuesSerializer.VALUE_FIELDS
+                        ),
+                        many=True,
+                        context=context
+                    ).data,
+                    CustomUserListSerializer(
+                        CustomUser.objects.prefetch_related(
+                            "districts",
+                            "districts__city"
+                        ),
+                        many=True,
+                        context=context
+                    ).data
+                )
+
+
+    def test_storage_is_not_asked_for_variants(self) -> None:
+        context: Dict[str, Any] = {"photo_variant": "thumbnail"}
+        with patch.object(
+            CustomUser._meta.get_field("photo").storage,
+            "exists"
+        ) as exists:
+            photos: List[str] = [
+                row["photo"]
+                for row in CustomUserValuesSerializer(
+                    CustomUser.objects.values(
+                        *CustomUserValuesSerializer.VALUE_FIELDS
+                    ),
+                    many=True,
+                    context=context
+                ).data
+                if row["photo"]
+            ]
+            CustomUserListSerializer(
+                CustomUser.objects.all(),
+                many=True,
+                context=context
+            ).data
+        exists.assert_not_called()
+        # Only the photo with generated variants is given as the thumbnail
+        self.assertEqual(
+            sorted("__thumbnail" in photo for photo in photos),
+            [False, True]
+        )
+
+class LoginIdentifiersTests(AuthsTestCase):
+    """Tests of the login by canonical email, phone or telegram username."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.user: CustomUser = self.create_user()
+
+    def __login(self, login_data: str) -> Any:
+        """Request the login with the password of the created users."""
+        return self.client.post(
+            "/api/v1/auths/users/login",
+            data={"login_data": login_data, "password": "12345"},
+            content_type="application/json"
+        )
+
+    def test_canonical_identifiers_are_matched(self) -> None:
+        login_data: str
+        for login_data in (
+            "USER1@mail.ru",
+            "87010000001",
+            "@User1",
+        ):
+            with self.subTest(login_data=login_data):
+                self.assertEqual(
+                    CustomUser.objects.get_by_email_phone_telegram(
+                        phone_email_telegram=login_data
+                    ),
+                    self.user
+                )
+
+    def test_ambiguous_identifier_is_refused(self) -> None:
+        other_user: CustomUser = self.create_user()
+        other_user.phone = "87010000001"
+        other_user.save()
+        with self.assertLogs("auths.models", level="WARNING"), \
+                self.assertRaises(AmbiguousLoginError):
+            CustomUser.objects.get_by_email_phone_telegram(
+                phone_email_telegram="+77010000001"
+            )
+        with self.assertLogs("auths.models", level="WARNING"):
+            self.assertEqual(
+                self.__login(login_data="+7 701 000 00 01").status_code,
+                409
+            )
+        self.assertEqual(self.__login(login_data="user1").status_code, 200)
+
+    def test_unfilled_canonical_identifiers_fall_back_to_raw(self) -> None:
+        CustomUser.objects.filter(id=self.user.id).update(
+            canonical_email=None,
+            canonical_phone=None,
+            canonical_telegram_username=None
+        )
+        login_data: str
+        for login_data in (
+            self.user.email,
+            self.user.phone,
+            self.user.telegram_username,
+        ):
+            with self.subTest(login_data=login_data):
+                self.assertEqual(
+                    CustomUser.objects.get_by_email_phone_telegram(
+                        phone_email_telegram=login_data
+                    ),
+                    self.user
+                )
+        self.assertEqual(
+            self.__login(login_data=self.user.phone).status_code,
+            200
+        )
+
+    def test_canonical_duplicates_are_not_registered(self) -> None:
+        field_name: str
+        value: str
+        for field_name, value in (
+            ("email", "USER1@mail.ru"),
+            ("phone", "87010000001"),
+            ("telegram_username", "@User1"),
+        ):
+            with self.subTest(field_name=field_name):
+                data: Dict[str, Any] = {
+                    "email": "new@mail.ru",
+                    "phone": "+77020000001",
+                    "first_name": "New",
+                    "telegram_username": "new_user",
+                    "gender": "M",
+                    "month_budjet": 50000,
+                    "password": "12345",
+                    field_name: value,
+                }
+                response: Any = self.client.post(
+                    "/api/v1/auths/users/register_user",
+                    data=data,
+                    content_type="application/json"
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.data), [field_name])
+        self.assertEqual(CustomUser.objects.count(), 1)
+
+    def test_canonical_duplicates_are_not_updated(self) -> None:
+        other_user: CustomUser = self.create_user()
+        serializer: CustomUserDetailSerializer = CustomUserDetailSerializer(
+            instance=other_user,
+            data={"email": "User1@Mail.ru", "phone": "87010000001"},
+            partial=True
+        )
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(set(serializer.errors), {"email", "phone"})
+        # Own identifiers may be entered in the other form
+        serializer = CustomUserDetailSerializer(
+            instance=self.user,
+            data={"email": "User1@Mail.ru", "phone": "87010000001"},
+            partial=True
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        # Forms of the admin site check the model itself
+        other_user.telegram_username = "@USER1"
+        with self.assertRaises(ValidationError) as context:
+            other_user.validate_unique()
+        self.assertEqual(
+            list(context.exception.message_dict),
+            ["telegram_username"]
+        )
+        other_user.validate_unique(exclude=["telegram_username"])
+
+
+class PasswordHashingTests(AuthsTestCase):
+    """Tests of the passwords hashed in the bounded pool on login."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.user: CustomUser = self.create_user()
+
+    def __login(self) -> Any:
+        """Request the login with the password of the created user."""
+        return self.client.post(
+            "/api/v1/auths/users/login",
+            data={"login_data": "user1", "password": "12345"},
+            content_type="application/json"
+        )
+
+    @override_settings(AUTHS_HASHING_WORKERS=1, AUTHS_HASHING_QUEUE_SIZE=1)
+    def test_overloaded_pool_refuses_login(self) -> None:
+        executor: HashingExecutor = HashingExecutor()
+        released: Event = Event()
+        self.addCleanup(released.set)
+        # The only worker and the only place of the queue are taken
+        executor.submit(released.wait)
+        executor.submit(released.wait)
+        with patch("auths.hashing.hashing_executor", executor):
+            response: Any = self.__login()
+            self.assertEqual(response.status_code, 503)
+            released.set()
+            self.assertEqual(self.__login().status_code, 200)
+
+    @override_settings(
+        PASSWORD_HASHERS=(
+            *FAST_PASSWORD_HASHERS,
+            "django.contrib.auth.hashers.SHA1PasswordHasher",
+        )
+    )
+    def test_outdated_hash_is_replaced_on_login(self) -> None:
+        CustomUser.objects.filter(id=self.user.id).update(
+            password=make_password("12345", hasher="sha1")
+        )
+        self.assertEqual(self.__login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(identify_hasher(self.user.password).algorithm, "md5")
+        self.assertEqual(self.__login().status_code, 200)
+
+
+class CursorPaginatorTests(AuthsTestCase):
+    """Tests of the keyset pagination by the creation time."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        users: List[CustomUser] = [self.create_user() for _ in range(11)]
+        # Several users share the creation time, so only id tells the order
+        CustomUser.objects.filter(
+            id__in=[user.id for user in users[3:8]]
+        ).update(datetime_created=users[3].datetime_created)
+        self.ordered_ids: List[int] = list(
+            CustomUser.objects.order_by(
+                "-datetime_created",
+                "-id"
+            ).values_list("id", flat=True)
+        )
+
+    def __paginate(
+        self,
+        url: str = "/api/v1/auths/users"
+    ) -> Tuple[AbstractCursorPaginator, List[int]]:
+        """Get the paginator and ids of the page of the url."""
+        paginator: AbstractCursorPaginator = AbstractCursorPaginator()
+        users: List[CustomUser] = paginator.paginate_queryset(
+            queryset=CustomUser.objects.all(),
+            request=DRF_Request(APIRequestFactory().get(url))
+        )
+        return paginator, [user.id for user in users]
+
+    def test_pages_are_traversed_without_gaps(self) -> None:
+        pages: List[List[int]] = []
+        paginator: AbstractCursorPaginator
+        ids: List[int]
+        paginator, ids = self.__paginate(
+            url="/api/v1/auths/users?page_size=3"
+        )
+        pages.append(ids)
+        self.assertIsNone(paginator.get_previous_link())
+        while paginator.get_next_link():
+            paginator, ids = self.__paginate(url=paginator.get_next_link())
+            pages.append(ids)
+        self.assertEqual(
+            [user_id for page in pages for user_id in page],
+            self.ordered_ids
+        )
+        # Previous links lead back through the same pages
+        page: List[int]
+        for page in reversed(pages[:-1]):
+            paginator, ids = self.__paginate(
+                url=paginator.get_previous_link()
+            )
+            self.assertEqual(ids, page)
+        self.assertIsNotNone(paginator.get_next_link())
+
+    def test_page_size_is_limited(self) -> None:
+        page_size: str
+        expected_size: int
+        for page_size, expected_size in (
+            ("100", AbstractCursorPaginator.max_page_size),
+            ("0", AbstractCursorPaginator.page_size),
+            ("-1", AbstractCursorPaginator.page_size),
+            ("many", AbstractCursorPaginator.page_size),
+        ):
+            with self.subTest(page_size=page_size):
+                request: DRF_Request = DRF_Request(
+                    APIRequestFactory().get(
+                        "/api/v1/auths/users",
+                        {"page_size": page_size}
+                    )
+                )
+                self.assertEqual(
+                    AbstractCursorPaginator().get_page_size(request=request),
+                    expected_size
+                )
+
+    def test_garbage_cursor_is_bad_request(self) -> None:
+        paginator: AbstractCursorPaginator = AbstractCursorPaginator()
+        cursor: str = paginator.encode_cursor(
+            position=(timezone.now(), self.ordered_ids[0])
+        )
+        garbage: str
+        for garbage in ("garbage", cursor[:-1] + "x", cursor + "x"):
+            with self.subTest(cursor=garbage):
+                with self.assertRaises(ParseError):
+                    self.__paginate(
+                        url=f"/api/v1/auths/users?cursor={garbage}"
+                    )
+        viewer: CustomUser = CustomUser.objects.first()
+        response: Any = self.client.get(
+            "/api/v1/auths/users",
+            {"pagination": "cursor", "cursor": "garbage"},
+            HTTP_AUTHORIZATION="JWT {}".format(
+                RefreshToken.for_user(user=viewer).access_token
+            )
+        )
+        self.assertEqual(response.status_code, 400)
@@ -1,4 +1,5 @@
 # Python
+from datetime import datetime
 from typing import (
     Tuple,
     Optional,
@@ -21,26 +22,31 @@ from rest_framework.permissions import (
     IsAdminUser,
 )
 from rest_framework.decorators import action
+from rest_framework.pagination import BasePagination
 from rest_framework.status import (
     HTTP_404_NOT_FOUND,
     HTTP_403_FORBIDDEN,
     HTTP_400_BAD_REQUEST,
+    HTTP_409_CONFLICT,
     HTTP_200_OK,
+    HTTP_503_SERVICE_UNAVAILABLE,
 )
 
 # Django
+from django.conf import settings
 from django.db.models import (
     QuerySet,
     Manager,
     Max,
 )
 from django.contrib.auth import login
+from django.http import HttpResponseBase
 
 # Project
 from auths.models import CustomUser
 from auths.serializers import (
     CustomUserBaseSerializer,
-    CustomUserListSerializer,
+    CustomUserValuesSerializer,
     CustomUserDetailSerializer,
     CreateCustomUserSerializer,
 )
@@ -50,14 +56,43 @@ from auths.permissions import (
     IsActiveAccount,
 )
 from auths.utils import get_valid_request_data
-from locations.models import District
+from auths.stats import get_budget_ceiling
+from auths.scoring import CompatibilityScorer
+from auths.recommendations import (
+    get_recommended_queryset,
+    get_users_by_ids,
+)
+from auths.similarity import hobby_lsh_index
+from auths.tasks import schedule_remote_photo
+from auths.identifiers import AmbiguousLoginError
+from auths.hashing import (
+    HashingOverloadError,
+    check_user_password,
+    set_user_password,
+)
+from auths.matching import (
+    get_matched_queryset,
+    filter_by_budjet,
+)
+from locations.cache import locations_reference_cache
 from abstracts.handlers import DRFResponseHandler
-from abstracts.mixins import ModelInstanceMixin
-from abstracts.paginators import AbstractPageNumberPaginator
+from abstracts.mixins import (
+    ModelInstanceMixin,
+    ConditionalResponseMixin,
+)
+from abstracts.paginators import (
+    AbstractPageNumberPaginator,
+    AbstractCursorPaginator,
+)
 from abstracts.tools import get_filled_params_dict
 
 
-class CustomUserViewSet(ModelInstanceMixin, DRFResponseHandler, ViewSet):
+class CustomUserViewSet(
+    ModelInstanceMixin,
+    ConditionalResponseMixin,
+    DRFResponseHandler,
+    ViewSet
+):
     """ViewSet for CustomUser model."""
 
     queryset: Manager = CustomUser.objects
@@ -65,6 +100,12 @@ class CustomUserViewSet(ModelInstanceMixin, DRFResponseHandler, ViewSet):
     serializer_class: CustomUserBaseSerializer = CustomUserBaseSerializer
     __user_list_params: Tuple[str] = ("gender",)
     __location_list_params: Tuple[str] = ("city",)
+    __score_sort_value: str = "score"
+    __cursor_pagination_value: str = "cursor"
+    __recommended_mode_value: str = "recommended"
+    __hashing_overload_response: Dict[str, str] = {
+        "response": "Сервер перегружен, попробуйте войти чуть позже"
+    }
 
     def get_queryset(
         self,
@@ -79,6 +120,36 @@ class CustomUserViewSet(ModelInstanceMixin, DRFResponseHandler, ViewSet):
                 is_active_account=is_active_account
             )
 
+    def __get_serializer_context(
+        self,
+        request: DRF_Request
+    ) -> Dict[str, Any]:
+        """Get serializer context with the requested photo variant."""
+        return {
+            "request": request,
+            "photo_variant": request.query_params.get("photo_variant"),
+        }
+
+    def __get_validators(self, pk: str) -> Optional[Tuple[str, datetime]]:
+        """Get ETag and Last-Modified of the user's representation."""
+        # Changed districts and generated photo variants of the user bump
+        # its datetime_updated as well
+        row: Optional[Tuple[Any, ...]] = self.get_queryset().filter(
+            pk=pk
+        ).order_by().values_list("photo", "datetime_updated").annotate(
+            districts_updated=Max("districts__datetime_updated"),
+            cities_updated=Max("districts__city__datetime_updated")
+        ).first()
+        if not row:
+            return None
+        photo_name: str
+        dates: List[Optional[datetime]]
+        photo_name, *dates = row
+        return (
+            self.get_etag(pk, photo_name, *dates),
+            max(date for date in dates if date),
+        )
+
     def __get_district_ids(
         self,
         **query_params: Dict[str, Any]
@@ -92,15 +163,10 @@ class CustomUserViewSet(ModelInstanceMixin, DRFResponseHandler, ViewSet):
             "districts",
             ""
         ).split(",")
-        district_ids: Tuple[int] = tuple((
-            District.objects.filter(
-                **location_dict_params,
-                id__in=req_districts
-            ) if req_districts[0] else District.objects.filter(
-                **location_dict_params
-                )
-        ).values_list("id", flat=True))
-        return district_ids
+        return locations_reference_cache.get_district_ids(
+            city_id=location_dict_params.get("city"),
+            district_ids=req_districts if req_districts[0] else None
+        )
 
     def get_params_queryset(
         self,
@@ -115,45 +181,26 @@ class CustomUserViewSet(ModelInstanceMixin, DRFResponseHandler, ViewSet):
 
         final_budjet: int = int(query_params.get(
             "month_budjet",
-            CustomUser.objects.get_not_deleted().filter(
-                is_active=True
-            ).aggregate(Max('month_budjet')).get("month_budjet__max", 0)
+            get_budget_ceiling()
         )) if not query_params.get("upper_budjet", False) \
             else int(
                 query_params.get(
                     "month_budjet",
-                    CustomUser.objects.get_not_deleted().filter(
-                        is_active=True
-                    ).aggregate(Max('month_budjet')).get(
-                        "month_budjet__max",
-                        0
-                    ) * 1.2
+                    get_budget_ceiling() * 1.2
                 )
             )
         district_ids: Tuple[int] = self.__get_district_ids(**query_params)
-        user_queryset: QuerySet[CustomUser] = CustomUser.objects.filter(
-            **user_dict_params,
-            month_budjet__lte=final_budjet,
-            districts__in=district_ids,
-            is_active_account=True,
-        ).exclude(
-            id=reqest.user.id
+        user_queryset: QuerySet[CustomUser] = filter_by_budjet(
+            queryset=get_matched_queryset(
+                district_ids=district_ids,
+                excluded_user_id=reqest.user.id,
+                **user_dict_params
+            ),
+            final_budjet=final_budjet
         ).prefetch_related(
             "districts",
             "districts__city",
-        ).order_by("-datetime_created").distinct()
-        if user_queryset.count() == 0:
-            user_queryset = CustomUser.objects.filter(
-                **user_dict_params,
-                month_budjet__lte=int(final_budjet*1.2),
-                districts__in=district_ids,
-                is_active_account=True
-            ).exclude(
-                id=reqest.user.id
-            ).prefetch_related(
-                "districts",
-                "districts__city",
-            ).order_by("-datetime_created").distinct()
+        ).order_by("-datetime_created")
         return user_queryset
 
     def list(
@@ -168,18 +215,51 @@ class CustomUserViewSet(ModelInstanceMixin, DRFResponseHandler, ViewSet):
             single_keys=(
                 "gender", "month_budjet",
                 "city", "districts",
+                "sort", "pagination",
+                "mode",
+            )
+        )
+        if validated_params.get("mode") == self.__recommended_mode_value:
+            return self.get_drf_response(
+                request=request,
+                data=get_recommended_queryset(user=request.user).values(
+                    *CustomUserValuesSerializer.VALUE_FIELDS
+                ),
+                serializer_class=CustomUserValuesSerializer,
+                many=True,
+                paginator=AbstractPageNumberPaginator(),
+                serializer_context=self.__get_serializer_context(
+                    request=request
+                ),
             )
+        user_queryset: QuerySet[CustomUser] = self.get_params_queryset(
+            reqest=request,
+            # **request.query_params
+            **validated_params
         )
+        paginator: BasePagination = AbstractCursorPaginator() \
+            if validated_params.get("pagination") == \
+            self.__cursor_pagination_value \
+            else AbstractPageNumberPaginator()
+        if validated_params.get("sort") == self.__score_sort_value:
+            user_queryset = CompatibilityScorer().order_queryset(
+                queryset=user_queryset,
+                user=request.user
+            )
+            # Keyset pagination relies on ordering by datetime_created
+            paginator = AbstractPageNumberPaginator()
+        # Rows are serialized from values() with districts grouped per page
         response: DRF_Response = self.get_drf_response(
             request=request,
-            data=self.get_params_queryset(
-                reqest=request,
-                # **request.query_params
-                **validated_params
+            data=user_queryset.prefetch_related(None).values(
+                *CustomUserValuesSerializer.VALUE_FIELDS
             ),
-            serializer_class=CustomUserListSerializer,
+            serializer_class=CustomUserValuesSerializer,
             many=True,
-            paginator=AbstractPageNumberPaginator(),
+            paginator=paginator,
+            serializer_context=self.__get_serializer_context(
+                request=request
+            ),
         )
         return response
 
@@ -191,6 +271,17 @@ class CustomUserViewSet(ModelInstanceMixin, DRFResponseHandler, ViewSet):
         **kwargs: Dict[str, Any]
     ) -> DRF_Response:
         """Handle GET-request with provided ID to get user."""
+        validators: Optional[Tuple[str, datetime]] = self.__get_validators(
+            pk=pk
+        )
+        if validators:
+            not_modified_response: Optional[HttpResponseBase] = \
+                self.get_not_modified_response(
+                    request,
+                    *validators
+                )
+            if not_modified_response:
+                return not_modified_response
         obj: Optional[CustomUser] = self.get_queryset_instance(
             class_name=CustomUser,
             queryset=self.get_queryset().prefetch_related(
@@ -206,10 +297,58 @@ class CustomUserViewSet(ModelInstanceMixin, DRFResponseHandler, ViewSet):
                 },
                 status=HTTP_404_NOT_FOUND
             )
-        return self.get_drf_response(
+        response: DRF_Response = self.get_drf_response(
             request=request,
             data=obj,
-            serializer_class=CustomUserDetailSerializer
+            serializer_class=CustomUserDetailSerializer,
+            serializer_context=self.__get_serializer_context(
+                request=request
+            )
+        )
+        if validators:
+            self.set_conditional_headers(response, *validators)
+        return response
+
+    @action(
+        methods=["GET"],
+        url_path="similar_hobbies",
+        detail=False,
+        permission_classes=(
+            IsAuthenticated,
+            IsNonDeletedUser,
+            IsActiveAccount,
+        )
+    )
+    def similar_hobbies(
+        self,
+        request: DRF_Request,
+        *args: Tuple[Any],
+        **kwargs: Dict[Any, Any]
+    ) -> DRF_Response:
+        """Handle GET-request to get users with the most similar hobbies."""
+        hobby_lsh_index.ensure_loaded()
+        similar_ids: List[int] = [
+            user_id
+            for user_id, _ in hobby_lsh_index.query(
+                hobby_ids=request.user.hobby_categories.values_list(
+                    "id",
+                    flat=True
+                ),
+                top_n=settings.AUTHS_HOBBY_SIMILAR_TOP_N,
+                excluded_user_id=request.user.id
+            )
+        ]
+        return self.get_drf_response(
+            request=request,
+            data=get_users_by_ids(user_ids=similar_ids).values(
+                *CustomUserValuesSerializer.VALUE_FIELDS
+            ),
+            serializer_class=CustomUserValuesSerializer,
+            many=True,
+            paginator=AbstractPageNumberPaginator(),
+            serializer_context=self.__get_serializer_context(
+                request=request
+            ),
         )
 
     @action(
@@ -225,11 +364,14 @@ class CustomUserViewSet(ModelInstanceMixin, DRFResponseHandler, ViewSet):
         **kwargs: Dict[str, Any]
     ) -> DRF_Response:
         """Handle POST-request for adding districts to the user."""
-        districts: List[str] = request.data.get(
-            "districts",
-            ""
-        ).split(",")
-        if len(districts) == 0:
+        district_ids: List[int] = [
+            int(district_id)
+            for district_id in str(
+                request.data.get("districts", "")
+            ).split(",")
+            if district_id.strip().isdigit()
+        ]
+        if len(district_ids) == 0:
             return DRF_Response(
                 data={
                     "response": "Извините, но вы не предоставили "
@@ -237,10 +379,7 @@ class CustomUserViewSet(ModelInstanceMixin, DRFResponseHandler, ViewSet):
                 },
                 status=HTTP_400_BAD_REQUEST
             )
-        request.user.districts.clear()
-        request.user.districts.add(
-            *list(District.objects.filter(id__in=districts))
-        )
+        request.user.sync_districts(district_ids=district_ids)
         return DRF_Response(
             data={
                 "response": "Выбранные вами районы успешно добавлены",
@@ -302,12 +441,22 @@ class CustomUserViewSet(ModelInstanceMixin, DRFResponseHandler, ViewSet):
                 **resulted_data,
                 is_staff=is_staff
             )
+            try:
+                set_user_password(
+                    user=new_cust_user,
+                    raw_password=new_password
+                )
+            except HashingOverloadError:
+                return DRF_Response(
+                    data=self.__hashing_overload_response,
+                    status=HTTP_503_SERVICE_UNAVAILABLE
+                )
+            new_cust_user.save()
             if photo_url:
-                new_cust_user.save_remote_image(
+                schedule_remote_photo(
+                    user_id=new_cust_user.id,
                     image_url=photo_url
                 )
-            new_cust_user.set_password(new_password)
-            new_cust_user.save()
             login(
                 request=request,
                 user=new_cust_user
@@ -368,9 +517,18 @@ class CustomUserViewSet(ModelInstanceMixin, DRFResponseHandler, ViewSet):
                 status=HTTP_400_BAD_REQUEST
             )
 
-        custom_user: Optional[CustomUser] = \
-            CustomUser.objects.get_by_email_phone_telegram(
-                phone_email_telegram=phone_email_telegram
+        try:
+            custom_user: Optional[CustomUser] = \
+                CustomUser.objects.get_by_email_phone_telegram(
+                    phone_email_telegram=phone_email_telegram
+                )
+        except AmbiguousLoginError:
+            return DRF_Response(
+                data={
+                    "response": "Эти данные указаны у нескольких "
+                    "пользователей, войдите с помощью другого способа"
+                },
+                status=HTTP_409_CONFLICT
             )
         if not custom_user:
             return DRF_Response(
@@ -379,9 +537,16 @@ class CustomUserViewSet(ModelInstanceMixin, DRFResponseHandler, ViewSet):
                 },
                 status=HTTP_404_NOT_FOUND
             )
-        same_passwords: bool = custom_user.check_password(
-            raw_password=password
-        )
+        try:
+            same_passwords: bool = check_user_password(
+                user=custom_user,
+                raw_password=password
+            )
+        except HashingOverloadError:
+            return DRF_Response(
+                data=self.__hashing_overload_response,
+                status=HTTP_503_SERVICE_UNAVAILABLE
+            )
         if not same_passwords:
             return DRF_Response(
                 data={"response": "Вы ввели неправильный пароль"},
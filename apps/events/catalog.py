@@ -0,0 +1,89 @@
+# Python
+from datetime import (
+    datetime,
+    timezone,
+)
+from hashlib import md5
+from threading import RLock
+from typing import (
+    Optional,
+    Tuple,
+    List,
+)
+
+# Django
+from django.db.models import Prefetch
+from django.utils.http import quote_etag
+
+# Rest Framework
+from rest_framework.renderers import JSONRenderer
+
+# Project
+from events.models import (
+    Category,
+    SubCategory,
+)
+from events.serializers import CategoryCatalogSerializer
+from abstracts.cache import CacheVersion
+
+
+CATALOG_VERSION_KEY = "events:catalog_version"
+
+
+class HobbyCatalogCache:
+    """Pre-encoded JSON of the whole hobby tree with its validators."""
+
+    def __init__(self) -> None:
+        self.__lock: RLock = RLock()
+        self.__shared_version: CacheVersion = CacheVersion(
+            key=CATALOG_VERSION_KEY
+        )
+        self.__version: Optional[int] = None
+        self.__payload: bytes = b""
+        self.__etag: str = ""
+        self.__last_modified: Optional[datetime] = None
+
+    def bump_version(self) -> None:
+        """Make every process rebuild the catalog on next access."""
+        self.__shared_version.bump()
+        with self.__lock:
+            self.__version = None
+
+    def __build(self) -> None:
+        """Build the payload from non-deleted categories."""
+        categories: List[Category] = list(
+            Category.objects.get_not_deleted().order_by(
+                "name"
+            ).prefetch_related(
+                Prefetch(
+                    "sub_categories",
+                    queryset=SubCategory.objects.get_not_deleted().order_by(
+                        "name"
+                    )
+                )
+            )
+        )
+        self.__payload = JSONRenderer().render({
+            "data": CategoryCatalogSerializer(categories, many=True).data
+        })
+        self.__etag = quote_etag(md5(self.__payload).hexdigest())
+        self.__last_modified = max(
+            (
+                obj.datetime_updated
+                for category in categories
+                for obj in (category, *category.sub_categories.all())
+            ),
+            default=datetime.fromtimestamp(0, tz=timezone.utc)
+        )
+
+    def get(self) -> Tuple[bytes, str, datetime]:
+        """Get payload, ETag and Last-Modified of the catalog."""
+        version: int = self.__shared_version.get()
+        with self.__lock:
+            if self.__version != version:
+                self.__build()
+                self.__version = version
+            return (self.__payload, self.__etag, self.__last_modified)
+
+
+hobby_catalog_cache: HobbyCatalogCache = HobbyCatalogCache()
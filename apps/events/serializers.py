@@ -0,0 +1,66 @@
+# Python
+from typing import (
+    Union,
+    Tuple,
+)
+
+# Rest Framework
+from rest_framework.serializers import (
+    ModelSerializer,
+    DateTimeField,
+    SerializerMethodField,
+)
+
+# Project
+from events.models import (
+    Category,
+    SubCategory,
+)
+from abstracts.serializers import AbstractDateTimeSerializer
+
+
+class SubCategoryForeignModelSerializer(
+    AbstractDateTimeSerializer,
+    ModelSerializer
+):
+    """SubCategoryForeignModelSerializer."""
+
+    is_deleted: SerializerMethodField = AbstractDateTimeSerializer.is_deleted
+    datetime_created: DateTimeField = \
+        AbstractDateTimeSerializer.datetime_created
+
+    class Meta:
+        """Customization for the serializer."""
+
+        model: SubCategory = SubCategory
+        fields: Union[Tuple[str], str] = (
+            "id",
+            "name",
+            "datetime_created",
+            "is_deleted",
+        )
+
+
+class CategoryCatalogSerializer(
+    AbstractDateTimeSerializer,
+    ModelSerializer
+):
+    """Serializer for the category with its sub-categories."""
+
+    is_deleted: SerializerMethodField = AbstractDateTimeSerializer.is_deleted
+    datetime_created: DateTimeField = \
+        AbstractDateTimeSerializer.datetime_created
+    sub_categories: SubCategoryForeignModelSerializer = \
+        SubCategoryForeignModelSerializer(many=True)
+
+    class Meta:
+        """Customization for the serializer."""
+
+        model: Category = Category
+        fields: Union[Tuple[str], str] = (
+            "id",
+            "name",
+            "sub_categories",
+            "datetime_created",
+            "is_deleted",
+        )
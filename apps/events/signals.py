@@ -0,0 +1,35 @@
+# Python
+from typing import (
+    Dict,
+    Any,
+)
+
+# Django
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+)
+from django.dispatch import receiver
+
+# Project
+from events.models import (
+    Category,
+    SubCategory,
+)
+from events.catalog import hobby_catalog_cache
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+def bump_catalog_version(
+    sender: Model,
+    instance: Model,
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Make hobby catalog rebuild after categories are changed."""
+    # Bumped before the commit, the version could be taken by the old rows
+    transaction.on_commit(hobby_catalog_cache.bump_version)
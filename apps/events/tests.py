@@ -1,3 +1,77 @@
-from django.test import TestCase
+# Python
+import json
+from datetime import datetime
+from typing import (
+    List,
+    Any,
+)
 
-# Create your tests here.
+# Project
+from abstracts.cache import CacheVersion
+from abstracts.testing import SharedCacheTestCase
+from events.catalog import (
+    CATALOG_VERSION_KEY,
+    HobbyCatalogCache,
+)
+from events.models import (
+    Category,
+    SubCategory,
+)
+
+
+def _bump_catalog_version() -> None:
+    """Bump version of the catalog like another worker does."""
+    HobbyCatalogCache().bump_version()
+
+
+class HobbyCatalogCacheTests(SharedCacheTestCase):
+    """Tests of the pre-encoded hobby catalog."""
+
+    def __get_names(self, catalog_cache: HobbyCatalogCache) -> List[str]:
+        """Get names of the subcategories in the catalog payload."""
+        payload: bytes = catalog_cache.get()[0]
+        return sorted(
+            sub_category["name"]
+            for category in json.loads(payload)["data"]
+            for sub_category in category["sub_categories"]
+        )
+
+    def test_bump_in_other_process_rebuilds_catalog(self) -> None:
+        category: Category = Category.objects.create(name="Спорт")
+        SubCategory.objects.create(name="Бег", main_category=category)
+        catalog_cache: HobbyCatalogCache = HobbyCatalogCache()
+        self.assertEqual(
+            self.__get_names(catalog_cache=catalog_cache),
+            ["Бег"]
+        )
+        # update() sends no signals, so this process keeps its payload
+        SubCategory.objects.filter(name="Бег").update(name="Плавание")
+        self.assertEqual(
+            self.__get_names(catalog_cache=catalog_cache),
+            ["Бег"]
+        )
+        self.run_in_other_process(target=_bump_catalog_version)
+        self.assertEqual(
+            self.__get_names(catalog_cache=catalog_cache),
+            ["Плавание"]
+        )
+
+    def test_version_is_bumped_after_commit(self) -> None:
+        shared_version: CacheVersion = CacheVersion(key=CATALOG_VERSION_KEY)
+        version: int = shared_version.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name="Музыка")
+            # Others would cache the old rows under the version bumped here
+            self.assertEqual(shared_version.get(), version)
+        self.assertNotEqual(shared_version.get(), version)
+
+    def test_empty_catalog_is_modified_at_aware_epoch(self) -> None:
+        last_modified: datetime = HobbyCatalogCache().get()[2]
+        self.assertIsNotNone(last_modified.tzinfo)
+        self.assertEqual(last_modified.timestamp(), 0)
+        response: Any = self.client.get("/api/v1/events/categories")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["Last-Modified"],
+            "Thu, 01 Jan 1970 00:00:00 GMT"
+        )
@@ -1,3 +1,63 @@
-from django.shortcuts import render
+# Python
+from datetime import datetime
+from typing import (
+    Optional,
+    Tuple,
+    Dict,
+    Any,
+)
 
-# Create your views here.
+# Rest Framework
+from rest_framework.viewsets import ViewSet
+from rest_framework.request import Request as DRF_Request
+from rest_framework.response import Response as DRF_Response
+from rest_framework.permissions import AllowAny
+
+# Django
+from django.db.models import Manager
+from django.http import (
+    HttpResponse,
+    HttpResponseBase,
+)
+
+# Project
+from events.models import Category
+from events.catalog import hobby_catalog_cache
+from abstracts.mixins import ConditionalResponseMixin
+
+
+class CategoryViewSet(ConditionalResponseMixin, ViewSet):
+    """ViewSet for the catalog of Category and SubCategory models."""
+
+    queryset: Manager = Category.objects
+    permission_classes: Tuple[Any] = (AllowAny,)
+
+    def list(
+        self,
+        request: DRF_Request,
+        *args: Tuple[Any],
+        **kwargs: Dict[Any, Any]
+    ) -> DRF_Response:
+        """Handle GET-request to provide the whole hobby catalog."""
+        payload: bytes
+        etag: str
+        last_modified: datetime
+        payload, etag, last_modified = hobby_catalog_cache.get()
+        not_modified_response: Optional[HttpResponseBase] = \
+            self.get_not_modified_response(
+                request=request,
+                etag=etag,
+                last_modified=last_modified
+            )
+        if not_modified_response:
+            return not_modified_response
+        # Payload is already encoded, so it skips the renderers
+        response: HttpResponse = HttpResponse(
+            content=payload,
+            content_type="application/json"
+        )
+        return self.set_conditional_headers(
+            response=response,
+            etag=etag,
+            last_modified=last_modified
+        )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class LocationsConfig(AppConfig):
     name = 'locations'
     verbose_name: str = "Локации"
+
+    def ready(self) -> None:
+        """Connect signal handlers of the application."""
+        import locations.signals  # noqa
@@ -0,0 +1,126 @@
+# Python
+from threading import RLock
+from typing import (
+    Optional,
+    Iterable,
+    Tuple,
+    List,
+    Dict,
+    Any,
+)
+
+# Project
+from locations.models import (
+    District,
+    City,
+)
+from locations.serializers import (
+    CityForeignModelSerializer,
+    DistrictForeignModelSerializer,
+)
+from abstracts.cache import CacheVersion
+
+
+REFERENCE_VERSION_KEY = "locations:reference_version"
+
+
+class LocationsReferenceCache:
+    """In-process copy of cities and districts bound to a shared version."""
+
+    def __init__(self) -> None:
+        self.__lock: RLock = RLock()
+        self.__shared_version: CacheVersion = CacheVersion(
+            key=REFERENCE_VERSION_KEY
+        )
+        self.__version: Optional[int] = None
+        self.__cities: List[Dict[str, Any]] = []
+        self.__city_districts: Dict[int, List[Dict[str, Any]]] = {}
+        self.__district_city_ids: Dict[int, int] = {}
+
+    def bump_version(self) -> None:
+        """Make every process reload the reference data on next access."""
+        self.__shared_version.bump()
+        with self.__lock:
+            self.__version = None
+
+    def __load(self) -> None:
+        """Load the reference data from the database."""
+        cities: List[Dict[str, Any]] = [
+            dict(city)
+            for city in CityForeignModelSerializer(
+                City.objects.get_not_deleted(),
+                many=True
+            ).data
+        ]
+        city_districts: Dict[int, List[Dict[str, Any]]] = {
+            city["id"]: [] for city in cities
+        }
+        district_city_ids: Dict[int, int] = {}
+        district: District
+        for district in District.objects.select_related("city"):
+            # Deleted districts are still resolved by the users list
+            district_city_ids[district.id] = district.city_id
+            if not district.datetime_deleted and \
+                    district.city_id in city_districts:
+                city_districts[district.city_id].append(
+                    dict(DistrictForeignModelSerializer(district).data)
+                )
+        self.__cities = cities
+        self.__city_districts = city_districts
+        self.__district_city_ids = district_city_ids
+
+    def __ensure_loaded(self) -> None:
+        """Reload the reference data if its version is changed."""
+        version: int = self.__shared_version.get()
+        with self.__lock:
+            if self.__version == version:
+                return
+            self.__load()
+            self.__version = version
+
+    def get_cities(self) -> List[Dict[str, Any]]:
+        """Get represented non-deleted cities."""
+        self.__ensure_loaded()
+        return self.__cities
+
+    def get_city_districts(
+        self,
+        city_id: Any
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Get represented districts of the city or None if there is none."""
+        self.__ensure_loaded()
+        return self.__city_districts.get(self.__get_id(value=city_id))
+
+    def get_district_ids(
+        self,
+        city_id: Optional[Any] = None,
+        district_ids: Optional[Iterable[Any]] = None
+    ) -> Tuple[int]:
+        """Get ids of the districts filtered by the city and provided ids."""
+        self.__ensure_loaded()
+        found_ids: Iterable[int] = self.__district_city_ids
+        if district_ids is not None:
+            found_ids = {
+                self.__get_id(value=district_id)
+                for district_id in district_ids
+            }
+        return tuple(
+            district_id
+            for district_id in found_ids
+            if district_id in self.__district_city_ids and (
+                city_id is None or
+                self.__district_city_ids[district_id] ==
+                self.__get_id(value=city_id)
+            )
+        )
+
+    def __get_id(self, value: Any) -> Optional[int]:
+        """Get id from the request value or None if it's not valid."""
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+
+locations_reference_cache: LocationsReferenceCache = \
+    LocationsReferenceCache()
@@ -0,0 +1,35 @@
+# Python
+from typing import (
+    Dict,
+    Any,
+)
+
+# Django
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+)
+from django.dispatch import receiver
+
+# Project
+from locations.models import (
+    District,
+    City,
+)
+from locations.cache import locations_reference_cache
+
+
+@receiver(post_save, sender=City)
+@receiver(post_save, sender=District)
+@receiver(post_delete, sender=City)
+@receiver(post_delete, sender=District)
+def bump_reference_version(
+    sender: Model,
+    instance: Model,
+    **kwargs: Dict[str, Any]
+) -> None:
+    """Make cached cities and districts reload after they are changed."""
+    # Bumped before the commit, the version could be taken by the old rows
+    transaction.on_commit(locations_reference_cache.bump_version)
@@ -1,3 +1,103 @@
-from django.test import TestCase
+# Python
+from typing import (
+    List,
+    Dict,
+    Any,
+)
 
-# Create your tests here.
+# Django
+from django.core.checks import CheckMessage
+from django.test import (
+    TestCase,
+    override_settings,
+)
+
+# Project
+from abstracts.checks import check_shared_cache
+from abstracts.cache import CacheVersion
+from abstracts.testing import (
+    FILE_BASED_CACHE,
+    SharedCacheTestCase,
+)
+from locations.cache import (
+    REFERENCE_VERSION_KEY,
+    LocationsReferenceCache,
+)
+from locations.models import City
+
+
+LOCMEM_CACHE = "django.core.cache.backends.locmem.LocMemCache"
+
+
+def _bump_reference_version() -> None:
+    """Bump version of the reference data like another worker does."""
+    LocationsReferenceCache().bump_version()
+
+
+class LocationsReferenceCacheTests(SharedCacheTestCase):
+    """Tests of the in-process copy of cities and districts."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        City.objects.create(name="Алматы")
+
+    def __get_city_names(
+        self,
+        reference_cache: LocationsReferenceCache
+    ) -> List[str]:
+        """Get names of the cities cached by the process."""
+        cities: List[Dict[str, Any]] = reference_cache.get_cities()
+        return sorted(city["name"] for city in cities)
+
+    def test_bump_in_other_process_reloads_reference_data(self) -> None:
+        reference_cache: LocationsReferenceCache = LocationsReferenceCache()
+        self.assertEqual(
+            self.__get_city_names(reference_cache=reference_cache),
+            ["Алматы"]
+        )
+        # update() sends no signals, so this process keeps its copy
+        City.objects.filter(name="Алматы").update(name="Астана")
+        self.assertEqual(
+            self.__get_city_names(reference_cache=reference_cache),
+            ["Алматы"]
+        )
+        self.run_in_other_process(target=_bump_reference_version)
+        self.assertEqual(
+            self.__get_city_names(reference_cache=reference_cache),
+            ["Астана"]
+        )
+
+    def test_version_is_bumped_after_commit(self) -> None:
+        shared_version: CacheVersion = CacheVersion(key=REFERENCE_VERSION_KEY)
+        version: int = shared_version.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            City.objects.create(name="Астана")
+            # Others would cache the old rows under the version bumped here
+            self.assertEqual(shared_version.get(), version)
+        self.assertNotEqual(shared_version.get(), version)
+
+
+class SharedCacheCheckTests(TestCase):
+    """Tests of the check of the cache shared by the workers."""
+
+    def test_process_local_cache_fails_in_production(self) -> None:
+        with override_settings(
+            DEBUG=False,
+            CACHES={"default": {"BACKEND": LOCMEM_CACHE}}
+        ):
+            errors: List[CheckMessage] = check_shared_cache(app_configs=None)
+        self.assertEqual([error.id for error in errors], ["abstracts.E001"])
+
+    def test_shared_cache_passes(self) -> None:
+        with override_settings(
+            DEBUG=False,
+            CACHES={"default": {"BACKEND": FILE_BASED_CACHE}}
+        ):
+            self.assertEqual(check_shared_cache(app_configs=None), [])
+
+    def test_process_local_cache_is_allowed_in_debug(self) -> None:
+        with override_settings(
+            DEBUG=True,
+            CACHES={"default": {"BACKEND": LOCMEM_CACHE}}
+        ):
+            self.assertEqual(check_shared_cache(app_configs=None), [])
@@ -1,7 +1,8 @@
 # Python
 from typing import (
+    Optional,
     Tuple,
-    Union,
+    List,
     Dict,
     Any,
 )
@@ -12,6 +13,10 @@ from rest_framework.request import Request as DRF_Request
 from rest_framework.response import Response as DRF_Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.status import (
+    HTTP_200_OK,
+    HTTP_404_NOT_FOUND,
+)
 
 # Django
 from django.db.models import (
@@ -24,14 +29,9 @@ from auths.permissions import (
     IsActiveAccount,
     IsNonDeletedUser,
 )
-from locations.serializers import (
-    CityForeignModelSerializer,
-    DistrictForeignModelSerializer,
-)
-from locations.models import (
-    District,
-    City,
-)
+from locations.serializers import CityForeignModelSerializer
+from locations.models import City
+from locations.cache import locations_reference_cache
 from abstracts.handlers import DRFResponseHandler
 from abstracts.mixins import ModelInstanceMixin
 
@@ -62,11 +62,11 @@ class CityViewSet(ModelInstanceMixin, DRFResponseHandler, ViewSet):
         *args: Tuple[Any],
         **kwargs: Dict[Any, Any]
     ) -> DRF_Response:
-        return self.get_drf_response(
-            request=request,
-            data=self.get_queryset(),
-            serializer_class=CityForeignModelSerializer,
-            many=True
+        return DRF_Response(
+            data={
+                "data": locations_reference_cache.get_cities()
+            },
+            status=HTTP_200_OK
         )
 
     @action(
@@ -81,20 +81,18 @@ class CityViewSet(ModelInstanceMixin, DRFResponseHandler, ViewSet):
         *args: Tuple[str],
         **kwargs: Dict[Any, Any]
     ) -> DRF_Response:
-        city_obj: Union[City, DRF_Response] = None
-        is_present: bool = False
-        city_obj, is_present = self.get_obj_or_response(
-            request=request,
-            pk=pk,
-            class_name=City,
-            queryset=self.get_queryset()
-        )
-        if not is_present:
-            return city_obj
-        districts: QuerySet[District] = city_obj.districts.get_not_deleted()
-        return self.get_drf_response(
-            request=request,
-            data=districts.select_related("city"),
-            serializer_class=DistrictForeignModelSerializer,
-            many=True
+        districts: Optional[List[Dict[str, Any]]] = \
+            locations_reference_cache.get_city_districts(city_id=pk)
+        if districts is None:
+            return DRF_Response(
+                data={
+                    "response": f"Объект с ID: {pk} не найден или удалён"
+                },
+                status=HTTP_404_NOT_FOUND
+            )
+        return DRF_Response(
+            data={
+                "data": districts
+            },
+            status=HTTP_200_OK
         )
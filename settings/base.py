@@ -48,6 +48,8 @@ INSTALLED_APPS = DJANGO_AND_THIRD_PARTY_APPS + PROJECT_APPS
 # Middleware | Template | Validators
 #
 MIDDLEWARE = [
+    "abstracts.middleware.MetricsMiddleware",
+    "abstracts.middleware.QueryLogMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -56,6 +58,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    "abstracts.middleware.ProfilerMiddleware",
 
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
@@ -106,4 +109,26 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# ----------------------------------------------
+# Cache
+#
+# Versions of the in-process copies are shared by the workers through it
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": CACHE_LOCATION or os.path.join(
+            BASE_DIR,
+            "var",
+            "cache"
+        ),
+    }
+}
+
+# ----------------------------------------------
+# Persistent indexes
+#
+AUTHS_HOBBY_INDEX_PATH = os.path.join(BASE_DIR, "var", "hobby_lsh.index")
+AUTHS_DATASET_PATH = os.path.join(BASE_DIR, "var", "dataset.csv.gz")
+PROFILER_DIR = os.path.join(BASE_DIR, "var", "profiles")
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -14,6 +14,204 @@ SECRET_KEY = config("SECRET_KEY", cast=str)
 # Custom settings
 #
 ADMIN_SITE_URL = config("ADMIN_SITE_URL", default="admin/", cast=str)
+CACHE_BACKEND = config(
+    "CACHE_BACKEND",
+    default="django.core.cache.backends.filebased.FileBasedCache"
+)
+CACHE_LOCATION = config(
+    "CACHE_LOCATION",
+    default=""
+)
+AUTHS_BUDGET_CEILING_TIMEOUT = config(
+    "AUTHS_BUDGET_CEILING_TIMEOUT",
+    default=5 * 60,
+    cast=int
+)
+AUTHS_USER_INDEX_ENABLED = config(
+    "AUTHS_USER_INDEX_ENABLED",
+    default=False,
+    cast=bool
+)
+AUTHS_USER_INDEX_TIMEOUT = config(
+    "AUTHS_USER_INDEX_TIMEOUT",
+    default=5 * 60,
+    cast=int
+)
+AUTHS_USER_INDEX_MAX_IDS = config(
+    "AUTHS_USER_INDEX_MAX_IDS",
+    default=20000,
+    cast=int
+)
+AUTHS_RECOMMENDATIONS_TOP_K = config(
+    "AUTHS_RECOMMENDATIONS_TOP_K",
+    default=50,
+    cast=int
+)
+AUTHS_RECOMMENDATIONS_TIMEOUT = config(
+    "AUTHS_RECOMMENDATIONS_TIMEOUT",
+    default=24 * 60 * 60,
+    cast=int
+)
+AUTHS_RECOMMENDATIONS_INCREMENTAL = config(
+    "AUTHS_RECOMMENDATIONS_INCREMENTAL",
+    default=True,
+    cast=bool
+)
+AUTHS_RECOMMENDATIONS_ASYNC = config(
+    "AUTHS_RECOMMENDATIONS_ASYNC",
+    default=True,
+    cast=bool
+)
+AUTHS_RECOMMENDATIONS_WORKERS = config(
+    "AUTHS_RECOMMENDATIONS_WORKERS",
+    default=1,
+    cast=int
+)
+AUTHS_RECOMMENDATIONS_QUEUE_SIZE = config(
+    "AUTHS_RECOMMENDATIONS_QUEUE_SIZE",
+    default=1000,
+    cast=int
+)
+AUTHS_HOBBY_INDEX_ASYNC = config(
+    "AUTHS_HOBBY_INDEX_ASYNC",
+    default=True,
+    cast=bool
+)
+AUTHS_HOBBY_INDEX_WORKERS = config(
+    "AUTHS_HOBBY_INDEX_WORKERS",
+    default=1,
+    cast=int
+)
+AUTHS_HOBBY_INDEX_QUEUE_SIZE = config(
+    "AUTHS_HOBBY_INDEX_QUEUE_SIZE",
+    default=10,
+    cast=int
+)
+AUTHS_HOBBY_SIMILAR_TOP_N = config(
+    "AUTHS_HOBBY_SIMILAR_TOP_N",
+    default=50,
+    cast=int
+)
+AUTHS_HASHING_WORKERS = config(
+    "AUTHS_HASHING_WORKERS",
+    default=2,
+    cast=int
+)
+AUTHS_HASHING_QUEUE_SIZE = config(
+    "AUTHS_HASHING_QUEUE_SIZE",
+    default=16,
+    cast=int
+)
+AUTHS_HASHING_TIMEOUT = config(
+    "AUTHS_HASHING_TIMEOUT",
+    default=10,
+    cast=int
+)
+AUTHS_PHOTO_ASYNC = config(
+    "AUTHS_PHOTO_ASYNC",
+    default=True,
+    cast=bool
+)
+AUTHS_PHOTO_WORKERS = config(
+    "AUTHS_PHOTO_WORKERS",
+    default=2,
+    cast=int
+)
+AUTHS_PHOTO_QUEUE_SIZE = config(
+    "AUTHS_PHOTO_QUEUE_SIZE",
+    default=100,
+    cast=int
+)
+AUTHS_PHOTO_MAX_SIZE = config(
+    "AUTHS_PHOTO_MAX_SIZE",
+    default=5 * 1024 * 1024,
+    cast=int
+)
+AUTHS_PHOTO_CONNECT_TIMEOUT = config(
+    "AUTHS_PHOTO_CONNECT_TIMEOUT",
+    default=3,
+    cast=int
+)
+AUTHS_PHOTO_DOWNLOAD_TIMEOUT = config(
+    "AUTHS_PHOTO_DOWNLOAD_TIMEOUT",
+    default=10,
+    cast=int
+)
+MEDIA_REQUIRE_AUTH = config(
+    "MEDIA_REQUIRE_AUTH",
+    default=False,
+    cast=bool
+)
+MEDIA_ACCEL_REDIRECT_PREFIX = config(
+    "MEDIA_ACCEL_REDIRECT_PREFIX",
+    default=""
+)
+MEDIA_SENDFILE_HEADER = config(
+    "MEDIA_SENDFILE_HEADER",
+    default=""
+)
+METRICS_ENABLED = config(
+    "METRICS_ENABLED",
+    default=False,
+    cast=bool
+)
+METRICS_DIR = config(
+    "METRICS_DIR",
+    default=""
+)
+METRICS_FLUSH_INTERVAL = config(
+    "METRICS_FLUSH_INTERVAL",
+    default=10,
+    cast=int
+)
+METRICS_TOKEN = config(
+    "METRICS_TOKEN",
+    default=""
+)
+PROFILER_ENABLED = config(
+    "PROFILER_ENABLED",
+    default=False,
+    cast=bool
+)
+PROFILER_MODE = config(
+    "PROFILER_MODE",
+    default="cprofile"
+)
+PROFILER_SAMPLE_RATE = config(
+    "PROFILER_SAMPLE_RATE",
+    default=0.0,
+    cast=float
+)
+PROFILER_SAMPLER_INTERVAL = config(
+    "PROFILER_SAMPLER_INTERVAL",
+    default=0.005,
+    cast=float
+)
+PROFILER_MAX_PROFILES = config(
+    "PROFILER_MAX_PROFILES",
+    default=100,
+    cast=int
+)
+PROFILER_TOKEN_MAX_AGE = config(
+    "PROFILER_TOKEN_MAX_AGE",
+    default=24 * 60 * 60,
+    cast=int
+)
+DB_QUERY_LOG_ENABLED = config(
+    "DB_QUERY_LOG_ENABLED",
+    default=False,
+    cast=bool
+)
+DB_SLOW_QUERY_MS = config(
+    "DB_SLOW_QUERY_MS",
+    default=100,
+    cast=float
+)
+DB_SLOW_QUERY_EXPLAIN = config(
+    "DB_SLOW_QUERY_EXPLAIN",
+    default=True,
+    cast=bool
+)
 
 # ----------------------------------------------
 # DRF settings
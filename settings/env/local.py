@@ -1,3 +1,6 @@
+# Third party
+from decouple import config
+
 # Local
 from settings.base import *  # noqa
 
@@ -15,6 +18,16 @@ DATABASES = {
         'NAME': 'db.sqlite3',
     }
 }
+# Same database as in production, e.g. to check the query plans in tests
+if config("DB_NAME", default=""):
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': config("DB_NAME", cast=str),
+        'USER': config("DB_USER", cast=str),
+        'PASSWORD': config("DB_POSTGRESQL_PASSWORD", cast=str),
+        'HOST': config("DB_HOST", default="localhost", cast=str),
+        'PORT': config("DB_PORT", default=5432, cast=int)
+    }
 ALLOWED_HOSTS = [
     "127.0.0.1",
     "localhost",
@@ -20,12 +20,18 @@ from rest_framework.routers import DefaultRouter
 # Project
 from apps.auths.views import CustomUserViewSet
 from apps.locations.views import CityViewSet
+from apps.events.views import CategoryViewSet
+from apps.abstracts.views import (
+    serve_media,
+    serve_metrics,
+)
 
 
 router: DefaultRouter = DefaultRouter(trailing_slash=False)
 
 router.register('auths/users', CustomUserViewSet)
 router.register("locations/city", CityViewSet)
+router.register("events/categories", CategoryViewSet)
 
 urlpatterns = [
     path(
@@ -50,10 +56,17 @@ urlpatterns = [
 ] + static(
     prefix=settings.STATIC_URL,
     document_root=settings.STATIC_ROOT
-) + static(
-    prefix=settings.MEDIA_URL,
-    document_root=settings.MEDIA_ROOT
 ) + [
+    path(
+        route=f"{settings.MEDIA_URL.lstrip('/')}<path:path>",
+        view=serve_media,
+        name="media"
+    ),
+    path(
+        route="metrics",
+        view=serve_metrics,
+        name="metrics"
+    ),
     path(
         route="api/v1/",
         view=include(router.urls)